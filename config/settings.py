@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,7 +46,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "gigwork.middleware.MetricsMiddleware",
+    "gigwork.middleware.AdmissionControlMiddleware",
+    "gigwork.middleware.ServerTimingMiddleware",
+    "gigwork.middleware.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # ETags on every GET response, clients revalidate cached lists with 304s
+    "django.middleware.http.ConditionalGetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -85,6 +92,24 @@ DATABASES = {
     }
 }
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# "default" holds the page cache and list counts of one process. Throttle
+# buckets have their own cache, so that page cache traffic does not evict and
+# silently refill them. It is per process too: with N workers each one allows
+# the full limits, point it to a shared backend (Redis, Memcached) to enforce
+# them across workers. Idempotency-Key records must not be evicted and must be
+# seen by every worker, so they are not cached but kept in the IdempotencyKey
+# table.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -143,11 +168,116 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
-    "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_FILTER_BACKENDS": [
+        "django_filters.rest_framework.DjangoFilterBackend",
+        # ?ordering= on the 'ordering_fields' of each viewset
+        "rest_framework.filters.OrderingFilter",
+    ],
     "DEFAULT_PARSER_CLASSES": [
         "rest_framework.parsers.JSONParser",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_THROTTLE_CLASSES": [
+        "gigwork.throttling.TokenRateThrottle",
+        "gigwork.throttling.IPRateThrottle",
+        "gigwork.throttling.ActionRateThrottle",
+    ],
+}
+
+# Token-bucket rate limits, buckets are kept in the "throttle" cache, the limits
+# apply per worker process unless that cache is shared
+# capacity is the burst size, refill_rate the sustained requests per second
+# kinds or actions that are left out are not limited
+THROTTLE_BUCKETS = {
+    # 50 per second lets 'gig_client.py import' load thousands of records per
+    # minute, the cheap create actions bound the cost of a full bucket
+    "token": {"capacity": 300, "refill_rate": 50.0},
+    "ip": {"capacity": 600, "refill_rate": 100.0},
+    "actions": {
+        # a cache miss on a full list serializes the whole table, pages
+        # (?limit=) and id lookups (?id=) count as "list_page"
+        "list": {"capacity": 60, "refill_rate": 1.0},
+    },
 }
 
 AUTH_USER_MODEL = "gigwork.User"
+
+# Per-request performance instrumentation (Server-Timing header + log record)
+# share of requests that are measured, 0.0 turns the instrumentation off
+SERVER_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.0
+
+# Prometheus metrics served at /metrics
+# with several worker processes, point METRICS_DIR to a directory shared by them
+METRICS_DIR = os.environ.get("GIGWORK_METRICS_DIR")
+METRICS_FLUSH_INTERVAL = 1.0
+
+# slow-query log, disabled unless GIGWORK_SLOW_QUERY_MS is set
+# summarize it with 'python manage.py slow_query_report'
+SLOW_QUERY_THRESHOLD_MS = (
+    float(os.environ["GIGWORK_SLOW_QUERY_MS"])
+    if "GIGWORK_SLOW_QUERY_MS" in os.environ
+    else None
+)
+SLOW_QUERY_LOG = os.environ.get(
+    "GIGWORK_SLOW_QUERY_LOG", str(BASE_DIR / "slow_queries.ndjson")
+)
+
+# Adaptive concurrency limit per worker process, excess requests get 503
+# None turns admission control off
+ADMISSION_CONTROL = {
+    "initial_limit": 16,
+    "min_limit": 2,
+    "max_limit": 64,
+    # requests slower than this lower the limit, faster ones raise it
+    "target_latency_seconds": 0.25,
+    # full-list reads may only use this share of the limit
+    "low_priority_share": 0.5,
+    # how long a request may wait for a free slot before it is shed
+    "max_queue_seconds": {"high": 0.2, "low": 0.02},
+    "retry_after_seconds": 1,
+    # URL names that are never shed
+    "exempt": ["metrics", "throttle-usage"],
+}
+
+# OpenAPI schema served at gigwork/api/schema/, built once per process
+# set GIGWORK_SCHEMA_FILE to serve a schema file generated at build time with
+# 'python manage.py spectacular --file schema.yml' instead of introspecting
+OPENAPI_SCHEMA_FILE = os.environ.get("GIGWORK_SCHEMA_FILE")
+SCHEMA_MAX_AGE = 60 * 60
+SCHEMA_GZIP = True
+
+# list responses carry total and per-status counts, cached until the next write
+# above this many rows a count up to COUNT_STALE_TTL seconds old is served after
+# writes and marked as approximate
+COUNT_APPROXIMATE_THRESHOLD = 100_000
+COUNT_STALE_TTL = 60
+
+# most ids accepted by the batch lookup of a collection (<collection>/batch/?ids=)
+BATCH_MAX_IDS = 100
+
+# budget of 'python manage.py benchmark_startup': median milliseconds from the
+# start of the interpreter until a new worker has served its first request
+STARTUP_BUDGET_MS = 1000
+
+# largest page of the keyset pagination of lists (<collection>/?limit=&after=)
+PAGE_MAX_LIMIT = 1000
+
+# Idempotency-Key records of POST requests are kept for a day
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+# how long a key stays claimed by a request that has not finished
+IDEMPOTENCY_LOCK_TTL = 30
+# every worker deletes the expired records at most this often
+IDEMPOTENCY_PURGE_INTERVAL = 60 * 5
+
+# Logging
+# https://docs.djangoproject.com/en/5.1/topics/logging/
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "gigwork": {"handlers": ["console"], "level": "INFO"},
+    },
+}
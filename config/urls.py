@@ -20,10 +20,9 @@ https://drf-spectacular.readthedocs.io/en/latest/readme.html
 
 from django.contrib import admin
 from django.urls import include, path
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework import routers
 
-from gigwork import views
+from gigwork import schema, views
 
 router = routers.DefaultRouter()
 router.register(r"users", views.UserViewSet, basename="users")
@@ -32,12 +31,11 @@ router.register(r"postings", views.PostingViewSet, basename="postings")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", views.metrics, name="metrics"),
+    path("throttle", views.throttle_usage, name="throttle-usage"),
     path("gigwork/api/", include(router.urls)),
     path("gigwork/api/root/", views.api_root, name="api-root"),
-    path("gigwork/api/schema/", SpectacularAPIView.as_view(), name="schema"),
-    path(
-        "gigwork/api/docs/swagger/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
-        name="swagger-ui",
-    ),
+    # built once per process, see gigwork/schema.py
+    path("gigwork/api/schema/", schema.schema_view, name="schema"),
+    path("gigwork/api/docs/swagger/", schema.swagger_view, name="swagger-ui"),
 ]
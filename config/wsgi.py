@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
+
+# the warm-up imports the models, so it comes after the app registry is ready
+# pylint: disable-next=wrong-import-position
+from gigwork.warmup import prepare  # noqa: E402
+
+# before the first request, and before the fork of servers that preload the app
+prepare()
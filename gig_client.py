@@ -13,31 +13,401 @@ https://rich.readthedocs.io/en/stable/tables.html
 https://www.geeksforgeeks.org/python-unpack-list/
 https://www.geeksforgeeks.org/python-ways-to-convert-string-to-json-object/
 https://www.geeksforgeeks.org/python-program-to-remove-last-character-from-the-string/
+https://github.com/msgpack/msgpack-python
+https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/If-None-Match
+https://docs.python.org/3/library/os.html#os.replace
+https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Cache-Control
+https://docs.python.org/3/library/sqlite3.html
+https://docs.python.org/3/library/concurrent.futures.html#threadpoolexecutor
+https://rich.readthedocs.io/en/stable/progress.html
+https://docs.python.org/3/library/json.html#json.JSONDecoder.raw_decode
+https://requests.readthedocs.io/en/latest/user/advanced/#body-content-workflow
+https://requests.readthedocs.io/en/latest/user/advanced/#timeouts
+https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+https://www.sqlite.org/json1.html#jex
+https://www.sqlite.org/expridx.html
 """
 
 import argparse
+import csv
+import hashlib
 import json
 import os
-from urllib.parse import urljoin
-
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode, urljoin, urlsplit
+
+import msgpack
 import requests
 from rich.console import Console
 from rich.pretty import pprint
+from rich.progress import Progress
 from rich.table import Table
-from yaml import safe_load
 
 API_ROOT = "gigwork/api/root/"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# JSON stays acceptable so endpoints without a binary renderer still answer
+WIRE_FORMATS = {
+    "json": "application/json",
+    "msgpack": f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9",
+}
+SCHEMA_MEDIA_TYPE = "application/vnd.oai.openapi+json"
+# discovered control URIs and resource keys are kept on disk per host, the root
+# is fetched again and the schema revalidated once they are older than this
+DISCOVERY_TTL = 60 * 60
+DISCOVERY_CACHE_DIR = os.environ.get(
+    "GIGWORK_CLIENT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "gigwork")
+)
+RESOURCE_SCHEMAS = {"users": "User", "postings": "Posting", "gigs": "Gig"}
+# fields set by the server, never prompted for
+AUTO_FIELDS = [
+    "id",
+    "owner",
+    "created_at",
+    "expires_at",
+    "start_date",
+    "end_date",
+    "modified_at",
+    "@controls",
+]
+# actions that need the fields of the resource, sync stores them for --local
+KEYED_ACTIONS = {"create", "update", "filter", "import", "sync"}
+# concurrent POST requests of the import action, records are read from the input
+# only as fast as they are sent
+IMPORT_WORKERS = 8
+IMPORT_REPORT = "import_failures.ndjson"
+# items per page requested by the export action, pages are read in chunks
+EXPORT_PAGE_SIZE = 500
+EXPORT_CHUNK_SIZE = 64 * 1024
+ITEMS_START = re.compile(r'\s*\{\s*"items"\s*:\s*\[')
+# GET responses cached by --http-cache, the file is bounded by HTTP_CACHE_MAX_BYTES
+# and the most recently used HTTP_CACHE_MEMORY_BYTES of it are kept in memory
+HTTP_CACHE_FILE = os.path.join(DISCOVERY_CACHE_DIR, "http.sqlite3")
+HTTP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+HTTP_CACHE_MEMORY_BYTES = 8 * 1024 * 1024
+# seconds to wait for a connection and for each read of a response
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+# connections kept alive per host, enough for the concurrent import workers
+POOL_SIZE = 16
+# idempotent requests are retried after connection errors, timeouts and these
+# statuses with exponential backoff and full jitter, or after their Retry-After.
+# POST requests carry an Idempotency-Key, so they can be retried without
+# duplicates, also after a 409 of a request with the same key in progress.
+RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_MAX_BACKOFF = 30
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# item fields indexed in the local mirror read by list and filter with --local,
+# nested fields as dotted paths
+MIRROR_INDEXES = {
+    "users": ["email", "last_name"],
+    "postings": ["status", "price", "owner.id"],
+    "gigs": ["status", "posting", "owner.id"],
+}
+# fields serialized as decimal strings, compared as numbers in the mirror
+NUMERIC_FIELDS = {"price"}
+MIRROR_FIELD = re.compile(r"^\w+(\.\w+)*$")
+
+
+class APIError(Exception):
+    """
+    the API answered with an unexpected status
+    """
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__(
+            f"{response.request.method} {response.url}: {response.status_code} "
+            f"{response.text[:200]}"
+        )
+
+
+class ClientError(APIError):
+    """
+    the API rejected the request with a 4xx status
+    """
+
+
+class ServerError(APIError):
+    """
+    the API failed with a 5xx status, after all retries
+    """
+
+
+class TransportError(Exception):
+    """
+    the API could not be reached or did not answer in time, after all retries
+    """
+
+
+class NotSyncedError(Exception):
+    """
+    the local mirror was asked for a collection that has never been synced
+    """
+
+
+def api_error(response):
+    """
+    return the exception of an unexpected response
+    """
+    if 400 <= response.status_code < 500:
+        return ClientError(response)
+    if response.status_code >= 500:
+        return ServerError(response)
+    return APIError(response)
+
+
+def retry_after(response):
+    """
+    return the seconds to wait given by the Retry-After header of a response,
+    in seconds or as an HTTP date, 0 without one
+    """
+    value = response.headers.get("Retry-After", "").strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, when.timestamp() - time.time())
+
+
+def backoff(attempt):
+    """
+    return the delay before a retry: exponential backoff with full jitter, so
+    concurrent clients do not retry in lockstep
+    """
+    return random.uniform(0, min(RETRY_MAX_BACKOFF, RETRY_BACKOFF * 2**attempt))
+
+
+def cache_lifetime(headers):
+    """
+    return how many seconds a response may be used without revalidation
+    according to its Cache-Control or Expires header, None if it must not be
+    stored at all
+    """
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        directives[name.lower()] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    if directives.get("max-age", "").isdigit():
+        return int(directives["max-age"])
+    if "Expires" in headers and "Date" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["Expires"])
+            date = parsedate_to_datetime(headers["Date"])
+        except (TypeError, ValueError):
+            return 0
+        return max(0, (expires - date).total_seconds())
+    return 0
+
+
+class HTTPCache:
+    """
+    cache of GET responses with their validators, in memory and optionally in a
+    SQLite file. Both are bounded by size and evict the least recently used
+    responses first. Fresh responses are used without a request, stale ones are
+    revalidated with If-None-Match or If-Modified-Since.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        max_bytes=HTTP_CACHE_MAX_BYTES,
+        memory_bytes=HTTP_CACHE_MEMORY_BYTES,
+    ):
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY, url TEXT, content_type TEXT, etag TEXT,
+                    last_modified TEXT, expires REAL, body BLOB, size INTEGER,
+                    used REAL
+                );
+                CREATE INDEX IF NOT EXISTS responses_used ON responses (used);
+                CREATE INDEX IF NOT EXISTS responses_url ON responses (url);
+                """)
+
+    def close(self):
+        """
+        close the SQLite file
+        """
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def remember(self, key, entry):
+        """
+        keep the entry in memory as the most recently used one
+        """
+        if key in self.memory:
+            self.memory_size -= len(self.memory.pop(key)["body"])
+        if len(entry["body"]) > self.memory_bytes:
+            return
+        self.memory[key] = entry
+        self.memory_size += len(entry["body"])
+        while self.memory_size > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted["body"])
+
+    def get(self, key):
+        """
+        return the cached entry of the key or None
+        """
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry
+            if self.db is None:
+                return None
+            row = self.db.execute(
+                "SELECT url, content_type, etag, last_modified, expires, body "
+                "FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            with self.db:
+                self.db.execute(
+                    "UPDATE responses SET used = ? WHERE key = ?", (time.time(), key)
+                )
+            fields = ("url", "content_type", "etag", "last_modified", "expires")
+            entry = dict(zip(fields, row[:5]), body=bytes(row[5]))
+            self.remember(key, entry)
+            return entry
+
+    def put(self, key, url, response, lifetime):
+        """
+        store a 200 response that may be used for the given number of seconds
+        """
+        entry = {
+            "url": url,
+            "content_type": response.headers.get("Content-Type", ""),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "expires": time.time() + lifetime,
+            "body": response.content,
+        }
+        with self.lock:
+            self.remember(key, entry)
+            if self.db is None:
+                return
+            size = len(entry["body"])
+            with self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, *entry.values(), size, time.time()),
+                )
+                total = self.db.execute("SELECT SUM(size) FROM responses").fetchone()[0]
+                for old_key, old_size in self.db.execute(
+                    "SELECT key, size FROM responses ORDER BY used"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+
+    def refresh(self, key, lifetime):
+        """
+        extend the lifetime of an entry after a 304 Not Modified
+        """
+        with self.lock:
+            expires = time.time() + lifetime
+            if key in self.memory:
+                self.memory[key]["expires"] = expires
+            if self.db is not None:
+                with self.db:
+                    self.db.execute(
+                        "UPDATE responses SET expires = ?, used = ? WHERE key = ?",
+                        (expires, time.time(), key),
+                    )
+
+    def invalidate(self, url_prefix):
+        """
+        drop the entries of every URL starting with the prefix
+        """
+        with self.lock:
+            for key in [
+                k for k, e in self.memory.items() if e["url"].startswith(url_prefix)
+            ]:
+                self.memory_size -= len(self.memory.pop(key)["body"])
+            if self.db is not None:
+                with self.db:
+                    self.db.execute(
+                        "DELETE FROM responses WHERE substr(url, 1, ?) = ?",
+                        (len(url_prefix), url_prefix),
+                    )
+
+
+def collection_url(url):
+    """
+    return the collection URL of a collection or item URL
+    """
+    path = url.split("?")[0]
+    segments = path.rstrip("/").split("/")
+    if segments[-1].isdigit():
+        segments.pop()
+    return "/".join(segments) + "/"
 
 
 class APIDataSource:
     """
-    generic API class
+    generic API class, every request goes through 'request' which applies the
+    timeouts and retries and raises the exceptions above
     """
 
-    def __init__(self, host, ca_cert=None, tkn=None):
-        assert host.startswith("http"), "No protocol in host address"
+    # pylint: disable-next=too-many-arguments
+    def __init__(
+        self,
+        host,
+        ca_cert=None,
+        tkn=None,
+        wire_format="json",
+        cache=None,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        retries=RETRIES,
+        pool_size=POOL_SIZE,
+    ):
+        if not host.startswith("http"):
+            raise ValueError("No protocol in host address")
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown wire format {wire_format}")
         self.host = host
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = retries
         self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept": WIRE_FORMATS[wire_format]})
         if ca_cert:
             self.session.verify = ca_cert
         if tkn:
@@ -48,84 +418,488 @@ class APIDataSource:
 
     def __exit__(self, exc_type, exc_value, exc_tb):
         self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def request(self, method, uri, expected=(200,), **kwargs):
+        """
+        send a request and return its response, raise APIError for a status
+        not in *expected* and TransportError when the API can not be reached.
+        Idempotent requests, and POST requests with an Idempotency-Key, are
+        retried.
+        """
+        url = urljoin(self.host, uri)
+        retry_codes = RETRY_STATUS_CODES
+        if "Idempotency-Key" in kwargs.get("headers", {}):
+            retry_codes = RETRY_STATUS_CODES | {409}
+        elif method not in IDEMPOTENT_METHODS:
+            retry_codes = set()
+        retries = self.retries if retry_codes else 0
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.request(
+                    method, url, timeout=self.timeout, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == retries:
+                    raise TransportError(f"{method} {url}: {e}") from e
+                delay = backoff(attempt)
+            else:
+                if response.status_code not in retry_codes or attempt == retries:
+                    break
+                delay = max(backoff(attempt), retry_after(response))
+                response.close()
+            time.sleep(delay)
+        if response.status_code not in expected:
+            raise api_error(response)
+        return response
+
+    @staticmethod
+    def decode_body(content_type, body):
+        """
+        decode a response body according to its content type
+        """
+        if content_type.startswith(MSGPACK_MEDIA_TYPE):
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body)
+
+    @classmethod
+    def decode(cls, response):
+        """
+        decode the body of a response according to its content type
+        """
+        return cls.decode_body(
+            response.headers.get("Content-Type", ""), response.content
+        )
+
+    def cache_key(self, url):
+        """
+        return the cache key of a GET request, responses vary by Accept and
+        Authorization
+        """
+        authorization = self.session.headers.get("Authorization", "")
+        user = hashlib.sha256(authorization.encode()).hexdigest()[:16]
+        return f"{self.session.headers.get('Accept')} {user} {url}"
 
     def get(self, uri):
         """
-        HTTP GET request
+        HTTP GET request, answered from the cache while the response is fresh
+        and revalidated when it is stale
+        """
+        url = urljoin(self.host, uri)
+        if self.cache is None:
+            return self.decode(self.request("GET", url))
+        key = self.cache_key(url)
+        entry = self.cache.get(key)
+        headers = {}
+        if entry is not None:
+            if entry["expires"] > time.time():
+                return self.decode_body(entry["content_type"], entry["body"])
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self.request("GET", url, (200, 304), headers=headers)
+        lifetime = cache_lifetime(response.headers)
+        if response.status_code == 304:
+            self.cache.refresh(key, lifetime or 0)
+            return self.decode_body(entry["content_type"], entry["body"])
+        validated = "ETag" in response.headers or "Last-Modified" in response.headers
+        if lifetime is not None and (lifetime > 0 or validated):
+            self.cache.put(key, url, response, lifetime)
+        return self.decode(response)
+
+    def invalidate(self, uri):
         """
-        response = self.session.get(urljoin(self.host, uri))
-        assert response.status_code == 200
-        return response.json()
+        drop the cached responses of the collection of the URI after a write
+        """
+        if self.cache is not None:
+            self.cache.invalidate(collection_url(urljoin(self.host, uri)))
 
     def post(self, uri, data):
         """
-        HTTP POST request
+        HTTP POST request. Every attempt sends the same Idempotency-Key, the
+        server replays the first response instead of creating a duplicate.
         """
-        response = self.session.post(urljoin(self.host, uri), json=data)
-        assert response.status_code == 201
-        return response.json()
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        response = self.request("POST", uri, (201,), json=data, headers=headers)
+        self.invalidate(uri)
+        return self.decode(response)
 
     def put(self, uri, data):
         """
         HTTP PUT request
         """
-        response = self.session.put(urljoin(self.host, uri), json=data)
-        assert response.status_code == 200
-        return response.json()
+        response = self.request("PUT", uri, json=data)
+        self.invalidate(uri)
+        return self.decode(response)
 
     def delete(self, uri):
         """
         HTTP DELETE request
         """
-        response = self.session.delete(urljoin(self.host, uri))
-        assert response.status_code == 204
+        self.request("DELETE", uri, (204,))
+        self.invalidate(uri)
 
-    def get_schema(self, uri):
+    def get_schema(self, uri, etag=None):
         """
-        HTTP GET request for yaml schema
+        HTTP GET request for the JSON schema, return the schema and its ETag.
+        The schema is None when the given ETag is still current.
         """
-        response = self.session.get(urljoin(self.host, uri))
-        assert response.status_code == 200
-        return safe_load(response.text)
+        headers = {"Accept": SCHEMA_MEDIA_TYPE}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.request("GET", uri, (200, 304), headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        return response.json(), response.headers.get("ETag")
 
 
-def get_root_uri(host_uri):
+class DiscoveryCache:
     """
-    return root URI of the API
+    control URIs of the API root and resource keys of the schema, cached in a
+    JSON file per host. Within the TTL nothing is requested; after it the root
+    is fetched again and the schema is revalidated with If-None-Match, so it is
+    only downloaded again when it has changed.
     """
-    return urljoin(host_uri, API_ROOT)
 
+    def __init__(self, client, host, cache_dir=DISCOVERY_CACHE_DIR, ttl=DISCOVERY_TTL):
+        self.client = client
+        self.root = get_root_uri(host)
+        self.ttl = ttl
+        netloc = urlsplit(host).netloc.replace(":", "_")
+        self.path = os.path.join(cache_dir, f"{netloc or 'default'}.json")
+        self.data = self.load()
 
-def get_users_uri(client, root):
-    """
-    return the URI for users
-    """
-    response = client.get(root)
-    return response.get("@controls").get("users").get("href")
+    def load(self):
+        """
+        return the cached data, empty when there is none or it is unreadable
+        """
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self):
+        """
+        write the cached data, replacing the file atomically
+        """
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8"
+            ) as file:
+                json.dump(self.data, file)
+            os.replace(file.name, self.path)
+        except OSError:
+            # the cache is an optimization, a read-only home still works
+            pass
+
+    def clear(self):
+        """
+        forget everything, the next lookups discover the API again
+        """
+        self.data = {}
+
+    def fresh(self, key):
+        """
+        return True if the entry was stored or revalidated within the TTL
+        """
+        entry = self.data.get(key)
+        return bool(entry) and time.time() - entry.get("checked_at", 0) < self.ttl
 
+    def controls(self):
+        """
+        return the control URIs of the API root by name
+        """
+        if not self.fresh("root"):
+            response = self.client.get(self.root)
+            self.data["root"] = {
+                "controls": {
+                    name: control.get("href")
+                    for name, control in response.get("@controls", {}).items()
+                },
+                "checked_at": time.time(),
+            }
+            self.save()
+        return self.data["root"]["controls"]
+
+    def control(self, name):
+        """
+        return the URI of the named control of the API root
+        """
+        return self.controls()[name]
+
+    def schema_keys(self):
+        """
+        return the cached keys of the schema, revalidated after the TTL
+        """
+        cached = self.data.get("schema", {})
+        if not self.fresh("schema") or "writable" not in cached:
+            # a file written before writable keys were kept has to be downloaded
+            etag = cached.get("etag") if "writable" in cached else None
+            schema, etag = self.client.get_schema(self.control("schema"), etag)
+            keys = cached.get("keys", {})
+            writable = cached.get("writable", {})
+            if schema is not None:
+                keys = {
+                    name: get_resource_keys(schema, name) for name in RESOURCE_SCHEMAS
+                }
+                writable = {
+                    name: get_writable_keys(schema, name) for name in RESOURCE_SCHEMAS
+                }
+            self.data["schema"] = {
+                "etag": etag,
+                "keys": keys,
+                "writable": writable,
+                "checked_at": time.time(),
+            }
+            self.save()
+        return self.data["schema"]
+
+    def resource_keys(self, resource):
+        """
+        return the keys of the given resource, see 'get_resource_keys'
+        """
+        return self.schema_keys()["keys"][resource]
 
-def get_postings_uri(client, root):
+    def writable_keys(self, resource):
+        """
+        return the writable keys of the given resource, see 'get_writable_keys'
+        """
+        return self.schema_keys()["writable"][resource]
+
+
+def mirror_expression(field):
     """
-    return the URI for postings
+    return the SQL expression of an item field in the mirror, the same in the
+    indexes and in the queries so the indexes are used
     """
-    response = client.get(root)
-    return response.get("@controls").get("postings").get("href")
+    if not MIRROR_FIELD.match(field):
+        raise ValueError(f"invalid field name {field}")
+    expression = f"json_extract(data, '$.{field}')"
+    if field in NUMERIC_FIELDS:
+        return f"CAST({expression} AS REAL)"
+    return expression
 
 
-def get_gigs_uri(client, root):
+class Mirror:
     """
-    return the URI for gigs
+    local SQLite replica of the collections of one host, kept up to date by
+    'sync' and read by 'items'. Items are stored as JSON, one table per
+    collection with expression indexes on the fields in MIRROR_INDEXES.
+    Collections with a modified_at field are synced incrementally: only items
+    modified since the newest one already mirrored are fetched. When the
+    server's item count then differs from the mirror's, items were deleted,
+    and the collection is walked page by page instead, as are collections
+    without modified_at. Pages are fetched without the counts, so that their
+    ETag only changes with their items, revalidated with If-None-Match, and
+    each changed page replaces the range of ids it covers, which also drops
+    the items deleted on the server.
     """
-    response = client.get(root)
-    return response.get("@controls").get("gigs").get("href")
 
+    def __init__(self, host, cache_dir=DISCOVERY_CACHE_DIR):
+        netloc = urlsplit(host).netloc.replace(":", "_")
+        self.path = os.path.join(cache_dir, f"{netloc or 'default'}.sqlite3")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        with self.db:
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS synced (
+                    resource TEXT PRIMARY KEY, high_water TEXT, synced_at REAL,
+                    uri TEXT, keys TEXT
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY, etag TEXT, last_id INTEGER, next_url TEXT
+                );
+                """)
+            # table and index names come from MIRROR_INDEXES, not from input
+            for resource, fields in MIRROR_INDEXES.items():
+                self.db.execute(
+                    f"CREATE TABLE IF NOT EXISTS {resource} "
+                    "(id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+                )
+                for field in fields:
+                    name = f"{resource}_{field.replace('.', '_')}"
+                    self.db.execute(
+                        f"CREATE INDEX IF NOT EXISTS {name} "
+                        f"ON {resource} ({mirror_expression(field)})"
+                    )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def close(self):
+        """
+        close the SQLite file
+        """
+        self.db.close()
+
+    def write(self, resource, items):
+        """
+        insert or replace the items, return their number
+        """
+        self.db.executemany(
+            f"INSERT OR REPLACE INTO {resource} (id, data) VALUES (?, ?)",
+            [(item["id"], json.dumps(item)) for item in items],
+        )
+        return len(items)
+
+    def count(self, resource):
+        """
+        return the number of mirrored items of a collection
+        """
+        return self.db.execute(f"SELECT COUNT(*) FROM {resource}").fetchone()[0]
+
+    def high_water(self, resource):
+        """
+        return the newest modified_at of the last sync, None when the collection
+        was never synced or has no such field
+        """
+        row = self.db.execute(
+            "SELECT high_water FROM synced WHERE resource = ?", (resource,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def metadata(self, resource):
+        """
+        return the collection URI and the resource keys stored by the last
+        sync, local actions use them instead of discovering the API
+        """
+        row = self.db.execute(
+            "SELECT uri, keys FROM synced WHERE resource = ?", (resource,)
+        ).fetchone()
+        if row is None:
+            raise NotSyncedError(f"{resource} not synced, run the sync action first")
+        return row[0], json.loads(row[1])
+
+    def fetch_changes(self, client, resource, uri, high_water, page_size):
+        """
+        write the items modified since the high water mark, return their number.
+        The items of the mark itself are fetched again, others may have been
+        written in the same instant.
+        """
+        query = urlencode(
+            {"modified_at__gte": high_water, "limit": page_size, "counts": 0}
+        )
+        url = urljoin(client.host, f"{uri}?{query}")
+        written = 0
+        while url:
+            body = client.decode(client.request("GET", url))
+            with self.db:
+                written += self.write(resource, body["items"])
+            url = body.get("@controls", {}).get("next", {}).get("href")
+        return written
+
+    def complete(self, client, uri, resource):
+        """
+        return True if the server counts as many items as the mirror holds
+        """
+        url = urljoin(client.host, urljoin(uri, "?limit=1"))
+        counts = client.decode(client.request("GET", url)).get("counts")
+        if not counts or counts.get("approximate"):
+            return False
+        return counts["total"] == self.count(resource)
 
-def get_schema_uri(client, root):
+    def walk(self, client, resource, uri, page_size):
+        """
+        fetch the pages of a whole collection, skip those that have not changed
+        and replace the range of ids of the others, return the number of items
+        written and deleted
+        """
+        # without the collection's counts a page only changes with its items
+        first = urljoin(client.host, f"{uri}?limit={page_size}&counts=0")
+        url, after = first, 0
+        written = deleted = 0
+        visited = []
+        while url:
+            visited.append(url)
+            saved = self.db.execute(
+                "SELECT etag, last_id, next_url FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            headers = {"If-None-Match": saved[0]} if saved and saved[0] else {}
+            response = client.request("GET", url, (200, 304), headers=headers)
+            if response.status_code == 304:
+                after, url = saved[1], saved[2]
+                continue
+            body = client.decode(response)
+            items = body["items"]
+            next_url = body.get("@controls", {}).get("next", {}).get("href")
+            # the last page covers every id after the previous one
+            last_id = items[-1]["id"] if next_url else None
+            with self.db:
+                written += self.write(resource, items)
+                deleted += self.db.execute(
+                    f"DELETE FROM {resource} WHERE id > ? "
+                    "AND (? IS NULL OR id <= ?) "
+                    "AND id NOT IN (SELECT value FROM json_each(?))",
+                    (after, last_id, last_id, json.dumps([i["id"] for i in items])),
+                ).rowcount
+                self.db.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                    (url, response.headers.get("ETag"), last_id, next_url),
+                )
+            after, url = last_id, next_url
+        # pages of earlier walks that were not reached again are outdated
+        prefix = first.split("?")[0]
+        with self.db:
+            self.db.execute(
+                "DELETE FROM pages WHERE substr(url, 1, ?) = ? "
+                "AND url NOT IN (SELECT value FROM json_each(?))",
+                (len(prefix), prefix, json.dumps(visited)),
+            )
+        return written, deleted
+
+    def sync(self, client, resource, uri, keys, page_size=EXPORT_PAGE_SIZE):
+        """
+        bring the replica of a collection up to date and store its URI and keys,
+        return the number of items written and deleted
+        """
+        written = deleted = 0
+        high_water = self.high_water(resource)
+        if high_water:
+            written = self.fetch_changes(client, resource, uri, high_water, page_size)
+        if not high_water or not self.complete(client, uri, resource):
+            walked, deleted = self.walk(client, resource, uri, page_size)
+            written += walked
+        newest = self.db.execute(
+            f"SELECT MAX(json_extract(data, '$.modified_at')) FROM {resource}"
+        ).fetchone()[0]
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO synced VALUES (?, ?, ?, ?, ?)",
+                (resource, newest, time.time(), uri, json.dumps(keys)),
+            )
+        return written, deleted
+
+    def items(self, resource, data=None):
+        """
+        return the mirrored items of a collection whose fields equal the given
+        values, in the form of a list response
+        """
+        self.metadata(resource)
+        where, params = [], []
+        for field, value in (data or {}).items():
+            where.append(f"{mirror_expression(field)} = ?")
+            params.append(value)
+        query = f"SELECT data FROM {resource}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        rows = self.db.execute(query + " ORDER BY id", params)
+        return {"items": [json.loads(row[0]) for row in rows]}
+
+
+def get_root_uri(host_uri):
     """
-    return the URI for gigs
+    return root URI of the API
     """
-    response = client.get(root)
-    return response.get("@controls").get("schema").get("href")
+    return urljoin(host_uri, API_ROOT)
 
 
 def list_table(data, res):
@@ -206,34 +980,24 @@ def create_token_file(resp):
         file.write(f"Token {resp.get('Token', '')}")
 
 
-def get_resource_keys(client, uri, resource):
+def get_resource_keys(schema, resource):
     """
-    return list of keys for the given resource model
+    return list of keys for the given resource model of the schema
     """
-    schema = client.get_schema(uri)
     schemas = schema.get("components", {}).get("schemas", {})
-    props = {}
-    if resource == "users":
-        props = schemas.get("User").get("properties", {})
-    elif resource == "postings":
-        props = schemas.get("Posting").get("properties", {})
-    elif resource == "gigs":
-        props = schemas.get("Gig").get("properties", {})
-
-    keys = list(props.keys())
-    auto_fields = [
-        "id",
-        "owner",
-        "created_at",
-        "expires_at",
-        "start_date",
-        "end_date",
-        "@controls",
-    ]
-    for field in auto_fields:
-        if field in keys:
-            keys.remove(field)
-    return keys
+    props = schemas.get(RESOURCE_SCHEMAS[resource], {}).get("properties", {})
+    return [key for key in props if key not in AUTO_FIELDS]
+
+
+def get_writable_keys(schema, resource):
+    """
+    return list of keys a request may send for the given resource model of the
+    schema, including optional ones such as 'expires_at' that are not prompted
+    for
+    """
+    schemas = schema.get("components", {}).get("schemas", {})
+    props = schemas.get(RESOURCE_SCHEMAS[resource], {}).get("properties", {})
+    return [key for key, prop in props.items() if not prop.get("readOnly")]
 
 
 def data_input(keys):
@@ -246,7 +1010,13 @@ def data_input(keys):
         value = input(f"{key}: ")
         if value:
             data[key] = value
+    return convert_types(data)
+
 
+def convert_types(data):
+    """
+    convert the numeric fields of input data from strings
+    """
     price = data.get("price")
     if price:
         data["price"] = float(price)
@@ -256,6 +1026,53 @@ def data_input(keys):
     return data
 
 
+def open_file(path, mode):
+    """
+    open a text file for reading or writing, '-' is stdin or stdout and is not
+    closed afterwards
+    """
+    if path == "-":
+        return nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def read_records(file, fmt):
+    """
+    yield (line number, record) of a CSV file with a header row or of an NDJSON
+    file, one at a time. Lines that are not valid JSON are yielded as they are.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, line.rstrip("\n")
+
+
+def validate_record(record, keys):
+    """
+    return the record as request data for the given resource keys, raise
+    ValueError when it can not be sent
+    """
+    if not isinstance(record, dict):
+        raise ValueError("not a JSON object")
+    unknown = [key for key in record if key not in keys]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(map(str, unknown))}")
+    data = {key: value for key, value in record.items() if value not in ("", None)}
+    if not data:
+        raise ValueError("empty record")
+    try:
+        return convert_types(data)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid value: {e}") from e
+
+
 def filter_data_str(data, keys):
     """
     return a query string
@@ -268,18 +1085,29 @@ def filter_data_str(data, keys):
     return fltr[:-1]
 
 
-def list_func(client, uri, resource, is_json, output_file=None):
+def list_func(client, uri, resource, is_json, output_file=None, mirror=None):
     """
-    handler function for list action
+    handler function for list action, answered from the mirror when given
     """
-    response = client.get(uri)
+    if mirror is not None:
+        response = mirror.items(resource)
+    else:
+        response = client.get(uri)
     print_list(response, resource, is_json, output_file)
 
 
-def retrieve_func(client, uri, pk, is_json):
+def retrieve_func(client, uri, pk, is_json, resource=None):
     """
-    handler function for retrieve action
+    handler function for retrieve action, several comma separated primary keys
+    are fetched with a single batch request
     """
+    if "," in pk:
+        response = client.get(urljoin(uri, f"batch/?ids={pk}"))
+        if response.get("items"):
+            print_list(response, resource, is_json)
+        if response.get("not_found"):
+            print("not found:", ", ".join(str(key) for key in response["not_found"]))
+        return
     full_uri = urljoin(uri, pk + "/")
     response = client.get(full_uri)
     print_instance(response, is_json)
@@ -313,17 +1141,193 @@ def delete_func(client, uri, pk):
     client.delete(full_uri)
 
 
-def filter_func(client, uri, keys, resource, is_json, output_file=None):
+def import_func(
+    client, uri, keys, path, fmt=None, workers=IMPORT_WORKERS, report=IMPORT_REPORT
+):
+    """
+    handler function for import action, POSTs the records of a CSV or NDJSON
+    file ('-' for stdin) concurrently. Records that fail validation or are
+    rejected are written with their line number and error to the report file.
+    """
+    fmt = fmt or ("csv" if path.endswith(".csv") else "ndjson")
+    imported = 0
+    failures = []
+    start = time.perf_counter()
+
+    def send(number, data):
+        try:
+            client.post(uri, data)
+        except (APIError, TransportError) as e:
+            return number, data, str(e)
+        return number, data, None
+
+    def collect(done, progress, task):
+        nonlocal imported
+        for future in done:
+            number, data, error = future.result()
+            if error is None:
+                imported += 1
+            else:
+                failures.append({"line": number, "record": data, "error": error})
+            progress.advance(task)
+
+    with open_file(path, "r") as file, Progress(
+        transient=True
+    ) as progress, ThreadPoolExecutor(max_workers=workers) as executor:
+        task = progress.add_task("importing", total=None)
+        pending = set()
+        for number, record in read_records(file, fmt):
+            try:
+                data = validate_record(record, keys)
+            except ValueError as e:
+                failures.append({"line": number, "record": record, "error": str(e)})
+                progress.advance(task)
+                continue
+            pending.add(executor.submit(send, number, data))
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, progress, task)
+        collect(pending, progress, task)
+    elapsed = time.perf_counter() - start
+    rate = imported / elapsed * 60 if elapsed else 0
+    print(
+        f"imported {imported}, failed {len(failures)} in {elapsed:.1f} s "
+        f"({rate:.0f} records per minute)"
+    )
+    if failures:
+        with open(report, "w", encoding="utf-8") as out:
+            for failure in sorted(failures, key=lambda f: f["line"] or 0):
+                out.write(json.dumps(failure, default=str) + "\n")
+        print(f"failed records written to {report}")
+
+
+def iter_items(chunks):
+    """
+    yield the items of the "items" array of a JSON object that is read in text
+    chunks, decoding one item at a time. The other members of the object, e.g.
+    its @controls, are the return value of the generator. Objects that do not
+    start with "items" are decoded whole.
+    """
+    chunks = iter(chunks)
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= 64:
+            break
+    match = ITEMS_START.match(buffer)
+    if match is None:
+        body = json.loads(buffer + "".join(chunks))
+        yield from body.pop("items", [])
+        return body
+    decoder = json.JSONDecoder()
+    buffer = buffer[match.end() :]
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if buffer.startswith("]", position):
+            break
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except ValueError:
+            # the item is incomplete, the buffer only keeps what is not decoded
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+    rest = (buffer[position + 1 :] + "".join(chunks)).lstrip().lstrip(",")
+    return json.loads("{" + rest)
+
+
+def write_item(item, writer, fmt):
+    """
+    write an item without its @controls as an NDJSON line or a CSV row, nested
+    values of CSV rows are written as JSON
+    """
+    item.pop("@controls", None)
+    if fmt != "csv":
+        writer.write(json.dumps(item) + "\n")
+        return
+    if writer.fieldnames is None:
+        writer.fieldnames = list(item)
+        writer.writeheader()
+    writer.writerow(
+        {
+            key: json.dumps(value) if isinstance(value, (dict, list)) else value
+            for key, value in item.items()
+        }
+    )
+
+
+def export_func(client, uri, path, fmt=None, page_size=EXPORT_PAGE_SIZE):
     """
-    handler function for filter action
+    handler function for export action, writes every item of a collection to an
+    NDJSON or CSV file ('-' for stdout). Pages are followed by their 'next'
+    control, a collection without one is read as a single page. Responses are
+    streamed and decoded an item at a time, so memory use does not grow with
+    the size of the collection.
+    """
+    fmt = fmt or ("csv" if path.endswith(".csv") else "ndjson")
+    url = urljoin(client.host, uri)
+    url += ("&" if "?" in url else "?") + f"limit={page_size}"
+    count = 0
+    start = time.perf_counter()
+    with open_file(path, "w") as file, Progress(transient=True) as progress:
+        writer = csv.DictWriter(file, fieldnames=None) if fmt == "csv" else file
+        task = progress.add_task("exporting", total=None)
+        while url:
+            with client.request(
+                "GET", url, headers={"Accept": "application/json"}, stream=True
+            ) as response:
+                response.encoding = "utf-8"
+                items = iter_items(
+                    response.iter_content(EXPORT_CHUNK_SIZE, decode_unicode=True)
+                )
+                while True:
+                    try:
+                        write_item(next(items), writer, fmt)
+                    except StopIteration as end:
+                        body = end.value or {}
+                        break
+                    count += 1
+                    progress.advance(task)
+            url = body.get("@controls", {}).get("next", {}).get("href")
+    elapsed = time.perf_counter() - start
+    print(f"exported {count} items in {elapsed:.1f} s", file=sys.stderr)
+
+
+# pylint: disable-next=too-many-arguments
+def filter_func(client, uri, keys, resource, is_json, output_file=None, mirror=None):
+    """
+    handler function for filter action, answered from the mirror when given
     """
     data = data_input(keys)
-    filter_str = filter_data_str(data, keys)
-    full_uri = urljoin(uri, filter_str)
-    response = client.get(full_uri)
+    if mirror is not None:
+        response = mirror.items(resource, data)
+    else:
+        filter_str = filter_data_str(data, keys)
+        full_uri = urljoin(uri, filter_str)
+        response = client.get(full_uri)
     print_list(response, resource, is_json, output_file)
 
 
+def sync_func(client, mirror, uri, resource, keys, page_size=EXPORT_PAGE_SIZE):
+    """
+    handler function for sync action, updates the local mirror of a collection
+    """
+    start = time.perf_counter()
+    written, deleted = mirror.sync(client, resource, uri, keys, page_size)
+    elapsed = time.perf_counter() - start
+    print(
+        f"synced {resource}: {written} items written, {deleted} deleted "
+        f"in {elapsed:.1f} s",
+        file=sys.stderr,
+    )
+
+
 def main():
     """main client function"""
     parser = argparse.ArgumentParser()
@@ -334,10 +1338,15 @@ def main():
     parser.add_argument(
         "action",
         help="Operation to be applied to the resource: "
-        "list, retrieve, create, update, delete, filter."
+        "list, retrieve, create, update, delete, filter, import, export, sync."
         "data format for filter: '?field_1=value_1,...'.",
     )
-    parser.add_argument("--pk", dest="pk", help="Primary Key to resource instance")
+    parser.add_argument(
+        "--pk",
+        dest="pk",
+        help="Primary Key to resource instance, retrieve accepts several "
+        "comma separated keys.",
+    )
     parser.add_argument(
         "--json",
         action="store_true",
@@ -350,6 +1359,79 @@ def main():
         help="Include to print the output in json format to a file.",
     )
     parser.add_argument("--ca", dest="ca", default=None, help="CA certificate file")
+    parser.add_argument(
+        "--msgpack",
+        action="store_true",
+        help="Include to request responses in the compact MessagePack format.",
+    )
+    parser.add_argument(
+        "--file",
+        dest="input_file",
+        default="-",
+        help="CSV or NDJSON file of records for the import action or of the "
+        "items written by the export action, '-' for stdin or stdout.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="input_format",
+        choices=["csv", "ndjson"],
+        default=None,
+        help="Format of the import or export file, by default taken from its "
+        "extension.",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=EXPORT_PAGE_SIZE,
+        help="Number of items per request of the export and sync actions.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=IMPORT_WORKERS,
+        help="Number of concurrent requests of the import action.",
+    )
+    parser.add_argument(
+        "--report",
+        default=IMPORT_REPORT,
+        help="File for the records the import action could not create.",
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=CONNECT_TIMEOUT,
+        help="Seconds to wait for a connection to the API.",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=READ_TIMEOUT,
+        help="Seconds to wait for each read of a response.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=RETRIES,
+        help="Number of retries of failed idempotent requests.",
+    )
+    parser.add_argument(
+        "--http-cache",
+        action="store_true",
+        help="Include to cache responses on disk and revalidate them with "
+        "conditional requests.",
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Include to answer list and filter from the local mirror updated "
+        "by the sync action.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Include to discover the API again instead of using the cached "
+        "control URIs and resource keys.",
+    )
     try:
         args = parser.parse_args()
     except SystemExit:
@@ -362,78 +1444,187 @@ def main():
         except FileNotFoundError:
             token = None
 
-        with APIDataSource(args.host, args.ca, token) as api:
-            root_uri = get_root_uri(args.host)
-            schema_uri = get_schema_uri(api, root_uri)
+        wire_format = "msgpack" if args.msgpack else "json"
+        cache = HTTPCache(HTTP_CACHE_FILE) if args.http_cache else None
+        mirror = None
+        if args.local or args.action == "sync":
+            mirror = Mirror(args.host)
+        with mirror or nullcontext(), APIDataSource(
+            args.host,
+            args.ca,
+            token,
+            wire_format,
+            cache,
+            timeout=(args.connect_timeout, args.read_timeout),
+            retries=args.retries,
+            pool_size=max(POOL_SIZE, args.workers),
+        ) as api:
+            if args.local:
+                # the mirror stored what discovery would return at its sync
+                uri, keys = mirror.metadata(args.resource)
+            elif args.resource in RESOURCE_SCHEMAS:
+                discovery = DiscoveryCache(api, args.host)
+                if args.refresh:
+                    discovery.clear()
+                uri = discovery.control(args.resource)
+                keys = None
+                if args.action == "import":
+                    # records may carry every field the API accepts
+                    keys = discovery.writable_keys(args.resource)
+                elif args.action in KEYED_ACTIONS:
+                    keys = discovery.resource_keys(args.resource)
 
             if args.resource == "users":
-                keys = get_resource_keys(api, schema_uri, args.resource)
-                users_uri = get_users_uri(api, root_uri)
                 if args.action == "list":
                     list_func(
-                        api, users_uri, args.resource, args.json, args.output_file
+                        api,
+                        uri,
+                        args.resource,
+                        args.json,
+                        args.output_file,
+                        mirror,
                     )
 
                 elif args.action == "retrieve":
-                    retrieve_func(api, users_uri, args.pk, args.json)
+                    retrieve_func(api, uri, args.pk, args.json, args.resource)
 
                 elif args.action == "create":
-                    create_func(api, users_uri, keys, args.resource)
+                    create_func(api, uri, keys, args.resource)
 
                 elif args.action == "update":
-                    update_func(api, users_uri, args.pk, keys)
+                    update_func(api, uri, args.pk, keys)
 
                 elif args.action == "delete":
-                    delete_func(api, users_uri, args.pk)
+                    delete_func(api, uri, args.pk)
                     os.remove(".token")
 
                 elif args.action == "filter":
-                    filter_func(api, users_uri, keys, args.resource, args.json)
+                    filter_func(api, uri, keys, args.resource, args.json, mirror=mirror)
+
+                elif args.action == "import":
+                    import_func(
+                        api,
+                        uri,
+                        keys,
+                        args.input_file,
+                        args.input_format,
+                        args.workers,
+                        args.report,
+                    )
+
+                elif args.action == "export":
+                    export_func(
+                        api,
+                        uri,
+                        args.input_file,
+                        args.input_format,
+                        args.page_size,
+                    )
+
+                elif args.action == "sync":
+                    sync_func(api, mirror, uri, args.resource, keys, args.page_size)
 
             elif args.resource == "postings":
-                keys = get_resource_keys(api, schema_uri, args.resource)
-                postings_uri = get_postings_uri(api, root_uri)
                 if args.action == "list":
                     list_func(
-                        api, postings_uri, args.resource, args.json, args.output_file
+                        api,
+                        uri,
+                        args.resource,
+                        args.json,
+                        args.output_file,
+                        mirror,
                     )
 
                 elif args.action == "retrieve":
-                    retrieve_func(api, postings_uri, args.pk, args.json)
+                    retrieve_func(api, uri, args.pk, args.json, args.resource)
 
                 elif args.action == "create":
-                    create_func(api, postings_uri, keys, args.resource)
+                    create_func(api, uri, keys, args.resource)
 
                 elif args.action == "update":
-                    update_func(api, postings_uri, args.pk, keys)
+                    update_func(api, uri, args.pk, keys)
 
                 elif args.action == "delete":
-                    delete_func(api, postings_uri, args.pk)
+                    delete_func(api, uri, args.pk)
 
                 elif args.action == "filter":
-                    filter_func(api, postings_uri, keys, args.resource, args.json)
+                    filter_func(api, uri, keys, args.resource, args.json, mirror=mirror)
+
+                elif args.action == "import":
+                    import_func(
+                        api,
+                        uri,
+                        keys,
+                        args.input_file,
+                        args.input_format,
+                        args.workers,
+                        args.report,
+                    )
+
+                elif args.action == "export":
+                    export_func(
+                        api,
+                        uri,
+                        args.input_file,
+                        args.input_format,
+                        args.page_size,
+                    )
+
+                elif args.action == "sync":
+                    sync_func(api, mirror, uri, args.resource, keys, args.page_size)
 
             elif args.resource == "gigs":
-                keys = get_resource_keys(api, schema_uri, args.resource)
-                gigs_uri = get_gigs_uri(api, root_uri)
                 if args.action == "list":
-                    list_func(api, gigs_uri, args.resource, args.json, args.output_file)
+                    list_func(
+                        api,
+                        uri,
+                        args.resource,
+                        args.json,
+                        args.output_file,
+                        mirror,
+                    )
 
                 elif args.action == "retrieve":
-                    retrieve_func(api, gigs_uri, args.pk, args.json)
+                    retrieve_func(api, uri, args.pk, args.json, args.resource)
 
                 elif args.action == "create":
-                    create_func(api, gigs_uri, keys, args.resource)
+                    create_func(api, uri, keys, args.resource)
 
                 elif args.action == "update":
-                    update_func(api, gigs_uri, args.pk, keys)
+                    update_func(api, uri, args.pk, keys)
 
                 elif args.action == "delete":
-                    delete_func(api, gigs_uri, args.pk)
+                    delete_func(api, uri, args.pk)
 
                 elif args.action == "filter":
-                    filter_func(api, gigs_uri, keys, args.resource, args.json)
+                    filter_func(api, uri, keys, args.resource, args.json, mirror=mirror)
+
+                elif args.action == "import":
+                    import_func(
+                        api,
+                        uri,
+                        keys,
+                        args.input_file,
+                        args.input_format,
+                        args.workers,
+                        args.report,
+                    )
+
+                elif args.action == "export":
+                    export_func(
+                        api,
+                        uri,
+                        args.input_file,
+                        args.input_format,
+                        args.page_size,
+                    )
+
+                elif args.action == "sync":
+                    sync_func(api, mirror, uri, args.resource, keys, args.page_size)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except (APIError, TransportError, NotSyncedError) as error:
+        sys.exit(f"error: {error}")
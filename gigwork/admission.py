@@ -0,0 +1,90 @@
+"""
+Adaptive admission control. 'AdmissionController' limits how many requests a
+process serves at the same time. The limit follows AIMD (additive increase,
+multiplicative decrease): every request served within the target latency raises
+it by 1/limit, so roughly by one per full round of requests, and a request slower
+than the target cuts it by a factor, at most once per target latency. Requests
+over the limit wait briefly; when the wait runs out they are shed instead of
+queueing for the database and pushing up the latency of everything else.
+
+Full-list reads are admitted only into a share of the limit, so cheap reads and
+writes keep getting through while expensive scans pile up.
+
+The controller works per process and matters for threaded servers, where several
+requests of a process compete for its CPU and its SQLite connection.
+
+Sources:
+https://en.wikipedia.org/wiki/Additive_increase/multiplicative_decrease
+https://netflixtechblog.medium.com/performance-under-load-3e6fa9a60581
+https://docs.python.org/3/library/threading.html#condition-objects
+"""
+
+import threading
+import time
+
+HIGH = "high"
+LOW = "low"
+
+
+class AdmissionController:
+    """
+    concurrency limit that adapts to the observed latency
+    """
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(
+        self,
+        initial_limit,
+        min_limit,
+        max_limit,
+        target_latency,
+        low_priority_share,
+        backoff=0.9,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.low_priority_share = low_priority_share
+        self.backoff = backoff
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def capacity(self, priority):
+        """
+        return how many requests may run when a request of priority is admitted
+        """
+        if priority == LOW:
+            return max(1.0, self.limit * self.low_priority_share)
+        return self.limit
+
+    def acquire(self, priority, timeout):
+        """
+        wait at most timeout seconds for a free slot, return True if admitted
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.in_flight >= self.capacity(priority):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, latency, now=None):
+        """
+        free a slot and adapt the limit to the latency of the finished request
+        """
+        now = time.monotonic() if now is None else now
+        with self.condition:
+            self.in_flight -= 1
+            if latency <= self.target_latency:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif now - self.last_decrease >= self.target_latency:
+                # one slow burst counts once, not once per request in it
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = now
+            # waiters of both priorities check their own capacity
+            self.condition.notify_all()
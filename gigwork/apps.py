@@ -12,3 +12,8 @@ class GigworkConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "gigwork"
+
+    def ready(self):
+        # connects the signal handlers that invalidate the cached list counts
+        # pylint: disable-next=import-outside-toplevel,unused-import
+        from gigwork import counts
@@ -0,0 +1,138 @@
+"""
+Total and per-status counts of list responses. One GROUP BY status query gives
+both, and the result is cached per model and filter, shared by all users. Every
+write to a model replaces the model's generation token, which is part of the
+cache key, so exact counts are recomputed after the next write. The tokens are
+kept in the CountGeneration table rather than the cache: every worker reads the
+token of the last write with one primary key lookup, even when the counts
+themselves are cached per process.
+
+Large tables are expensive to count after every write. Once a filter matched
+more than COUNT_APPROXIMATE_THRESHOLD rows, its last count is reused for up to
+COUNT_STALE_TTL seconds after writes and marked as approximate.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/db/aggregation/#values
+https://docs.djangoproject.com/en/5.1/topics/signals/
+https://docs.djangoproject.com/en/5.1/ref/signals/#post-save
+"""
+
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from gigwork.models import CountGeneration, Gig, Posting
+
+# exact counts are dropped by the next write anyway, the TTL only bounds memory
+EXACT_TTL = 60 * 10
+
+
+class Deletions(threading.local):
+    """
+    the object or queryset whose delete last invalidated each model
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.origins = {}
+
+
+deletions = Deletions()
+
+
+def generation(model):
+    """
+    return the current generation token of a model
+    """
+    label = model._meta.label_lower
+    token = (
+        CountGeneration.objects.filter(model=label)
+        .values_list("token", flat=True)
+        .first()
+    )
+    if token is None:
+        # a new table starts a new generation, never an old one again
+        row, _ = CountGeneration.objects.get_or_create(
+            model=label, defaults={"token": uuid.uuid4().hex}
+        )
+        token = row.token
+    return token
+
+
+def invalidate(model):
+    """
+    start a new generation, the cached exact counts of model are not used again
+    """
+    label = model._meta.label_lower
+    token = uuid.uuid4().hex
+    if not CountGeneration.objects.filter(model=label).update(token=token):
+        CountGeneration.objects.get_or_create(model=label, defaults={"token": token})
+
+
+@receiver(post_save, sender=Posting)
+@receiver(post_save, sender=Gig)
+def invalidate_on_save(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    invalidate the counts of a model when one of its rows changes
+    """
+    deletions.origins.pop(sender, None)
+    invalidate(sender)
+
+
+@receiver(post_delete, sender=Posting)
+@receiver(post_delete, sender=Gig)
+def invalidate_on_delete(sender, origin=None, **kwargs):
+    """
+    invalidate the counts of a model when its rows are deleted. A delete sends
+    one signal per row, after all rows of the model are gone, so one new
+    generation per model and delete call is enough.
+    """
+    if origin is not None and deletions.origins.get(sender) is origin:
+        return
+    deletions.origins[sender] = origin
+    invalidate(sender)
+
+
+def filter_key(queryset):
+    """
+    return a hash of the filter of a queryset
+    """
+    sql, params = queryset.order_by().query.sql_with_params()
+    text = f"{sql}\n{params!r}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def compute(queryset):
+    """
+    count the rows of queryset in total and per status with one query
+    """
+    rows = queryset.order_by().values_list("status").annotate(count=Count("pk"))
+    by_status = {status: count for status, count in rows}
+    return {"total": sum(by_status.values()), "status": by_status}
+
+
+def list_counts(queryset):
+    """
+    return the total and per-status counts of a filtered queryset and whether
+    they are approximate
+    """
+    model = queryset.model
+    key = filter_key(queryset)
+    exact_key = f"counts:{model._meta.label_lower}:{generation(model)}:{key}"
+    stale_key = f"counts:{model._meta.label_lower}:stale:{key}"
+    counts = cache.get(exact_key)
+    if counts is not None:
+        return {**counts, "approximate": False}
+    counts = cache.get(stale_key)
+    if counts is not None and counts["total"] > settings.COUNT_APPROXIMATE_THRESHOLD:
+        return {**counts, "approximate": True}
+    counts = compute(queryset)
+    cache.set(exact_key, counts, EXACT_TTL)
+    cache.set(stale_key, counts, settings.COUNT_STALE_TTL)
+    return {**counts, "approximate": False}
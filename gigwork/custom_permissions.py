@@ -17,8 +17,9 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         # so we'll always allow GET, HEAD or OPTIONS requests.
         if request.method in permissions.SAFE_METHODS:
             return True
-        # Instance must have an attribute named `owner`.
-        return obj.owner == request.user
+        # Instance must have an attribute named `owner`. Comparing the keys
+        # avoids loading the owner row.
+        return obj.owner_id == request.user.pk
 
 
 class IsSelfOrReadOnly(permissions.BasePermission):
@@ -0,0 +1,163 @@
+"""
+Idempotency keys for POST actions. A client sends an 'Idempotency-Key' header
+with a write it may retry. The first request with a key stores a small record in
+the IdempotencyKey table: a fingerprint of the request and the status, content
+type and body of the response. A retry with the same key and body gets the
+stored response back instead of creating a second resource. Reusing a key for a
+different request is rejected, and so is a retry that arrives while the first
+request still runs. The table is shared by all workers; its unique key lets only
+one request claim a key, and expired records are purged through the index on
+their expiry at most every IDEMPOTENCY_PURGE_INTERVAL seconds.
+
+Sources:
+https://datatracker.ietf.org/doc/draft-ietf-httpapi-idempotency-key-header/
+https://docs.djangoproject.com/en/5.1/ref/models/querysets/#create
+https://docs.djangoproject.com/en/5.1/topics/db/transactions/#controlling-transactions-explicitly
+"""
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework import status
+
+from gigwork.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+IN_PROGRESS = "in_progress"
+DONE = "done"
+# monotonic time of the last purge of expired records in this process
+last_purge = [0.0]
+
+
+def cache_key(request, key):
+    """
+    return the stored key of an idempotency key, keys are scoped to the user.
+    Anonymous requests, such as creating a user, share one scope.
+    """
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return f"idempotency:{request.user.pk or 'anonymous'}:{digest}"
+
+
+def request_fingerprint(request):
+    """
+    return a hash of the method, path and parsed body of a request
+    """
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    text = f"{request.method} {request.path}\n{body}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def error(detail, status_code):
+    """
+    return a JSON error response
+    """
+    return JsonResponse({"detail": detail}, status=status_code)
+
+
+def replay(record):
+    """
+    return the stored response of a completed request
+    """
+    response = HttpResponse(
+        bytes(record.body), status=record.status, content_type=record.content_type
+    )
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def purge():
+    """
+    delete expired records, at most every IDEMPOTENCY_PURGE_INTERVAL seconds
+    """
+    now = time.monotonic()
+    if now - last_purge[0] < settings.IDEMPOTENCY_PURGE_INTERVAL:
+        return
+    last_purge[0] = now
+    IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+
+
+def claim(storage_key, fingerprint):
+    """
+    claim a key for a request, return False if another request holds it
+    """
+    now = timezone.now()
+    # an expired record no longer holds its key
+    IdempotencyKey.objects.filter(key=storage_key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=storage_key,
+                fingerprint=fingerprint,
+                state=IN_PROGRESS,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TTL),
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def idempotent(view_method):
+    """
+    decorator for viewset actions honouring the Idempotency-Key header.
+    Responses below 500 are stored. After a server error or an exception the key
+    is released so that the request can be retried.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return error(
+                f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters.",
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        purge()
+        storage_key = cache_key(request, key)
+        fingerprint = request_fingerprint(request)
+        if not claim(storage_key, fingerprint):
+            record = IdempotencyKey.objects.filter(
+                key=storage_key, expires_at__gt=timezone.now()
+            ).first()
+            if record is None:
+                # the lock expired in between, the client may simply retry
+                return error("Request is being processed.", status.HTTP_409_CONFLICT)
+            if record.fingerprint != fingerprint:
+                return error(
+                    f"{HEADER} was already used for a different request.",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record.state == IN_PROGRESS:
+                return error("Request is being processed.", status.HTTP_409_CONFLICT)
+            return replay(record)
+
+        records = IdempotencyKey.objects.filter(key=storage_key)
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            records.delete()
+            raise
+        if response.status_code >= 500:
+            records.delete()
+            return response
+        records.update(
+            state=DONE,
+            status=response.status_code,
+            content_type=response["Content-Type"],
+            body=response.content,
+            expires_at=timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+        )
+        return response
+
+    return wrapper
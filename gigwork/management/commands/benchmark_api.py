@@ -0,0 +1,393 @@
+"""
+End-to-end API benchmark. For every dataset size a throwaway test database is
+created and seeded with 'generate_data', then every viewset action is called
+in-process through the real URLconf with the page cache cold and warm.
+Latency percentiles and requests per second are written as JSON and compared
+against a stored baseline; the command fails when a result regresses past the
+threshold.
+
+Example:
+    python manage.py benchmark_api --sizes 10000 100000 --output bench.json \\
+        --baseline benchmarks/baseline.json
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/advanced/#django.test.utils.setup_test_environment
+https://docs.djangoproject.com/en/5.1/topics/testing/advanced/#django.db.connection.creation.create_test_db
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#the-test-client
+"""
+
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.authtoken.models import Token
+
+from gigwork.models import Gig, Posting, User
+
+
+def percentile(values, share):
+    """
+    return the value below which the given share (0-1) of the sorted values fall
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors):
+    """
+    return the statistics of one benchmarked action. Requests run one after
+    another, so the throughput is the inverse of the mean latency.
+    """
+    total = sum(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(total / len(latencies) * 1000, 3),
+        "rps": round(len(latencies) / total, 2),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    return a list of regressions of results against baseline. Latency may grow
+    and throughput may drop by at most threshold (e.g. 0.25 = 25 %).
+    """
+    regressions = []
+    for size, actions in results.items():
+        for name, current in actions.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                if current[key] > previous[key] * (1 + threshold):
+                    regressions.append(
+                        f"{size} {name} {key}: {previous[key]} -> {current[key]}"
+                    )
+            if previous.get("rps") and current["rps"] < previous["rps"] * (
+                1 - threshold
+            ):
+                regressions.append(
+                    f"{size} {name} rps: {previous['rps']} -> {current['rps']}"
+                )
+            if current["errors"] > previous.get("errors", 0):
+                regressions.append(
+                    f"{size} {name} errors: {previous.get('errors', 0)} -> "
+                    f"{current['errors']}"
+                )
+    return regressions
+
+
+class Command(BaseCommand):
+    """
+    management command benchmarking every viewset action
+    """
+
+    help = "Benchmark the API in-process against seeded databases."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10000, 100000, 1000000],
+            help="Number of postings of each seeded database.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Maximum number of measured requests per action.",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=10.0,
+            help="Stop measuring an action after this long (at least 3 requests).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="bench_results.json")
+        parser.add_argument("--baseline", default=None)
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed relative regression against the baseline.",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Write the results into the baseline file instead of comparing.",
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        setup_test_environment(debug=False)
+        try:
+            # the benchmark measures the API, not the instrumentation logs, and
+            # sends far more requests than a single client is allowed to
+            with override_settings(SERVER_TIMING_SAMPLE_RATE=0.0, THROTTLE_BUCKETS={}):
+                for size in options["sizes"]:
+                    results[str(size)] = self.run_size(size, options)
+        finally:
+            teardown_test_environment()
+
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "options": {
+                key: options[key] for key in ("sizes", "requests", "seed", "threshold")
+            },
+            "results": results,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=4), "utf-8")
+        self.stdout.write(f"results written to {options['output']}")
+
+        baseline_path = options["baseline"]
+        if not baseline_path:
+            return
+        if options["update_baseline"] or not Path(baseline_path).exists():
+            Path(baseline_path).write_text(json.dumps(report, indent=4), "utf-8")
+            self.stdout.write(f"baseline written to {baseline_path}")
+            return
+        baseline = json.loads(Path(baseline_path).read_text("utf-8"))["results"]
+        regressions = compare(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError("performance regressions:\n" + "\n".join(regressions))
+        self.stdout.write("no regressions against the baseline")
+
+    def run_size(self, size, options):
+        """
+        seed a fresh test database with size postings and benchmark it
+        """
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write(f"seeding {size} postings")
+            call_command(
+                "generate_data",
+                users=max(size // 100, 2),
+                postings=size,
+                gigs=size // 5,
+                seed=options["seed"],
+                stdout=StringIO(),
+            )
+            bench = Benchmark(random.Random(options["seed"]), options)
+            results = bench.run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        for name, stats in results.items():
+            self.stdout.write(
+                f"{size:>8} {name:<26} p50 {stats['p50_ms']:>9} ms  "
+                f"p99 {stats['p99_ms']:>9} ms  {stats['rps']:>8} req/s"
+                + (f"  {stats['errors']} errors" if stats["errors"] else "")
+            )
+        return results
+
+
+class Benchmark:
+    """
+    calls every action of every viewset on a seeded database
+    """
+
+    def __init__(self, rng, options):
+        self.rng = rng
+        self.max_requests = options["requests"]
+        self.max_seconds = options["max_seconds"]
+        self.owner = User.objects.create(
+            first_name="bench", last_name="user", email="bench@example.com"
+        )
+        self.client = self.client_for(self.owner)
+        self.counter = 0
+
+    @staticmethod
+    def client_for(user):
+        """
+        return a test client authenticated with the token of user
+        """
+        token, _ = Token.objects.get_or_create(user=user)
+        # failing requests are counted as errors instead of aborting the run
+        return Client(
+            raise_request_exception=False, HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+
+    def unique(self):
+        """
+        return a number that was not used yet during this run
+        """
+        self.counter += 1
+        return self.counter
+
+    def posting_data(self):
+        """
+        request body for creating or updating a posting
+        """
+        return {
+            "title": f"bench posting {self.unique()}",
+            "description": "benchmark",
+            "expires_at": (datetime.now() + timedelta(days=7)).isoformat(),
+            "price": 50.0,
+            "status": "open",
+        }
+
+    def new_posting(self):
+        """
+        create a posting owned by the benchmark user, return its id
+        """
+        return Posting.objects.create(owner=self.owner, **self.posting_data()).pk
+
+    def new_gig(self):
+        """
+        create a gig owned by the benchmark user, return its id
+        """
+        return Gig.objects.create(owner=self.owner, posting_id=self.new_posting()).pk
+
+    def random_id(self, model):
+        """
+        return the id of a random existing row
+        """
+        last = model.objects.order_by("-id").values_list("id", flat=True).first()
+        while True:
+            pk = self.rng.randint(1, last)
+            if model.objects.filter(pk=pk).exists():
+                return pk
+
+    def measure(self, call, cold=True, prepare=None):
+        """
+        run call() repeatedly and return the statistics. call returns the
+        response and the expected status code. When prepare is given, its result
+        is passed to call and the time spent in prepare is not measured.
+        """
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        while len(latencies) < self.max_requests:
+            if cold:
+                cache.clear()
+            args = (prepare(),) if prepare else ()
+            start = time.perf_counter()
+            response, expected = call(*args)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != expected
+            elapsed = time.perf_counter() - started
+            if elapsed > self.max_seconds and len(latencies) >= 3:
+                break
+        return summarize(latencies, errors)
+
+    def measure_cached(self, results, name, call):
+        """
+        measure a cacheable action once with a cold and once with a warm cache
+        """
+        results[f"{name}.cold"] = self.measure(call, cold=True)
+        cache.clear()
+        call()
+        results[f"{name}.warm"] = self.measure(call, cold=False)
+
+    def run(self):
+        """
+        benchmark every action, return the statistics by action name
+        """
+        results = {}
+        client = self.client
+
+        results["root"] = self.measure(lambda: (client.get("/gigwork/api/root/"), 200))
+        for resource, model in (("users", User), ("postings", Posting), ("gigs", Gig)):
+            url = f"/gigwork/api/{resource}/"
+            self.measure_cached(
+                results, f"{resource}.list", lambda url=url: (client.get(url), 200)
+            )
+            pk = self.random_id(model)
+            self.measure_cached(
+                results,
+                f"{resource}.retrieve",
+                lambda url=url, pk=pk: (client.get(f"{url}{pk}/"), 200),
+            )
+        self.benchmark_writes(results)
+        return results
+
+    def benchmark_writes(self, results):
+        """
+        benchmark create, update and destroy of every viewset
+        """
+        client = self.client
+        post = client.post
+        put = client.put
+
+        def create_user():
+            data = {
+                "first_name": "bench",
+                "last_name": "user",
+                "email": f"bench{self.unique()}@example.com",
+            }
+            return (
+                Client(raise_request_exception=False).post(
+                    "/gigwork/api/users/", data, "application/json"
+                ),
+                201,
+            )
+
+        def update_user():
+            data = {"first_name": "bench", "last_name": f"u{self.unique()}"}
+            data["email"] = self.owner.email
+            url = f"/gigwork/api/users/{self.owner.pk}/"
+            return put(url, data, "application/json"), 200
+
+        def new_user():
+            user = User.objects.create(email=f"gone{self.unique()}@example.com")
+            return user, self.client_for(user)
+
+        def destroy_user(prepared):
+            user, user_client = prepared
+            return user_client.delete(f"/gigwork/api/users/{user.pk}/"), 204
+
+        postings_url = "/gigwork/api/postings/"
+        own_posting = self.new_posting()
+
+        def create_posting():
+            return post(postings_url, self.posting_data(), "application/json"), 201
+
+        def update_posting():
+            url = f"{postings_url}{own_posting}/"
+            return put(url, self.posting_data(), "application/json"), 200
+
+        def destroy_posting(pk):
+            return client.delete(f"{postings_url}{pk}/"), 204
+
+        gigs_url = "/gigwork/api/gigs/"
+        own_gig = Gig.objects.get(pk=self.new_gig())
+
+        def create_gig(posting):
+            data = {"posting": posting, "status": "pending"}
+            return post(gigs_url, data, "application/json"), 201
+
+        def update_gig():
+            data = {"posting": own_gig.posting_id, "status": "in_progress"}
+            return put(f"{gigs_url}{own_gig.pk}/", data, "application/json"), 200
+
+        def destroy_gig(pk):
+            return client.delete(f"{gigs_url}{pk}/"), 204
+
+        for name, call, prepare in (
+            ("users.create", create_user, None),
+            ("users.update", update_user, None),
+            ("users.destroy", destroy_user, new_user),
+            ("postings.create", create_posting, None),
+            ("postings.update", update_posting, None),
+            ("postings.destroy", destroy_posting, self.new_posting),
+            ("gigs.create", create_gig, self.new_posting),
+            ("gigs.update", update_gig, None),
+            ("gigs.destroy", destroy_gig, self.new_gig),
+        ):
+            results[name] = self.measure(call, prepare=prepare)
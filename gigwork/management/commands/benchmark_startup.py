@@ -0,0 +1,153 @@
+"""
+Start-up benchmark. Imports the WSGI or ASGI application in fresh interpreters,
+the way a new or recycled worker does, and measures the time until it is ready
+and the time of the first request, which pays for whatever was left to be
+loaded lazily. The median of their sum is compared with the STARTUP_BUDGET_MS
+setting and the command fails when it is over. With
+--imports the packages that take longest to import are listed, taken from one
+more run under 'python -X importtime'.
+
+Example:
+    python manage.py benchmark_startup --runs 20 --module config.asgi
+
+Sources:
+https://docs.python.org/3/using/cmdline.html#cmdoption-X
+https://docs.python.org/3/library/subprocess.html#subprocess.run
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in the child interpreter, prints the timings as JSON
+PROBE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1], fromlist=["application"])
+ready = time.perf_counter() - start
+from django.test import RequestFactory
+environ = RequestFactory()._base_environ(
+    PATH_INFO="/gigwork/api/root/", HTTP_HOST="localhost"
+)
+before = time.perf_counter()
+if sys.argv[1].endswith("wsgi"):
+    b"".join(module.application(environ, lambda status, headers: None))
+else:
+    scope = {
+        "type": "http", "method": "GET", "path": environ["PATH_INFO"],
+        "query_string": b"", "headers": [(b"host", b"localhost")],
+    }
+    messages = [{"type": "http.request", "body": b""}]
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+    async def send(message):
+        pass
+    asyncio.run(module.application(scope, receive, send))
+first_request = time.perf_counter() - before
+print(json.dumps({"ready": ready, "first_request": first_request}))
+"""
+
+
+def run_probe(module, extra_args=()):
+    """
+    import the module in a new interpreter and return the completed process
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="config.settings")
+    completed = subprocess.run(
+        [sys.executable, *extra_args, "-c", PROBE, module],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode:
+        raise CommandError(f"importing {module} failed:\n{completed.stderr}")
+    return completed
+
+
+def median_ms(seconds):
+    """
+    return the median of the durations in milliseconds
+    """
+    return round(statistics.median(seconds) * 1000, 1)
+
+
+def slowest_imports(stderr, count):
+    """
+    return (milliseconds, package) of the top-level packages that took longest
+    to import, from the output of 'python -X importtime'
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(own) / 1000
+    return sorted(((ms, name) for name, ms in packages.items()), reverse=True)[:count]
+
+
+class Command(BaseCommand):
+    """
+    management command measuring the start-up time of the application
+    """
+
+    help = "Measure the start-up time of the application against a budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module",
+            default="config.wsgi",
+            choices=["config.wsgi", "config.asgi"],
+        )
+        parser.add_argument("--runs", type=int, default=10)
+        parser.add_argument(
+            "--budget-ms",
+            type=float,
+            default=None,
+            help="median time to the first response, defaults to STARTUP_BUDGET_MS",
+        )
+        parser.add_argument(
+            "--imports",
+            type=int,
+            default=0,
+            help="list this many of the slowest imports",
+        )
+
+    def handle(self, *args, **options):
+        module = options["module"]
+        budget = options["budget_ms"] or settings.STARTUP_BUDGET_MS
+        runs = [
+            json.loads(run_probe(module).stdout) for _ in range(max(1, options["runs"]))
+        ]
+        totals = [run["ready"] + run["first_request"] for run in runs]
+        total = statistics.median(totals) * 1000
+        result = {
+            "module": module,
+            "runs": len(runs),
+            "import_p50_ms": median_ms(run["ready"] for run in runs),
+            "first_request_p50_ms": median_ms(run["first_request"] for run in runs),
+            "total_p50_ms": round(total, 1),
+            "total_max_ms": round(max(totals) * 1000, 1),
+            "budget_ms": budget,
+        }
+        self.stdout.write(json.dumps(result, indent=2))
+        if options["imports"]:
+            stderr = run_probe(module, ("-X", "importtime")).stderr
+            for milliseconds, name in slowest_imports(stderr, options["imports"]):
+                self.stdout.write(f"{milliseconds:8.1f} ms  {name}")
+        if total > budget:
+            raise CommandError(
+                f"{module} took {total:.1f} ms to serve its first request, "
+                f"the budget is {budget} ms"
+            )
@@ -0,0 +1,389 @@
+"""
+Generate a synthetic dataset of users, postings and gigs for load and benchmark runs.
+Users are inserted with 'bulk_create'. Postings and gigs, the bulk of the rows,
+are inserted as prepared tuples with one 'executemany' per batch and explicit
+ids, which skips building model instances and Django's insert compiler, most of
+the cost of 'bulk_create'. Every batch is one transaction. The same seed always
+produces the same content.
+
+Example:
+    python manage.py generate_data --users 10000 --postings 1000000 --gigs 200000
+
+Sources:
+https://docs.djangoproject.com/en/5.1/howto/custom-management-commands/
+https://docs.djangoproject.com/en/5.1/ref/models/querysets/#bulk-create
+https://docs.python.org/3/library/random.html#random.choices
+https://www.sqlite.org/pragma.html#pragma_synchronous
+https://docs.djangoproject.com/en/5.1/topics/db/sql/#executing-custom-sql-directly
+https://docs.djangoproject.com/en/5.1/ref/django-admin/#sqlsequencereset
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from rest_framework.authtoken.models import Token
+
+from gigwork.counts import invalidate
+from gigwork.models import Gig, Posting, User
+
+FIRST_NAMES = [
+    "Aino",
+    "Eino",
+    "Helmi",
+    "Onni",
+    "Sofia",
+    "Leo",
+    "Emma",
+    "Elias",
+    "Olivia",
+    "Veeti",
+    "Tony",
+    "Bruce",
+    "Clark",
+    "Diana",
+    "Peter",
+    "Wanda",
+    "Maria",
+    "Juho",
+]
+LAST_NAMES = [
+    "Korhonen",
+    "Virtanen",
+    "Mäkinen",
+    "Nieminen",
+    "Mäkelä",
+    "Hämäläinen",
+    "Laine",
+    "Heikkinen",
+    "Koskinen",
+    "Järvinen",
+    "Stark",
+    "Wayne",
+    "Kent",
+    "Prince",
+]
+STREETS = ["Testitie", "Kauppurienkatu", "Isokatu", "Hallituskatu", "Rantakatu"]
+TASKS = [
+    "Help with yard work",
+    "Assemble furniture",
+    "Missing cat",
+    "Paint the fence",
+    "Move boxes to storage",
+    "Walk the dog",
+    "Clean the garage",
+    "Fix a leaking tap",
+    "Snow shoveling",
+    "Computer setup",
+]
+DESCRIPTIONS = [
+    "2-3 hours, tools provided",
+    "Needs to be done this week",
+    "Experience preferred but not required",
+    "Payment in cash after the job is done",
+    "Please bring your own equipment",
+]
+
+# share of postings without a gig that are still open, the others have expired
+OPEN_SHARE = 0.7
+GIG_STATUS_WEIGHTS = {"pending": 0.3, "in_progress": 0.4, "completed": 0.3}
+# SQLite page cache while loading, the indexes of a million postings do not fit
+# in the default 2 MB and every insert then reads their pages from disk
+LOAD_CACHE_KIB = 256 * 1024
+
+
+def owner_weights(count, skew):
+    """
+    return cumulative Zipf-like weights, a few users own most of the rows
+    """
+    return list(accumulate(1.0 / (rank**skew) for rank in range(1, count + 1)))
+
+
+def next_id(model):
+    """
+    return the first free primary key of a model
+    """
+    return (model.objects.aggregate(Max("id"))["id__max"] or 0) + 1
+
+
+def insert_rows(model, columns, rows):
+    """
+    insert tuples of database values into the columns of the model's table
+    """
+    quote = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {quote(model._meta.db_table)} "
+        f"({', '.join(quote(column) for column in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def reset_sequences(*models):
+    """
+    move the id sequences past the explicit ids, SQLite needs nothing
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+@contextmanager
+def fast_sqlite_writes():
+    """
+    relax SQLite durability and enlarge its page cache while loading, the data
+    can be regenerated anyway
+    """
+    # the pragma cannot be changed inside a transaction
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA cache_size")
+        cache_size = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute(f"PRAGMA cache_size = {-LOAD_CACHE_KIB}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+            cursor.execute(f"PRAGMA cache_size = {int(cache_size)}")
+
+
+class Command(BaseCommand):
+    """
+    management command generating users, postings and gigs
+    """
+
+    help = (
+        "Generate a synthetic dataset of users, postings and gigs. 1M postings "
+        "and 200k gigs take about 35-45 s on one core with SQLite, most of it "
+        "generating the rows and updating the posting indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--postings", type=int, default=10000)
+        parser.add_argument("--gigs", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Rows built in memory and inserted per transaction.",
+        )
+        parser.add_argument(
+            "--owner-skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of the owner distribution, 0 gives uniform owners.",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 and (options["postings"] or options["gigs"]):
+            raise CommandError("At least one user is needed to own postings and gigs.")
+        if options["gigs"] > options["postings"]:
+            raise CommandError("Every gig needs its own posting: --gigs <= --postings.")
+
+        rng = random.Random(options["seed"])
+        now = datetime.now().replace(microsecond=0)
+        with fast_sqlite_writes():
+            user_ids = self.timed(
+                "users", self.create_users, rng, options["users"], options["batch_size"]
+            )
+            weights = owner_weights(len(user_ids), options["owner_skew"])
+            gig_postings = self.timed(
+                "postings",
+                self.create_postings,
+                rng,
+                now,
+                user_ids,
+                weights,
+                options,
+            )
+            self.timed(
+                "gigs",
+                self.create_gigs,
+                rng,
+                now,
+                user_ids,
+                weights,
+                gig_postings,
+                options["batch_size"],
+            )
+        reset_sequences(Posting, Gig)
+        # bulk inserts send no signals, cached list counts are outdated
+        invalidate(Posting)
+        invalidate(Gig)
+
+    def timed(self, label, func, *args):
+        """
+        run func and report how long it took
+        """
+        start = time.perf_counter()
+        result = func(*args)
+        self.stdout.write(f"{label}: done in {time.perf_counter() - start:.1f}s")
+        return result
+
+    @staticmethod
+    def create_users(rng, count, batch_size):
+        """
+        create users with a token each, return their ids
+        """
+        # unusable password, the API authenticates users with tokens
+        password = make_password(None)
+        offset = next_id(User)
+        user_ids = []
+        for start in range(0, count, batch_size):
+            users = []
+            for number in range(
+                offset + start, offset + min(start + batch_size, count)
+            ):
+                first_name = rng.choice(FIRST_NAMES)
+                last_name = rng.choice(LAST_NAMES)
+                users.append(
+                    User(
+                        first_name=first_name,
+                        last_name=last_name,
+                        email=f"{first_name.lower()}.{number}@example.com",
+                        phone_number=f"040{rng.randrange(10**7):07d}",
+                        address=f"{rng.choice(STREETS)} {rng.randint(1, 99)}, Oulu",
+                        password=password,
+                    )
+                )
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                Token.objects.bulk_create(
+                    [Token(key=Token.generate_key(), user=user) for user in users]
+                )
+            user_ids.extend(user.pk for user in users)
+        return user_ids
+
+    @staticmethod
+    def create_postings(rng, now, user_ids, weights, options):
+        """
+        create postings, return (posting id, owner id) of those that get a gig
+        """
+        count = options["postings"]
+        gig_indexes = set(rng.sample(range(count), options["gigs"]))
+        gig_postings = []
+        first_id = next_id(Posting)
+        adapt = connection.ops.adapt_datetimefield_value
+        created_at = adapt(now)
+        columns = (
+            "id",
+            "title",
+            "description",
+            "owner_id",
+            "created_at",
+            "expires_at",
+            "price",
+            "status",
+            "version",
+            "modified_at",
+        )
+        for start in range(0, count, options["batch_size"]):
+            stop = min(start + options["batch_size"], count)
+            owners = rng.choices(user_ids, cum_weights=weights, k=stop - start)
+            postings = []
+            for index, owner_id in zip(range(start, stop), owners):
+                if index in gig_indexes:
+                    status = "accepted"
+                    expires_at = now + timedelta(days=rng.randint(1, 30))
+                    gig_postings.append((first_id + index, owner_id))
+                elif rng.random() < OPEN_SHARE:
+                    status = "open"
+                    # most postings expire soon, a few stay open for months
+                    expires_at = now + timedelta(
+                        hours=int(rng.expovariate(1 / (24 * 14))) + 1
+                    )
+                else:
+                    status = "expired"
+                    expires_at = now - timedelta(hours=rng.randint(1, 24 * 180))
+                postings.append(
+                    (
+                        first_id + index,
+                        rng.choice(TASKS),
+                        rng.choice(DESCRIPTIONS),
+                        owner_id,
+                        created_at,
+                        adapt(expires_at),
+                        # log-normal prices, mostly tens of euros
+                        f"{max(rng.lognormvariate(4, 0.7), 1.0):.2f}",
+                        status,
+                        1,
+                        created_at,
+                    )
+                )
+            with transaction.atomic():
+                insert_rows(Posting, columns, postings)
+        return gig_postings
+
+    @staticmethod
+    def create_gigs(rng, now, user_ids, weights, gig_postings, batch_size):
+        """
+        create one gig for every posting in gig_postings
+        """
+        statuses = list(GIG_STATUS_WEIGHTS)
+        status_weights = list(GIG_STATUS_WEIGHTS.values())
+        positions = rng.choices(
+            range(len(user_ids)), cum_weights=weights, k=len(gig_postings)
+        )
+        first_id = next_id(Gig)
+        adapt = connection.ops.adapt_datetimefield_value
+        start_date = adapt(now)
+        columns = (
+            "id",
+            "owner_id",
+            "posting_id",
+            "start_date",
+            "end_date",
+            "status",
+            "version",
+            "modified_at",
+        )
+        gigs = []
+        for number, ((posting_id, posting_owner), position) in enumerate(
+            zip(gig_postings, positions)
+        ):
+            owner_id = user_ids[position]
+            if owner_id == posting_owner and len(user_ids) > 1:
+                # nobody takes their own posting
+                owner_id = user_ids[(position + 1) % len(user_ids)]
+            status = rng.choices(statuses, weights=status_weights)[0]
+            if status == "completed":
+                end_date = now - timedelta(hours=rng.randint(1, 24 * 60))
+            else:
+                end_date = now + timedelta(hours=rng.randint(1, 24 * 30))
+            gigs.append(
+                (
+                    first_id + number,
+                    owner_id,
+                    posting_id,
+                    start_date,
+                    adapt(end_date),
+                    status,
+                    1,
+                    start_date,
+                )
+            )
+            if len(gigs) == batch_size:
+                with transaction.atomic():
+                    insert_rows(Gig, columns, gigs)
+                gigs = []
+        if gigs:
+            with transaction.atomic():
+                insert_rows(Gig, columns, gigs)
@@ -0,0 +1,123 @@
+"""
+Summarize the slow-query log written by 'SlowQueryMiddleware'. Entries are
+grouped by normalized SQL; the report lists the top N statements with their
+count, total, mean and max duration, the views that issued them, the number of
+distinct parameter sets and the latest query plan. Plans containing a full
+table scan are marked.
+
+Example:
+    python manage.py slow_query_report --top 10 --sort total
+
+Sources:
+https://docs.djangoproject.com/en/5.1/howto/custom-management-commands/
+https://www.sqlite.org/eqp.html
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = ("total", "count", "max", "mean")
+
+
+def full_scan(plan):
+    """
+    return True if a SQLite query plan scans a whole table, e.g.
+    "SCAN gigwork_posting" rather than "SEARCH gigwork_posting USING INDEX ..."
+    """
+    return any(line.startswith("SCAN ") for line in plan or ())
+
+
+def aggregate(entries):
+    """
+    group log entries by normalized SQL, return one summary per statement
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(
+            entry["sql_fingerprint"],
+            {
+                "sql": entry["sql"],
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "views": set(),
+                "params": set(),
+                "plan": None,
+            },
+        )
+        group["count"] += 1
+        group["total"] += entry["duration_ms"]
+        group["max"] = max(group["max"], entry["duration_ms"])
+        group["views"].add(f"{entry['viewset']}.{entry['action']}")
+        group["params"].add(entry["params_fingerprint"])
+        if entry.get("plan"):
+            group["plan"] = entry["plan"]
+    for group in groups.values():
+        group["mean"] = group["total"] / group["count"]
+        group["full_scan"] = full_scan(group["plan"])
+    return list(groups.values())
+
+
+def read_log(path):
+    """
+    return the entries of an NDJSON log file, skipping partially written lines
+    """
+    entries = []
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+class Command(BaseCommand):
+    """
+    management command printing the top slow queries
+    """
+
+    help = "Summarize the slow-query log into a top-N report."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log",
+            default=None,
+            help="Log file to read, defaults to the SLOW_QUERY_LOG setting.",
+        )
+        parser.add_argument("--top", type=int, default=10)
+        parser.add_argument("--sort", choices=SORT_KEYS, default="total")
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON."
+        )
+
+    def handle(self, *args, **options):
+        path = options["log"] or settings.SLOW_QUERY_LOG
+        if not Path(path).exists():
+            raise CommandError(f"No slow-query log at {path}.")
+        groups = aggregate(read_log(path))
+        groups.sort(key=lambda group: group[options["sort"]], reverse=True)
+        top = groups[: options["top"]]
+
+        if options["json"]:
+            for group in top:
+                group["views"] = sorted(group["views"])
+                group["params"] = len(group["params"])
+            self.stdout.write(json.dumps(top, indent=4))
+            return
+
+        self.stdout.write(f"{len(groups)} distinct slow statements in {path}")
+        for rank, group in enumerate(top, 1):
+            self.stdout.write(
+                f"\n{rank}. {group['count']} x, total {group['total']:.1f} ms, "
+                f"mean {group['mean']:.1f} ms, max {group['max']:.1f} ms, "
+                f"{len(group['params'])} parameter sets"
+                + ("  [FULL SCAN]" if group["full_scan"] else "")
+            )
+            self.stdout.write(f"   views: {', '.join(sorted(group['views']))}")
+            self.stdout.write(f"   {group['sql']}")
+            for line in group["plan"] or ["(no plan)"]:
+                self.stdout.write(f"     plan: {line}")
@@ -97,6 +97,26 @@ class MasonBuilder(dict):
             "edit", href, method="PUT", encoding="json", title=title, schema=schema
         )
 
+    def add_control_patch(self, title, href, schema):
+        """
+        Utility method for adding PATCH type controls. The control is
+        constructed from the method's parameters. Control name, method and
+        encoding are fixed to "edit-partial", "PATCH" and "json" respectively.
+
+        : param str href: target URI for the control
+        : param str title: human-readable title for the control
+        : param dict schema: a dictionary representing a valid JSON schema
+        """
+
+        self.add_control(
+            "edit-partial",
+            href,
+            method="PATCH",
+            encoding="json",
+            title=title,
+            schema=schema,
+        )
+
     def add_control_delete(self, title, href):
         """
         Utility method for adding PUT type controls. The control is
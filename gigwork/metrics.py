@@ -0,0 +1,447 @@
+"""
+Request metrics exported in the Prometheus text format.
+Every process keeps its own registry in memory. When the METRICS_DIR setting is
+set, each process also writes a snapshot of its registry into that directory (at
+most every METRICS_FLUSH_INTERVAL seconds) and a scrape of '/metrics' merges the
+snapshots of all workers, so prefork servers report correct totals without an
+external service. Counters and histograms of exited workers are kept, gauges
+only count live processes. A scrape folds the snapshots of exited workers into
+one archive file and deletes them, so the directory does not grow with every
+restarted worker.
+
+Sources:
+https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+https://prometheus.io/docs/practices/naming/
+https://prometheus.github.io/client_python/multiprocess/
+"""
+
+import ctypes
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "gigwork_requests_total": ("counter", "Total number of requests."),
+    "gigwork_request_errors_total": (
+        "counter",
+        "Number of requests answered with a 4xx (client) or 5xx (server) status.",
+    ),
+    "gigwork_request_duration_seconds": ("histogram", "Request latency in seconds."),
+    "gigwork_db_queries_total": ("counter", "Number of SQL queries issued."),
+    "gigwork_db_query_duration_seconds_total": (
+        "counter",
+        "Time spent executing SQL queries in seconds.",
+    ),
+    "gigwork_cache_requests_total": (
+        "counter",
+        "Page cache lookups of list and retrieve actions by result.",
+    ),
+    "gigwork_cache_hit_ratio": (
+        "gauge",
+        "Share of page cache lookups that were hits.",
+    ),
+    "gigwork_requests_in_flight": ("gauge", "Requests currently being processed."),
+    "gigwork_requests_shed_total": (
+        "counter",
+        "Requests rejected with 503 by admission control, by priority.",
+    ),
+    "gigwork_admission_queue_seconds": (
+        "histogram",
+        "Time admitted requests waited for a concurrency slot in seconds.",
+    ),
+    "gigwork_admission_limit": (
+        "gauge",
+        "Adaptive concurrency limit, summed over the worker processes.",
+    ),
+}
+
+SNAPSHOT_PREFIX = "metrics_"
+ARCHIVE_NAME = "exited.json"
+PRUNE_LOCK_NAME = "prune.lock"
+# a lock older than this was left by a scrape that died while pruning
+PRUNE_LOCK_TIMEOUT = 60
+# Windows process access right and exit code of a running process
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+
+
+def labels_key(labels):
+    """
+    return a hashable, ordered representation of a label dictionary
+    """
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """
+    in-memory store of the metrics of one process
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self.last_flush = 0.0
+        self.file_pid = None
+        self.file_name = None
+
+    def inc(self, name, labels, value=1.0):
+        """
+        increase a counter
+        """
+        key = labels_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def add(self, name, labels, value):
+        """
+        add value (which may be negative) to a gauge
+        """
+        key = labels_key(labels)
+        with self.lock:
+            series = self.gauges.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name, labels, value):
+        """
+        set a gauge to value
+        """
+        key = labels_key(labels)
+        with self.lock:
+            self.gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name, labels, value):
+        """
+        record an observation in a histogram
+        """
+        key = labels_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            # bucket counts are not cumulative here, one slot per bucket plus +Inf
+            state = series.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0, 0])
+            index = len(BUCKETS)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    index = i
+                    break
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        """
+        return the registry content as a JSON serializable dictionary
+        """
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "counters": {
+                    name: [[list(key), value] for key, value in series.items()]
+                    for name, series in self.counters.items()
+                },
+                "gauges": {
+                    name: [[list(key), value] for key, value in series.items()]
+                    for name, series in self.gauges.items()
+                },
+                "histograms": {
+                    name: [
+                        [list(key), list(state[0]), state[1], state[2]]
+                        for key, state in series.items()
+                    ]
+                    for name, series in self.histograms.items()
+                },
+            }
+
+    def flush(self, directory):
+        """
+        atomically write the snapshot of this process into directory
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.file_pid != os.getpid():
+            # forked workers and reused pids never write over the file of
+            # another process
+            self.file_pid = os.getpid()
+            self.file_name = f"{SNAPSHOT_PREFIX}{self.file_pid}_{uuid.uuid4().hex}.json"
+        target = directory / self.file_name
+        temporary = target.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(temporary, target)
+        self.last_flush = time.monotonic()
+
+    def maybe_flush(self, directory, interval):
+        """
+        flush the snapshot if the last one is older than interval seconds
+        """
+        if directory and time.monotonic() - self.last_flush >= interval:
+            self.flush(directory)
+
+
+registry = Registry()
+
+
+def process_alive(pid):
+    """
+    return True if a process with the given pid exists
+    """
+    if os.name == "nt":
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_json(path):
+    """
+    return the content of a JSON file, None if it is missing or unreadable
+    """
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # the file is being replaced or was removed meanwhile
+        return None
+
+
+def snapshot_files(directory):
+    """
+    return (file name, snapshot) of every process that wrote into directory
+    """
+    snapshots = []
+    for path in Path(directory).glob(f"{SNAPSHOT_PREFIX}*.json"):
+        snapshot = read_json(path)
+        if snapshot is not None:
+            snapshots.append((path.name, snapshot))
+    return snapshots
+
+
+def read_snapshots(directory):
+    """
+    return the snapshots of every process that wrote into directory, with the
+    archive of the exited ones. The archive is read last: a snapshot file that
+    was archived meanwhile is skipped, and one that was deleted after being
+    archived is counted in the archive.
+    """
+    snapshots = snapshot_files(directory)
+    archive = read_json(Path(directory) / ARCHIVE_NAME)
+    if archive is None:
+        return [snapshot for _, snapshot in snapshots]
+    absorbed = set(archive["absorbed"])
+    return [archive] + [
+        snapshot for name, snapshot in snapshots if name not in absorbed
+    ]
+
+
+def as_snapshot(merged):
+    """
+    return merged series in the snapshot format
+    """
+    return {
+        "pid": None,
+        "counters": {
+            name: [[list(key), value] for key, value in series.items()]
+            for name, series in merged["counters"].items()
+        },
+        "gauges": {},
+        "histograms": {
+            name: [[list(key), *state] for key, state in series.items()]
+            for name, series in merged["histograms"].items()
+        },
+    }
+
+
+def prune(directory):
+    """
+    fold the snapshots of exited processes into the archive and delete their
+    files. The archive is written before the files are deleted and lists their
+    names, see 'read_snapshots'. Only one process prunes at a time, the others
+    skip it.
+    """
+    directory = Path(directory)
+    lock = directory / PRUNE_LOCK_NAME
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        try:
+            if time.time() - lock.stat().st_mtime > PRUNE_LOCK_TIMEOUT:
+                lock.unlink()
+        except OSError:
+            pass
+        return
+    try:
+        snapshots = snapshot_files(directory)
+        archive = read_json(directory / ARCHIVE_NAME)
+        absorbed = set(archive["absorbed"]) if archive else set()
+        exited = [
+            (name, snapshot)
+            for name, snapshot in snapshots
+            if name not in absorbed and not process_alive(snapshot["pid"])
+        ]
+        if not exited:
+            return
+        merged = merge(([archive] if archive else []) + [s for _, s in exited])
+        present = {name for name, _ in snapshots}
+        content = as_snapshot(merged)
+        # names of files already deleted are not needed any more
+        content["absorbed"] = sorted(
+            (absorbed & present) | {name for name, _ in exited}
+        )
+        temporary = directory / f"{ARCHIVE_NAME}.tmp"
+        temporary.write_text(json.dumps(content), encoding="utf-8")
+        os.replace(temporary, directory / ARCHIVE_NAME)
+        for name, _ in exited:
+            (directory / name).unlink(missing_ok=True)
+    finally:
+        lock.unlink(missing_ok=True)
+
+
+def merge(snapshots):
+    """
+    sum the series of several snapshots, gauges only from live processes
+    """
+    merged = {"counters": {}, "gauges": {}, "histograms": {}}
+    for snapshot in snapshots:
+        for name, series in snapshot["counters"].items():
+            target = merged["counters"].setdefault(name, {})
+            for key, value in series:
+                key = tuple(tuple(pair) for pair in key)
+                target[key] = target.get(key, 0.0) + value
+        if snapshot["pid"] is not None and process_alive(snapshot["pid"]):
+            for name, series in snapshot["gauges"].items():
+                target = merged["gauges"].setdefault(name, {})
+                for key, value in series:
+                    key = tuple(tuple(pair) for pair in key)
+                    target[key] = target.get(key, 0.0) + value
+        for name, series in snapshot["histograms"].items():
+            target = merged["histograms"].setdefault(name, {})
+            for key, buckets, total, count in series:
+                key = tuple(tuple(pair) for pair in key)
+                state = target.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                state[0] = [a + b for a, b in zip(state[0], buckets)]
+                state[1] += total
+                state[2] += count
+    return merged
+
+
+def collect(directory=None):
+    """
+    return the merged metrics of this process, or of all processes
+    that write into directory
+    """
+    if not directory:
+        return merge([registry.snapshot()])
+    registry.flush(directory)
+    prune(directory)
+    return merge(read_snapshots(directory))
+
+
+def add_cache_hit_ratio(merged):
+    """
+    derive the cache hit ratio gauge from the cache lookup counters
+    """
+    lookups = merged["counters"].get("gigwork_cache_requests_total", {})
+    totals = {}
+    for key, value in lookups.items():
+        labels = dict(key)
+        result = labels.pop("result")
+        hits, count = totals.get(labels_key(labels), (0.0, 0.0))
+        totals[labels_key(labels)] = (
+            hits + (value if result == "hit" else 0.0),
+            count + value,
+        )
+    merged["gauges"]["gigwork_cache_hit_ratio"] = {
+        key: hits / count for key, (hits, count) in totals.items() if count
+    }
+
+
+def escape(value):
+    """
+    escape a label value for the text format
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(key, extra=()):
+    """
+    format label pairs as {name="value",...}
+    """
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+def format_value(value):
+    """
+    format a sample value, integers without a decimal part
+    """
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(merged):
+    """
+    return the metrics in the Prometheus text exposition format
+    """
+    add_cache_hit_ratio(merged)
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "histogram":
+            for key, (buckets, total, count) in sorted(
+                merged["histograms"].get(name, {}).items()
+            ):
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS + ("+Inf",), buckets):
+                    cumulative += bucket
+                    le = bound if bound == "+Inf" else format_value(bound)
+                    lines.append(
+                        f"{name}_bucket{format_labels(key, [('le', le)])} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{format_labels(key)} {format_value(total)}")
+                lines.append(f"{name}_count{format_labels(key)} {count}")
+        else:
+            group = "counters" if kind == "counter" else "gauges"
+            for key, value in sorted(merged[group].get(name, {}).items()):
+                lines.append(f"{name}{format_labels(key)} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def view_labels(request):
+    """
+    return the viewset and action labels of a request. Viewsets are labeled
+    by their router basename, other views by their URL name.
+    """
+    match = getattr(request, "resolver_match", None)
+    method = request.method.lower()
+    if match is None:
+        return {"viewset": "unmatched", "action": method}
+    actions = getattr(match.func, "actions", None)
+    if actions:
+        initkwargs = getattr(match.func, "initkwargs", {})
+        viewset = initkwargs.get("basename") or match.url_name
+        return {"viewset": viewset, "action": actions.get(method, method)}
+    return {"viewset": match.url_name or "unknown", "action": method}
@@ -0,0 +1,190 @@
+"""
+Django middleware of the gigwork application.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/http/middleware/
+https://docs.djangoproject.com/en/5.1/topics/db/instrumentation/
+https://www.w3.org/TR/server-timing/
+https://prometheus.io/docs/practices/instrumentation/#online-serving-systems
+https://docs.djangoproject.com/en/5.1/topics/http/middleware/#marking-middleware-as-unused
+https://developer.mozilla.org/en-US/docs/Web/HTTP/Status/503
+"""
+
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+from gigwork.admission import HIGH, LOW, AdmissionController
+from gigwork.metrics import registry, view_labels
+from gigwork.slow_queries import SlowQueryLog
+from gigwork.throttling import full_list
+from gigwork.timing import QueryCounter, RequestTimings
+
+logger = logging.getLogger("gigwork.timing")
+
+
+class ServerTimingMiddleware:
+    """
+    Record per-phase timings, SQL query count and DB time for a sample of requests.
+    The sample rate is read from the SERVER_TIMING_SAMPLE_RATE setting (0.0 - 1.0).
+    Results are sent back in the Server-Timing header and logged as JSON.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.0)
+
+    def __call__(self, request):
+        if self.sample_rate <= 0.0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        request.gigwork_timings = timings
+        with connection.execute_wrapper(timings):
+            response = self.get_response(request)
+        timings.finish()
+
+        response["Server-Timing"] = timings.header()
+        record = timings.record(request, response)
+        logger.info(json.dumps(record), extra={"timings": record})
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Count requests, errors, SQL queries and page cache lookups and measure latency,
+    labeled by viewset and action. Metrics are served by the '/metrics' view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.directory = getattr(settings, "METRICS_DIR", None)
+        self.flush_interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+
+    def __call__(self, request):
+        registry.add("gigwork_requests_in_flight", {}, 1)
+        start = time.perf_counter()
+        counter = QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                response = self.get_response(request)
+        finally:
+            registry.add("gigwork_requests_in_flight", {}, -1)
+        self.record(request, response, time.perf_counter() - start, counter)
+        registry.maybe_flush(self.directory, self.flush_interval)
+        return response
+
+    @staticmethod
+    def record(request, response, duration, counter):
+        """
+        update the registry with the measurements of one request
+        """
+        labels = view_labels(request)
+        registry.inc("gigwork_requests_total", labels)
+        registry.observe("gigwork_request_duration_seconds", labels, duration)
+        if response.status_code >= 400:
+            kind = "server" if response.status_code >= 500 else "client"
+            registry.inc("gigwork_request_errors_total", {**labels, "kind": kind})
+        if counter.queries:
+            registry.inc("gigwork_db_queries_total", labels, counter.queries)
+            registry.inc(
+                "gigwork_db_query_duration_seconds_total", labels, counter.duration
+            )
+        cache_status = getattr(request, "cache_status", None)
+        if cache_status is not None:
+            registry.inc(
+                "gigwork_cache_requests_total", {**labels, "result": cache_status}
+            )
+
+
+class SlowQueryMiddleware:
+    """
+    Log SQL queries slower than SLOW_QUERY_THRESHOLD_MS to the SLOW_QUERY_LOG file
+    together with their view, action and query plan. Disabled when the threshold
+    is not set.
+    """
+
+    def __init__(self, get_response):
+        self.threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", None)
+        if self.threshold is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.path = settings.SLOW_QUERY_LOG
+
+    def __call__(self, request):
+        with connection.execute_wrapper(
+            SlowQueryLog(self.path, self.threshold, request)
+        ):
+            return self.get_response(request)
+
+
+class AdmissionControlMiddleware:
+    """
+    Admit requests up to an adaptive concurrency limit and shed the excess with
+    503 and Retry-After after a short wait. Full-list reads have low priority and
+    may only use part of the limit. Configured by the ADMISSION_CONTROL setting,
+    disabled when it is None.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, "ADMISSION_CONTROL", None)
+        if config is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.controller = AdmissionController(
+            config["initial_limit"],
+            config["min_limit"],
+            config["max_limit"],
+            config["target_latency_seconds"],
+            config["low_priority_share"],
+        )
+        self.max_queue = config["max_queue_seconds"]
+        self.retry_after = config["retry_after_seconds"]
+        self.exempt = set(config.get("exempt", ()))
+
+    @staticmethod
+    def classify(request):
+        """
+        return the priority and URL name of a request
+        """
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return HIGH, None
+        actions = getattr(match.func, "actions", None) or {}
+        # pages and id lookups are cheap, only full lists have low priority
+        if actions.get(request.method.lower()) == "list" and full_list(request.GET):
+            return LOW, match.url_name
+        return HIGH, match.url_name
+
+    def __call__(self, request):
+        priority, url_name = self.classify(request)
+        # monitoring keeps working while the API is overloaded
+        if url_name in self.exempt:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        if not self.controller.acquire(priority, self.max_queue[priority]):
+            registry.inc("gigwork_requests_shed_total", {"priority": priority})
+            response = JsonResponse(
+                {"detail": "The server is overloaded, retry later."}, status=503
+            )
+            response["Retry-After"] = str(self.retry_after)
+            return response
+
+        admitted = time.perf_counter()
+        registry.observe(
+            "gigwork_admission_queue_seconds", {"priority": priority}, admitted - start
+        )
+        try:
+            return self.get_response(request)
+        finally:
+            self.controller.release(time.perf_counter() - admitted)
+            registry.set("gigwork_admission_limit", {}, self.controller.limit)
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:24
+# pylint: skip-file
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gigwork", "0007_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="gig",
+            index=models.Index(
+                fields=["status", "end_date"], name="gigwork_gig_status_7f9e30_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="gig",
+            index=models.Index(
+                fields=["status", "start_date"], name="gigwork_gig_status_ff9eb9_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="gig",
+            index=models.Index(
+                fields=["end_date"], name="gigwork_gig_end_dat_f5da8f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="gig",
+            index=models.Index(
+                fields=["start_date"], name="gigwork_gig_start_d_debd83_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(
+                fields=["status", "price"], name="gigwork_pos_status_84028b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(
+                fields=["status", "created_at"], name="gigwork_pos_status_4248de_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(
+                fields=["status", "expires_at"], name="gigwork_pos_status_b450ad_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(fields=["price"], name="gigwork_pos_price_7437c9_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(
+                fields=["created_at"], name="gigwork_pos_created_3c10f0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(
+                fields=["expires_at"], name="gigwork_pos_expires_7fad78_idx"
+            ),
+        ),
+    ]
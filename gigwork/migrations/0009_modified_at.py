@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-19 15:51
+# pylint: skip-file
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gigwork", "0008_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gig",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="posting",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="gig",
+            index=models.Index(
+                fields=["modified_at"], name="gigwork_gig_modifie_0c54a0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posting",
+            index=models.Index(
+                fields=["modified_at"], name="gigwork_pos_modifie_181359_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:20
+# pylint: skip-file
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # the tables of the database caches in CACHES, existing ones are kept
+    call_command("createcachetable", database=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gigwork", "0009_modified_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:35
+# pylint: skip-file
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gigwork", "0010_idempotency_cache_table"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=100, unique=True)),
+                ("fingerprint", models.CharField(max_length=32)),
+                ("state", models.CharField(max_length=20)),
+                ("status", models.PositiveSmallIntegerField(null=True)),
+                ("content_type", models.CharField(blank=True, max_length=100)),
+                ("body", models.BinaryField(null=True)),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        # the records were kept in a database cache table before
+        migrations.RunSQL(
+            "DROP TABLE IF EXISTS idempotency_keys", migrations.RunSQL.noop
+        ),
+    ]
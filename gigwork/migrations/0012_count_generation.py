@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:39
+# pylint: skip-file
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("gigwork", "0011_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountGeneration",
+            fields=[
+                (
+                    "model",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("token", models.CharField(max_length=32)),
+            ],
+        ),
+    ]
@@ -43,6 +43,26 @@ class Posting(models.Model):
         choices=[("open", "Open"), ("expired", "Expired"), ("accepted", "Accepted")],
         default="open",
     )
+    # incremented by every update, served as the ETag
+    version = models.PositiveIntegerField(default=1)
+    # set by every write, clients syncing a copy fetch only what changed since
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        indexes for the range filters and orderings of the posting list, alone
+        and after a status filter
+        """
+
+        indexes = [
+            models.Index(fields=["status", "price"]),
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["status", "expires_at"]),
+            models.Index(fields=["price"]),
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["expires_at"]),
+            models.Index(fields=["modified_at"]),
+        ]
 
     def __str__(self):
         return self.title
@@ -69,6 +89,57 @@ class Gig(models.Model):
         ],
         default="pending",
     )
+    # incremented by every update, served as the ETag
+    version = models.PositiveIntegerField(default=1)
+    # set by every write, clients syncing a copy fetch only what changed since
+    modified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        indexes for the range filters and orderings of the gig list, alone and
+        after a status filter
+        """
+
+        indexes = [
+            models.Index(fields=["status", "end_date"]),
+            models.Index(fields=["status", "start_date"]),
+            models.Index(fields=["end_date"]),
+            models.Index(fields=["start_date"]),
+            models.Index(fields=["modified_at"]),
+        ]
 
     def __str__(self):
         return self.posting.title
+
+
+class IdempotencyKey(models.Model):
+    """
+    Model storing the record of a POST request sent with an Idempotency-Key,
+    see gigwork.idempotency.
+    """
+
+    # scoped to the user, unique so that only one request can claim it
+    key = models.CharField(max_length=100, unique=True)
+    fingerprint = models.CharField(max_length=32)
+    state = models.CharField(max_length=20)
+    status = models.PositiveSmallIntegerField(null=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    body = models.BinaryField(null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class CountGeneration(models.Model):
+    """
+    Model storing the generation token of the cached list counts of a model,
+    see gigwork.counts. Kept in the database so that every worker sees the
+    writes of the others.
+    """
+
+    model = models.CharField(max_length=100, primary_key=True)
+    token = models.CharField(max_length=32)
+
+    def __str__(self):
+        return self.model
@@ -0,0 +1,62 @@
+"""
+Query budgets for tests. 'QueryBudgetMixin' records every SQL statement an
+endpoint issues, runs it once more after the dataset has grown and asserts that
+the query count stays within a fixed budget and does not depend on the number
+of rows. On failure the message lists the statements and a diff of the queries
+that were added between the two runs.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#django.test.TransactionTestCase.assertNumQueries
+https://docs.python.org/3/library/difflib.html#difflib.unified_diff
+"""
+
+import difflib
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from gigwork.slow_queries import normalize
+
+
+def capture(call, *args):
+    """
+    run call(*args) with an empty cache, return its result and the normalized SQL
+    """
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        result = call(*args)
+    return result, [normalize(query["sql"]) for query in context.captured_queries]
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for test cases asserting per-endpoint query budgets.
+    """
+
+    def assertQueryBudget(  # pylint: disable=invalid-name
+        self, budget, call, grow, setup=None
+    ):
+        """
+        run call, grow the dataset with grow() and run call again. Both runs must
+        issue at most budget queries and the second run no more than the first.
+        When setup is given, call receives its return value; setup itself is not
+        recorded. Return the responses of both runs.
+        """
+        first, small = capture(call, *((setup(),) if setup else ()))
+        grow()
+        second, large = capture(call, *((setup(),) if setup else ()))
+        if len(small) <= budget and len(large) <= len(small):
+            return first, second
+
+        listing = "\n".join(f"{n:>3}. {sql}" for n, sql in enumerate(large, 1))
+        diff = "\n".join(
+            difflib.unified_diff(
+                small, large, "before growing", "after growing", lineterm="", n=1
+            )
+        )
+        self.fail(
+            f"{len(small)} queries before and {len(large)} after growing the "
+            f"dataset, budget is {budget}\n{listing}\n{diff or '(no new queries)'}"
+        )
+        return None
@@ -0,0 +1,48 @@
+"""
+Renderers for the binary wire formats offered next to JSON.
+Clients pick the format with the Accept header, e.g. 'Accept: application/msgpack'.
+The rendered document keeps the same Mason structure ('items', '@controls')
+as the JSON representation.
+
+Sources:
+https://www.django-rest-framework.org/api-guide/renderers/#custom-renderers
+https://www.django-rest-framework.org/api-guide/content-negotiation/
+https://github.com/msgpack/msgpack-python#packingunpacking-of-custom-data-type
+"""
+
+import datetime
+import decimal
+import uuid
+
+import msgpack
+from rest_framework.renderers import BaseRenderer
+
+
+def msgpack_default(obj):
+    """
+    convert types msgpack does not know into the same primitives
+    the JSON renderer would produce for them
+    """
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Cannot serialize object of type {type(obj).__name__}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    render response data as MessagePack
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=msgpack_default, use_bin_type=True)
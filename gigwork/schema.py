@@ -0,0 +1,145 @@
+"""
+Precomputed OpenAPI schema. 'SpectacularAPIView' introspects every viewset and
+serializer on each request; the schema only changes with the code, so it is
+built once per process and kept in memory as YAML and JSON, each with a gzip
+copy and an ETag derived from its content. The schema is read from the file in
+the OPENAPI_SCHEMA_FILE setting when it is set, e.g. a schema.yml generated at
+build time with 'python manage.py spectacular --file schema.yml', and
+introspected on the first request otherwise. drf_spectacular and yaml are only
+imported then, so they do not slow down the start of the workers.
+
+Clients revalidate with If-None-Match. Responses are cacheable for
+SCHEMA_MAX_AGE seconds, and for a year when the request names the current
+version with ?v=<ETag without quotes>, as that URL never changes content.
+
+Sources:
+https://drf-spectacular.readthedocs.io/en/latest/settings.html
+https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Cache-Control
+https://docs.python.org/3/library/gzip.html#gzip.compress
+"""
+
+import gzip
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+YAML_MEDIA_TYPE = "application/vnd.oai.openapi"
+JSON_MEDIA_TYPE = "application/vnd.oai.openapi+json"
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+_lock = threading.Lock()
+_documents = {}
+_views = {}
+
+
+def generate():
+    """
+    return the schema as a python dictionary
+    """
+    # pylint: disable=import-outside-toplevel
+    path = getattr(settings, "OPENAPI_SCHEMA_FILE", None)
+    if path:
+        import yaml
+
+        with open(path, encoding="utf-8") as file:
+            return yaml.safe_load(file)
+    from drf_spectacular.generators import SchemaGenerator
+
+    return SchemaGenerator().get_schema(request=None, public=True)
+
+
+def document(content):
+    """
+    return the response parts of a rendered schema
+    """
+    return {
+        "content": content,
+        "gzip": gzip.compress(content, mtime=0),
+        "version": hashlib.sha256(content).hexdigest()[:16],
+    }
+
+
+def documents():
+    """
+    return the rendered schema by format, built on the first call
+    """
+    # the YAML document is added last and marks the documents as complete
+    if "yaml" not in _documents:
+        with _lock:
+            if "yaml" not in _documents:
+                # pylint: disable-next=import-outside-toplevel
+                from drf_spectacular.renderers import (
+                    OpenApiJsonRenderer,
+                    OpenApiYamlRenderer,
+                )
+
+                schema = generate()
+                context = {}
+                _documents["json"] = document(
+                    OpenApiJsonRenderer().render(schema, renderer_context=context)
+                )
+                _documents["yaml"] = document(
+                    OpenApiYamlRenderer().render(schema, renderer_context=context)
+                )
+    return _documents
+
+
+def clear():
+    """
+    drop the built schema, the next request builds it again
+    """
+    with _lock:
+        _documents.clear()
+
+
+def requested_format(request):
+    """
+    return "json" or "yaml", in the same way as 'SpectacularAPIView'
+    """
+    accept = request.headers.get("Accept", "")
+    if request.GET.get("format") == "json" or JSON_MEDIA_TYPE in accept:
+        return "json"
+    if "application/json" in accept:
+        return "json"
+    return "yaml"
+
+
+def schema_view(request):
+    """
+    serve the precomputed schema with an ETag, Cache-Control and optional gzip
+    """
+    fmt = requested_format(request)
+    doc = documents()[fmt]
+    etag = f'"{doc["version"]}"'
+    if request.GET.get("v") == doc["version"]:
+        cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        cache_control = f"public, max-age={settings.SCHEMA_MAX_AGE}"
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+    elif settings.SCHEMA_GZIP and "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(doc["gzip"])
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(doc["content"])
+    response["Content-Type"] = JSON_MEDIA_TYPE if fmt == "json" else YAML_MEDIA_TYPE
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    response["Vary"] = "Accept, Accept-Encoding"
+    return response
+
+
+def swagger_view(request, *args, **kwargs):
+    """
+    serve the Swagger UI of the schema, drf_spectacular is imported on first use
+    """
+    if "swagger" not in _views:
+        # pylint: disable-next=import-outside-toplevel
+        from drf_spectacular.views import SpectacularSwaggerView
+
+        _views["swagger"] = SpectacularSwaggerView.as_view(url_name="schema")
+    return _views["swagger"](request, *args, **kwargs)
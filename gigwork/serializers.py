@@ -7,6 +7,7 @@ https://www.django-rest-framework.org/tutorial/quickstart/#serializers
 https://www.django-rest-framework.org/api-guide/serializers/#overriding-serialization-and-deserialization-behavior
 https://www.django-rest-framework.org/api-guide/relations/#nested-relationships
 https://www.django-rest-framework.org/api-guide/relations/#primarykeyrelatedfield
+https://docs.djangoproject.com/en/5.1/ref/models/querysets/#values-list
 """
 
 from rest_framework import serializers
@@ -65,11 +66,12 @@ class PostingSerializer(serializers.ModelSerializer):
 
     def to_internal_value(self, data):
         price = data.get("price")
-        if price <= 0:
+        if price is not None and price <= 0:
             raise serializers.ValidationError(
                 {"error": "price must be a positive non-zero value"}
             )
-        return data
+        # the fields are parsed and validated, updates write them unchanged
+        return super().to_internal_value(data)
 
     class Meta:
         """
@@ -86,9 +88,24 @@ class PostingSerializer(serializers.ModelSerializer):
             "expires_at",
             "price",
             "status",
+            "modified_at",
         ]
 
 
+class EmbeddedPostingSerializer(PostingSerializer):
+    """
+    convert 'Posting' model into a python dictionary with a self link, for
+    postings embedded in other resources
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["@controls"] = {
+            "self": {"href": reverse("postings-detail", args=[data["id"]])}
+        }
+        return data
+
+
 class GigSerializer(serializers.ModelSerializer):
     """
     convert 'Gig' model into a python dictionary
@@ -105,4 +122,204 @@ class GigSerializer(serializers.ModelSerializer):
         """
 
         model = Gig
-        fields = ["id", "owner", "posting", "start_date", "end_date", "status"]
+        fields = [
+            "id",
+            "owner",
+            "posting",
+            "start_date",
+            "end_date",
+            "status",
+            "modified_at",
+        ]
+
+
+class ExpandedGigSerializer(GigSerializer):
+    """
+    convert 'Gig' model into a python dictionary with the posting embedded
+    instead of its primary key
+    """
+
+    posting = EmbeddedPostingSerializer(read_only=True)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer for list endpoints. It works from 'values_list()' rows
+    instead of model instances and field objects, and must produce exactly the same
+    representation as the matching ModelSerializer.
+    Child classes set *columns* (lookups passed to 'values_list()') and implement
+    'to_representation()' for one row.
+    """
+
+    columns = ()
+    chunk_size = 2000
+
+    # shared field instances, used only for their formatting rules
+    datetime_field = serializers.DateTimeField()
+    price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.users_url = ""
+
+    def to_representation(self, row):
+        """
+        convert one 'values_list()' row into a python dictionary
+        """
+        raise NotImplementedError
+
+    def public_user(self, pk, first_name, last_name):
+        """
+        same output as 'PublicUserSerializer' built from joined columns
+        """
+        return {
+            "id": pk,
+            "first_name": first_name,
+            "last_name": last_name,
+            "@controls": {"self": {"href": f"{self.users_url}{pk}/"}},
+        }
+
+    @property
+    def data(self):
+        """
+        list of python dictionaries for every row of the queryset
+        """
+        # detail URLs are the list URL plus the primary key, no need to reverse each
+        self.users_url = reverse("users-list")
+        rows = self.queryset.values_list(*self.columns)
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows.iterator(self.chunk_size)]
+
+
+class UserValuesSerializer(ValuesSerializer):
+    """
+    fast read-only equivalent of 'UserSerializer'
+    """
+
+    columns = ("id", "first_name", "last_name", "email", "phone_number", "address")
+
+    def to_representation(self, row):
+        pk, first_name, last_name, email, phone_number, address = row
+        return {
+            "id": pk,
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email,
+            "phone_number": phone_number,
+            "address": address,
+        }
+
+
+class PostingValuesSerializer(ValuesSerializer):
+    """
+    fast read-only equivalent of 'PostingSerializer'
+    """
+
+    columns = (
+        "id",
+        "title",
+        "owner_id",
+        "owner__first_name",
+        "owner__last_name",
+        "description",
+        "created_at",
+        "expires_at",
+        "price",
+        "status",
+        "modified_at",
+    )
+
+    def to_representation(self, row):
+        (
+            pk,
+            title,
+            owner_id,
+            owner_first_name,
+            owner_last_name,
+            description,
+            created_at,
+            expires_at,
+            price,
+            status,
+            modified_at,
+        ) = row
+        datetime_repr = self.datetime_field.to_representation
+        return {
+            "id": pk,
+            "title": title,
+            "owner": self.public_user(owner_id, owner_first_name, owner_last_name),
+            "description": description,
+            "created_at": datetime_repr(created_at),
+            "expires_at": datetime_repr(expires_at),
+            "price": self.price_field.to_representation(price),
+            "status": status,
+            "modified_at": datetime_repr(modified_at),
+        }
+
+
+class GigValuesSerializer(ValuesSerializer):
+    """
+    fast read-only equivalent of 'GigSerializer', or of 'ExpandedGigSerializer'
+    when "posting" is expanded. The posting columns are then joined into the
+    same query.
+    """
+
+    columns = (
+        "id",
+        "owner_id",
+        "owner__first_name",
+        "owner__last_name",
+        "posting_id",
+        "start_date",
+        "end_date",
+        "status",
+        "modified_at",
+    )
+
+    def __init__(self, queryset, expand=()):
+        super().__init__(queryset)
+        self.postings = None
+        if "posting" in expand:
+            self.postings = PostingValuesSerializer(queryset)
+            self.postings_url = reverse("postings-list")
+            self.columns = self.columns + tuple(
+                f"posting__{column}" for column in PostingValuesSerializer.columns
+            )
+
+    def embedded_posting(self, row):
+        """
+        same output as 'EmbeddedPostingSerializer' built from joined columns
+        """
+        self.postings.users_url = self.users_url
+        posting = self.postings.to_representation(row)
+        posting["@controls"] = {
+            "self": {"href": f"{self.postings_url}{posting['id']}/"}
+        }
+        return posting
+
+    def to_representation(self, row):
+        (
+            pk,
+            owner_id,
+            owner_first_name,
+            owner_last_name,
+            posting_id,
+            start_date,
+            end_date,
+            status,
+            modified_at,
+        ) = row[:9]
+        datetime_repr = self.datetime_field.to_representation
+        return {
+            "id": pk,
+            "owner": self.public_user(owner_id, owner_first_name, owner_last_name),
+            "posting": (
+                self.embedded_posting(row[9:])
+                if self.postings and posting_id is not None
+                else posting_id
+            ),
+            "start_date": datetime_repr(start_date),
+            "end_date": datetime_repr(end_date),
+            "status": status,
+            "modified_at": datetime_repr(modified_at),
+        }
@@ -0,0 +1,124 @@
+"""
+Slow-query log. 'SlowQueryLog' is a database execute wrapper that writes every
+query slower than a threshold as one JSON line (NDJSON): the normalized SQL, a
+fingerprint of its parameters, the view and action that issued it and the query
+plan captured right after it ran. 'python manage.py slow_query_report'
+aggregates the log.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/db/instrumentation/
+https://docs.djangoproject.com/en/5.1/ref/models/querysets/#explain
+https://www.sqlite.org/eqp.html
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime
+
+from django.db import DatabaseError, NotSupportedError
+
+from gigwork.metrics import view_labels
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST = re.compile(r"IN \((?:\s*%s\s*,?)+\)")
+SAVEPOINT = re.compile(r'"s\d+_x\d+"')
+WHITESPACE = re.compile(r"\s+")
+
+# statements that can be explained without side effects
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+write_lock = threading.Lock()
+
+
+def normalize(sql):
+    """
+    replace literals in sql so that the same statement with other values compares
+    equal, e.g. "WHERE id = 12" and "WHERE id = 13" both become "WHERE id = %s"
+    """
+    sql = SAVEPOINT.sub('"savepoint"', sql)
+    sql = STRING_LITERAL.sub("%s", sql)
+    sql = NUMBER.sub("%s", sql)
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def fingerprint(value):
+    """
+    return a short stable hash of value
+    """
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()[:12]
+
+
+def explain(connection, sql, params):
+    """
+    return the query plan of sql as a list of lines, or None if it cannot be
+    explained. The plan is read with a backend cursor so it is not seen by the
+    execute wrappers and does not disturb the cursor of the logged query.
+    """
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        cursor = connection.create_cursor()
+        try:
+            cursor.execute(f"{prefix} {sql}", params or ())
+            # the human readable part is the last column on every backend
+            return [str(row[-1]) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except (DatabaseError, NotSupportedError):
+        return None
+
+
+class SlowQueryLog:  # pylint: disable=too-few-public-methods
+    """
+    database execute wrapper logging queries slower than threshold_ms to path
+    """
+
+    def __init__(self, path, threshold_ms, request=None):
+        self.path = path
+        self.threshold = threshold_ms / 1000
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.write(self.entry(sql, params, many, context, duration))
+
+    def entry(self, sql, params, many, context, duration):
+        """
+        return the log record of one slow query
+        """
+        normalized = WHITESPACE.sub(" ", normalize(sql)).strip()
+        labels = (
+            view_labels(self.request)
+            if self.request is not None
+            else {"viewset": None, "action": None}
+        )
+        return {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(duration * 1000, 3),
+            "sql": normalized,
+            "sql_fingerprint": fingerprint(normalized),
+            "params_fingerprint": fingerprint(params),
+            "viewset": labels["viewset"],
+            "action": labels["action"],
+            "path": getattr(self.request, "path", None),
+            "plan": None if many else explain(context["connection"], sql, params),
+        }
+
+    def write(self, entry):
+        """
+        append entry as one line to the log file
+        """
+        line = json.dumps(entry, default=str) + "\n"
+        with write_lock:
+            with open(self.path, "a", encoding="utf-8") as log:
+                log.write(line)
@@ -0,0 +1,275 @@
+"""
+Token-bucket rate limiting. Every client has a bucket per auth token, per IP
+address and per viewset action. A bucket holds up to *capacity* tokens and
+refills at *refill_rate* tokens per second; each request takes one token and is
+rejected with 429 when the bucket is empty. The buckets live in the "throttle"
+cache, apart from the page cache so that its traffic does not evict them. With
+the local-memory backend of the settings every worker process has its own
+buckets and the effective limit is multiplied by the number of workers; only
+workers sharing that cache (Redis, Memcached) share the limits. Limits are
+configured with the THROTTLE_BUCKETS setting, a kind that is not configured is
+unlimited. Only full lists count as the "list" action: pages (?limit=) and id
+lookups (?id=) are index range scans and count as "list_page", so that a tight
+list limit does not throttle clients exporting or syncing page by page.
+
+Throttles are keyed by the Authorization header rather than the user, so
+'RateLimitMixin' can check them before the token is looked up in the database.
+
+Sources:
+https://www.django-rest-framework.org/api-guide/throttling/#custom-throttles
+https://datatracker.ietf.org/doc/draft-ietf-httpapi-ratelimit-headers/
+https://en.wikipedia.org/wiki/Token_bucket
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+CACHE_ALIAS = "throttle"
+INDEX_KEY = "throttle:index"
+# upper bound of buckets listed for operators, the buckets themselves are not capped
+MAX_INDEXED_BUCKETS = 10000
+# query parameters that make a list read only part of the collection
+PARTIAL_LIST_PARAMS = ("limit", "id")
+
+
+def full_list(params):
+    """
+    return True if a list request with the query params reads the whole
+    collection
+    """
+    return not any(name in params for name in PARTIAL_LIST_PARAMS)
+
+
+def bucket_settings(kind, action=None):
+    """
+    return the (capacity, refill_rate) of a bucket kind, or None if unlimited.
+    Action limits are looked up as "<viewset>.<action>" first, then "<action>".
+    """
+    buckets = getattr(settings, "THROTTLE_BUCKETS", {})
+    if kind == "action":
+        actions = buckets.get("actions", {})
+        config = actions.get(action) or actions.get(action.partition(".")[2])
+    else:
+        config = buckets.get(kind)
+    if not config:
+        return None
+    return config["capacity"], config["refill_rate"]
+
+
+def refilled(state, capacity, refill_rate, now):
+    """
+    return the tokens of a stored bucket state at time now
+    """
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * refill_rate)
+
+
+def index_bucket(key, kind):
+    """
+    remember a new bucket so that operators can list the active buckets
+    """
+    cache = caches[CACHE_ALIAS]
+    index = cache.get(INDEX_KEY, {})
+    if key in index or len(index) >= MAX_INDEXED_BUCKETS:
+        return
+    index[key] = kind
+    cache.set(INDEX_KEY, index, None)
+
+
+def take(key, kind, capacity, refill_rate, now=None):
+    """
+    take one token from the bucket called key, return a dict with 'allowed',
+    'limit', 'remaining', 'reset' (seconds until full) and 'wait' (seconds until
+    a token is available). The read and write are not atomic, concurrent
+    requests may occasionally get one token more than the capacity.
+    """
+    now = time.time() if now is None else now
+    cache = caches[CACHE_ALIAS]
+    state = cache.get(key)
+    if state is None:
+        index_bucket(key, kind)
+    tokens = refilled(state, capacity, refill_rate, now)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    reset = (capacity - tokens) / refill_rate
+    # an expired bucket is a full bucket, no need to keep it longer
+    cache.set(key, (tokens, now), math.ceil(reset) + 1)
+    return {
+        "allowed": allowed,
+        "limit": capacity,
+        "remaining": math.floor(tokens),
+        "reset": math.ceil(reset),
+        "wait": 0 if allowed else (1 - tokens) / refill_rate,
+    }
+
+
+def token_ident(request):
+    """
+    return a hash of the Authorization header, or None without one
+    """
+    header = request.META.get("HTTP_AUTHORIZATION")
+    if not header:
+        return None
+    return hashlib.sha256(header.encode("utf-8")).hexdigest()[:16]
+
+
+def usage(now=None):
+    """
+    return the current state of all active buckets, fullest first
+    """
+    now = time.time() if now is None else now
+    cache = caches[CACHE_ALIAS]
+    index = cache.get(INDEX_KEY, {})
+    states = cache.get_many(list(index))
+    buckets = []
+    for key, kind in index.items():
+        if key not in states:
+            continue
+        action = key.split(":")[2] if kind == "action" else None
+        config = bucket_settings(kind, action)
+        if config is None:
+            continue
+        capacity, refill_rate = config
+        tokens = refilled(states[key], capacity, refill_rate, now)
+        buckets.append(
+            {
+                "bucket": key,
+                "kind": kind,
+                "capacity": capacity,
+                "refill_rate": refill_rate,
+                "tokens": round(tokens, 2),
+                "used": round(1 - tokens / capacity, 3),
+            }
+        )
+    # expired buckets are dropped from the index
+    if len(states) < len(index):
+        cache.set(INDEX_KEY, {key: index[key] for key in states}, None)
+    return sorted(buckets, key=lambda bucket: bucket["used"], reverse=True)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    base class of the token-bucket throttles. Child classes set *kind* and
+    implement 'get_ident_key()'.
+    """
+
+    kind = None
+
+    def __init__(self):
+        self.result = None
+
+    def get_ident_key(self, request, view):
+        """
+        return the part of the bucket key identifying the client, or None to
+        skip this throttle
+        """
+        raise NotImplementedError
+
+    def get_action(self, request, view):  # pylint: disable=unused-argument
+        """
+        return the action of the bucket, only used by action buckets
+        """
+        return None
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request, view)
+        action = self.get_action(request, view)
+        if ident is None or (self.kind == "action" and action is None):
+            return True
+        config = bucket_settings(self.kind, action)
+        if config is None:
+            return True
+        if action:
+            key = f"throttle:{self.kind}:{action}:{ident}"
+        else:
+            key = f"throttle:{self.kind}:{ident}"
+        self.result = take(key, self.kind, *config)
+        limits = getattr(request, "rate_limits", None)
+        if limits is not None:
+            limits.append(self.result)
+        return self.result["allowed"]
+
+    def wait(self):
+        # Retry-After is sent in whole seconds
+        return math.ceil(self.result["wait"]) if self.result else None
+
+
+class TokenRateThrottle(TokenBucketThrottle):
+    """
+    one bucket per auth token
+    """
+
+    kind = "token"
+
+    def get_ident_key(self, request, view):
+        return token_ident(request)
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """
+    one bucket per client IP address
+    """
+
+    kind = "ip"
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class ActionRateThrottle(TokenBucketThrottle):
+    """
+    one bucket per client and viewset action, clients are identified by their
+    token or, without one, their IP address
+    """
+
+    kind = "action"
+
+    def get_action(self, request, view):
+        basename = getattr(view, "basename", None)
+        action = getattr(view, "action", None)
+        if action == "list" and not full_list(request.query_params):
+            action = "list_page"
+        return f"{basename}.{action}" if basename and action else None
+
+    def get_ident_key(self, request, view):
+        ident = token_ident(request)
+        return f"token-{ident}" if ident else f"ip-{self.get_ident(request)}"
+
+
+class RateLimitMixin:
+    """
+    Viewset mixin checking the throttles before authentication, so that a
+    rejected request costs no database query, and adding the RateLimit-Limit,
+    RateLimit-Remaining and RateLimit-Reset headers of the most restrictive
+    bucket to every response.
+    """
+
+    def perform_authentication(self, request):
+        request.rate_limits = []
+        self.check_throttles(request)
+        super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        # 'initial()' checks the throttles again after the permissions
+        if getattr(request, "throttles_checked", False):
+            return
+        request.throttles_checked = True
+        super().check_throttles(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        limits = getattr(request, "rate_limits", None)
+        if limits:
+            tightest = min(limits, key=lambda result: result["remaining"])
+            response["RateLimit-Limit"] = str(tightest["limit"])
+            response["RateLimit-Remaining"] = str(tightest["remaining"])
+            response["RateLimit-Reset"] = str(tightest["reset"])
+        return response
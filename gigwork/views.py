@@ -11,31 +11,58 @@ https://docs.djangoproject.com/en/5.2/ref/urlresolvers/#reverse
 https://www.django-rest-framework.org/tutorial/4-authentication-and-permissions/#associating-snippets-with-users
 https://www.django-rest-framework.org/api-guide/views/
 https://www.django-rest-framework.org/api-guide/permissions/#api-reference
+https://www.django-rest-framework.org/api-guide/content-negotiation/
 """
 
 # Django
-from django.http import JsonResponse
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
 from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_headers
+
 # standard library
-from jsonschema import ValidationError, validate
 from rest_framework import permissions, status, viewsets
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.authtoken.models import Token
+
 # Django rest framework
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import (
+    APIException,
+    NotFound,
+    ParseError,
+    PermissionDenied,
+    UnsupportedMediaType,
+)
 from rest_framework.parsers import JSONParser
 from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
+from gigwork.counts import invalidate, list_counts
 from gigwork.custom_permissions import IsOwnerOrReadOnly, IsSelfOrReadOnly
+from gigwork.idempotency import idempotent
+
 # local modules
 from gigwork.masonbuilder import MasonBuilder
+from gigwork.metrics import collect, render
 from gigwork.models import Gig, Posting, User
-from gigwork.serializers import (GigSerializer, PostingSerializer,
-                                 UserSerializer)
+from gigwork.renderers import MessagePackRenderer
+from gigwork.serializers import (
+    ExpandedGigSerializer,
+    GigSerializer,
+    GigValuesSerializer,
+    PostingSerializer,
+    PostingValuesSerializer,
+    UserSerializer,
+    UserValuesSerializer,
+)
+from gigwork.throttling import RateLimitMixin, usage
+from gigwork.timing import TimingMixin, phase
 
 
 class JsonSchemaMixin:  # pylint: disable=too-few-public-methods
@@ -43,18 +70,300 @@ class JsonSchemaMixin:  # pylint: disable=too-few-public-methods
     Mixin to add JSON schema validation to viewsets.
     """
 
-    def json_schema_validation(self, request):
+    def json_schema_validation(self, request, schema=None):
         """
         validate request data to make sure it's of correct json type
         """
         if request.content_type != "application/json":
             raise UnsupportedMediaType(request.content_type)
+        # imported on the first write, reads never need it
+        # pylint: disable-next=import-outside-toplevel
+        from jsonschema import ValidationError, validate
+
         try:
-            validate(request.data, self.json_schema())
+            validate(request.data, schema or self.json_schema())
         except ValidationError as e:
             raise ParseError(detail=str(e)) from e
 
 
+class PreconditionFailed(APIException):
+    """
+    the If-Match header does not match the current version of the resource
+    """
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource has been modified, fetch it again."
+    default_code = "precondition_failed"
+
+
+class ConditionalUpdateMixin:
+    """
+    Mixin for viewsets of owned models with a 'version' column. PUT and PATCH
+    validate only the sent fields and write them with a single conditional UPDATE
+    that checks the owner and, with an If-Match header, the version, so concurrent
+    writers cannot silently overwrite each other and no row is read or locked
+    first. Every update increments the version, which is served as the ETag.
+    Child classes set *patch_fields*, the fields an update may change.
+    """
+
+    patch_fields = ()
+
+    def partial_json_schema(self):
+        """
+        json schema of a PATCH body: a non-empty subset of the patch fields
+        """
+        properties = self.json_schema()["properties"]
+        return {
+            "type": "object",
+            "minProperties": 1,
+            "additionalProperties": False,
+            "properties": {name: properties[name] for name in self.patch_fields},
+        }
+
+    @staticmethod
+    def etag(version):
+        """
+        return the ETag of a resource version
+        """
+        return f'"{version}"'
+
+    @staticmethod
+    def if_match_versions(request):
+        """
+        return the versions listed in If-Match, None without the header or for *
+        """
+        header = request.headers.get("If-Match")
+        if header is None:
+            return None
+        etags = parse_etags(header)
+        if etags == ["*"]:
+            return None
+        # If-Match uses the strong comparison, weak tags never match.
+        # isdigit() also accepts digits like "²" that int() rejects
+        return [
+            int(tag[1:-1]) for tag in etags if tag[1:-1].isdecimal() and tag[0] == '"'
+        ]
+
+    @staticmethod
+    def not_modified(request, etag):
+        """
+        return True if If-None-Match lists the given ETag
+        """
+        header = request.headers.get("If-None-Match")
+        if header is None:
+            return False
+        # If-None-Match uses the weak comparison
+        etags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+        return etags == ["*"] or etag.removeprefix("W/") in etags
+
+    def conditional_update(self, request, pk, partial=True):
+        """
+        validate the sent fields and write only them to row pk, provided the
+        row is owned by the user and has the version requested by If-Match.
+        The extra query to tell 404, 403 and 412 apart is only made when nothing
+        was updated. Return the ETag of the new version when it is known.
+        """
+        schema = self.partial_json_schema() if partial else self.json_schema()
+        self.json_schema_validation(request, schema)
+        model = self.queryset.model
+        # an unsaved instance carrying the key lets unique validators skip the row
+        serializer = self.get_serializer(
+            model(pk=pk), data=request.data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        fields = {
+            name: serializer.validated_data[name]
+            for name in self.patch_fields
+            if name in request.data and name in serializer.validated_data
+        }
+        rows = model.objects.filter(pk=pk, owner_id=request.user.pk)
+        versions = self.if_match_versions(request)
+        if versions is not None:
+            rows = rows.filter(version__in=versions)
+        # QuerySet.update() skips auto_now, modified_at is set here
+        updated = rows.update(
+            **fields, version=F("version") + 1, modified_at=timezone.now()
+        )
+        if not updated:
+            current = model.objects.filter(pk=pk).values_list("owner_id").first()
+            if current is None:
+                raise NotFound()
+            if current[0] != request.user.pk:
+                raise PermissionDenied()
+            raise PreconditionFailed()
+        # QuerySet.update() sends no signals
+        invalidate(model)
+        return self.etag(versions[0] + 1) if versions and len(versions) == 1 else None
+
+
+class BatchRetrieveMixin:
+    """
+    Mixin adding a 'batch' action to viewsets. GET <collection>/batch/?ids=1,2,3
+    returns the listed items in a Mason collection, in the order of the ids, all
+    fetched with one primary key lookup instead of a request per item. Ids that
+    do not exist are listed in 'not_found'. The number of ids per request is
+    limited by the BATCH_MAX_IDS setting.
+    Child classes set *values_serializer_class*.
+    """
+
+    values_serializer_class = None
+
+    @staticmethod
+    def batch_ids(request):
+        """
+        return the distinct ids of the ids query parameter in their given order
+        """
+        ids = request.query_params.get("ids", "")
+        try:
+            ids = list(dict.fromkeys(int(pk) for pk in ids.split(",") if pk.strip()))
+        except ValueError as e:
+            raise ParseError(detail="ids must be comma separated integers") from e
+        if not ids:
+            raise ParseError(detail="ids is required")
+        if len(ids) > settings.BATCH_MAX_IDS:
+            raise ParseError(detail=f"at most {settings.BATCH_MAX_IDS} ids allowed")
+        return ids
+
+    def values_serializer(self, queryset):
+        """
+        return the read-only serializer of list and batch responses
+        """
+        return self.values_serializer_class(queryset)
+
+    @action(detail=False, methods=["get"])
+    def batch(self, request):
+        """
+        return the items with the requested ids
+        """
+        ids = self.batch_ids(request)
+        queryset = self.get_queryset().filter(pk__in=ids)
+        with phase(request, "serialize"):
+            items = self.values_serializer(queryset).data
+        found = {item["id"]: item for item in items}
+        with phase(request, "mason"):
+            base_url = reverse(f"{self.basename}-list")
+            body = MasonBuilder(items=[], not_found=[])
+            for pk in ids:
+                if pk not in found:
+                    body["not_found"].append(pk)
+                    continue
+                item = MasonBuilder(found[pk])
+                item.add_control("self", f"{base_url}{pk}/")
+                body["items"].append(item)
+            body.add_control("self", request.build_absolute_uri())
+            body.add_control("collection", request.build_absolute_uri(base_url))
+        return Response(body)
+
+
+class KeysetPaginationMixin:
+    """
+    Mixin for opt-in keyset pagination of list responses. With ?limit=<n> a
+    list returns at most n items ordered by id and a 'next' control to the
+    items after the last one (?after=<id>). Every page is a range scan of the
+    primary key index however deep it is, unlike offset pagination. Without
+    limit the whole collection is returned. Page sizes are limited by the
+    PAGE_MAX_LIMIT setting. Pages are not page cached, clients paging or
+    syncing through a collection revalidate them with their ETag instead.
+    """
+
+    @staticmethod
+    def keyset_page(request, queryset):
+        """
+        return the queryset of the requested page and the page size, None when
+        the list is not paginated. One item more than the page size is fetched
+        to know if there is a next page.
+        """
+        limit = request.query_params.get("limit")
+        if limit is None:
+            return queryset, None
+        try:
+            limit = int(limit)
+            after = int(request.query_params.get("after", 0))
+        except ValueError as e:
+            raise ParseError(detail="limit and after must be integers") from e
+        if not 0 < limit <= settings.PAGE_MAX_LIMIT:
+            raise ParseError(
+                detail=f"limit must be between 1 and {settings.PAGE_MAX_LIMIT}"
+            )
+        if "ordering" in request.query_params:
+            raise ParseError(detail="pages are ordered by id, ordering is not allowed")
+        return queryset.filter(pk__gt=after).order_by("pk")[: limit + 1], limit
+
+    @staticmethod
+    def list_counts(request, queryset):
+        """
+        return the counts of a list, None when left out with ?counts=0. Counts
+        cover the whole collection and change with every write to it, so
+        clients revalidating pages leave them out, then the ETag of a page
+        only changes with its items.
+        """
+        if request.query_params.get("counts") == "0":
+            return None
+        return list_counts(queryset)
+
+    @staticmethod
+    def page_headers(limit):
+        """
+        return the headers of a list response. 'cache_page' does not store
+        private responses, and no-cache makes clients revalidate pages.
+        """
+        return {"Cache-Control": "private, no-cache"} if limit is not None else {}
+
+    @staticmethod
+    def next_page(request, items, limit):
+        """
+        drop the extra item of a page and return the URL of the next page, None
+        on the last page
+        """
+        if limit is None or len(items) <= limit:
+            return None
+        del items[limit:]
+        query = request.query_params.copy()
+        query["after"] = items[-1]["id"]
+        return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+class ExpandMixin:
+    """
+    Mixin for viewsets whose items can embed related objects instead of their
+    primary keys. GET requests take ?expand=<path>,... and the related objects are
+    joined into the same query. Child classes set *expandable*, which maps each
+    accepted path to its 'select_related()' lookup; only listed paths are
+    accepted, which bounds how deep an expansion can go. List responses stay
+    page cached per URL, so every expansion is cached separately.
+    """
+
+    expandable = {}
+
+    def get_expand(self):
+        """
+        return the relations to embed, the first part of every requested path
+        """
+        paths = self.request.query_params.get("expand", "")
+        paths = [path.strip() for path in paths.split(",") if path.strip()]
+        unknown = [path for path in paths if path not in self.expandable]
+        if unknown:
+            raise ParseError(
+                detail=f"cannot expand {', '.join(unknown)}, "
+                f"expandable: {', '.join(self.expandable)}"
+            )
+        return {path.split(".")[0] for path in paths}
+
+    def expand_lookups(self):
+        """
+        return the 'select_related()' lookups of the requested paths
+        """
+        expand = self.get_expand()
+        return [
+            lookup
+            for path, lookup in self.expandable.items()
+            if path.split(".")[0] in expand
+        ]
+
+    def values_serializer(self, queryset):
+        return self.values_serializer_class(queryset, expand=self.get_expand())
+
+
 @api_view(["GET"])
 @permission_classes([permissions.IsAuthenticatedOrReadOnly])
 def api_root(request):
@@ -74,15 +383,43 @@ def api_root(request):
     )
 
 
-class UserViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
+def metrics(request):  # pylint: disable=unused-argument
+    """
+    return the request metrics of all workers in the Prometheus text format
+    """
+    merged = collect(getattr(settings, "METRICS_DIR", None))
+    return HttpResponse(
+        render(merged), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def throttle_usage(request):  # pylint: disable=unused-argument
+    """
+    return the fill level of the active rate limit buckets, fullest first
+    """
+    return JsonResponse({"buckets": usage()})
+
+
+class UserViewSet(
+    RateLimitMixin,
+    TimingMixin,
+    JsonSchemaMixin,
+    BatchRetrieveMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint to view and edit users
     this viewset provides default actions inherited from 'ModelViewSet',
     theses are: 'list', 'create', 'destroy', 'retrieve', 'update'.
+    'batch' returns several users by id.
     """
 
     queryset = User.objects.all().order_by("id")
     serializer_class = UserSerializer
+    values_serializer_class = UserValuesSerializer
     filterset_fields = [
         "id",
         "first_name",
@@ -91,7 +428,8 @@ class UserViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
         "phone_number",
         "address",
     ]
-    renderer_classes = [JSONRenderer]
+    ordering_fields = ["id", "email"]
+    renderer_classes = [JSONRenderer, MessagePackRenderer]
     parser_classes = [JSONParser]
 
     @staticmethod
@@ -129,89 +467,141 @@ class UserViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
     # authentication_classes = []
 
     def get_object(self):
-        obj = User.objects.get(pk=self.kwargs["pk"])
+        # users mostly act on themselves, the authenticated user is already loaded
+        if str(self.request.user.pk) == str(self.kwargs["pk"]):
+            obj = self.request.user
+        else:
+            obj = User.objects.get(pk=self.kwargs["pk"])
         self.check_object_permissions(self.request, obj)
         return obj
 
     @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
+    @method_decorator(vary_on_headers("Authorization", "Accept"))
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        body = MasonBuilder(items=[])
-        for user in response.data:
-            item = MasonBuilder(user)
-            self_url = reverse("users-detail", kwargs={"pk": user["id"]})
-            item.add_control("self", self_url)
-            body["items"].append(item)
-
-        base_url = request.build_absolute_uri(reverse("users-list"))
-        body.add_control("self", base_url)
-        body.add_control(
-            ctrl_name="filter users by field",
-            href=base_url + "{?id,first_name,last_name,email,phone_number,address}",
-        )
-
-        body.add_control_post(
-            ctrl_name="user: create",
-            title="add a new user",
-            href=request.build_absolute_uri(),
-            schema=UserViewSet.json_schema(),
-        )
-
-        return JsonResponse(body)
+        queryset = self.filter_queryset(self.get_queryset())
+        page, limit = self.keyset_page(request, queryset)
+        with phase(request, "serialize"):
+            users = UserValuesSerializer(page).data
+        next_url = self.next_page(request, users, limit)
+        with phase(request, "mason"):
+            body = MasonBuilder(items=[])
+            for user in users:
+                item = MasonBuilder(user)
+                self_url = reverse("users-detail", kwargs={"pk": user["id"]})
+                item.add_control("self", self_url)
+                body["items"].append(item)
+
+            base_url = request.build_absolute_uri(reverse("users-list"))
+            body.add_control("self", base_url)
+            body.add_control(
+                ctrl_name="filter users by field",
+                href=base_url + "{?id,first_name,last_name,email,phone_number,address}",
+            )
+            body.add_control(ctrl_name="order users", href=base_url + "{?ordering}")
+            body.add_control(
+                ctrl_name="page through users", href=base_url + "{?limit,after}"
+            )
+            if next_url:
+                body.add_control("next", next_url)
+
+            body.add_control(
+                ctrl_name="get users by ids", href=base_url + "batch/{?ids}"
+            )
+
+            body.add_control_post(
+                ctrl_name="user: create",
+                title="add a new user",
+                href=request.build_absolute_uri(),
+                schema=UserViewSet.json_schema(),
+            )
+
+        return Response(body, headers=self.page_headers(limit))
 
     @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
+    @method_decorator(vary_on_headers("Authorization", "Accept"))
     def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
-        body = MasonBuilder(response.data)
-        self_url = reverse("users-detail", kwargs={"pk": response.data["id"]})
-
-        body.add_control("self", self_url)
-
-        body.add_control_put(
-            title="update existing user",
-            href=self_url,
-            schema=UserViewSet.json_schema(),
-        )
-        body.add_control_delete(title="remove a user", href=self_url)
-        return JsonResponse(body)
-
+        with phase(request, "serialize"):
+            response = super().retrieve(request, *args, **kwargs)
+        with phase(request, "mason"):
+            body = MasonBuilder(response.data)
+            self_url = reverse("users-detail", kwargs={"pk": response.data["id"]})
+
+            body.add_control("self", self_url)
+
+            body.add_control_put(
+                title="update existing user",
+                href=self_url,
+                schema=UserViewSet.json_schema(),
+            )
+            body.add_control_delete(title="remove a user", href=self_url)
+        return Response(body)
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         create new user, return authentication token for that user.
         data is sent from the client in json format, required fields are: first_name,
         last_name, email.
         """
-        self.json_schema_validation(request, *args, **kwargs)
+        self.json_schema_validation(request)
         serializer = UserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         token = Token.objects.create(user=user)
         return JsonResponse({"Token": token.key}, status=status.HTTP_201_CREATED)
 
-
-class PostingViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        name = (serializer.instance.first_name, serializer.instance.last_name)
+        user = serializer.save()
+        if (user.first_name, user.last_name) == name:
+            return
+        # postings and gigs embed the name of their owner, their ETags must
+        # change with it and syncing clients must fetch them again
+        now = timezone.now()
+        for model in (Posting, Gig):
+            model.objects.filter(owner=user).update(
+                version=F("version") + 1, modified_at=now
+            )
+            # QuerySet.update() sends no signals
+            invalidate(model)
+
+
+class PostingViewSet(
+    RateLimitMixin,
+    TimingMixin,
+    JsonSchemaMixin,
+    ConditionalUpdateMixin,
+    BatchRetrieveMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint to view and edit postings
     this viewset provides default actions inherited from 'ModelViewset',
-    theses are: 'list', 'create', 'destroy', 'retrieve', 'update'.
+    theses are: 'list', 'create', 'destroy', 'retrieve', 'update',
+    'partial_update'. 'batch' returns several items by id.
     """
 
     queryset = Posting.objects.all().order_by("status")
     serializer_class = PostingSerializer
-    filterset_fields = [
-        "id",
-        "title",
-        "description",
-        "owner",
-        "created_at",
-        "expires_at",
-        "price",
-        "status",
-    ]
-    renderer_classes = [JSONRenderer]
+    values_serializer_class = PostingValuesSerializer
+    # range lookups and orderings are limited to indexed columns, see the indexes
+    # in 'Posting.Meta'
+    filterset_fields = {
+        "id": ["exact"],
+        "title": ["exact"],
+        "description": ["exact"],
+        "owner": ["exact"],
+        "created_at": ["exact", "gte", "gt", "lte", "lt", "range"],
+        "expires_at": ["exact", "gte", "gt", "lte", "lt", "range"],
+        "price": ["exact", "gte", "gt", "lte", "lt", "range"],
+        "status": ["exact"],
+        "modified_at": ["gte", "gt"],
+    }
+    ordering_fields = ["id", "created_at", "expires_at", "price", "status"]
+    renderer_classes = [JSONRenderer, MessagePackRenderer]
     parser_classes = [JSONParser]
+    patch_fields = ("title", "description", "expires_at", "price", "status")
 
     authentication_classes = [TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
@@ -238,58 +628,111 @@ class PostingViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
         return schema
 
     def get_object(self):
-        obj = Posting.objects.get(pk=self.kwargs["pk"])
+        # the owner is needed by the permission check and the serializer
+        obj = Posting.objects.select_related("owner").get(pk=self.kwargs["pk"])
         self.check_object_permissions(self.request, obj)
         return obj
 
     @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
+    @method_decorator(vary_on_headers("Authorization", "Accept"))
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        body = MasonBuilder(items=[])
-        for posting in response.data:
-            item = MasonBuilder(posting)
-            self_url = reverse("postings-detail", kwargs={"pk": posting["id"]})
-            item.add_control("self", self_url)
-            body["items"].append(item)
-
-        base_url = request.build_absolute_uri(reverse("postings-list"))
-        body.add_control("self", base_url)
-        body.add_control(
-            ctrl_name="filter postings by field",
-            href=base_url + "{?id, title, description, owner, created_at,"
-            "expires_at, price, status}",
-        )
-
-        body.add_control_post(
-            ctrl_name="posting: create",
-            title="add a new posting",
-            href=base_url,
-            schema=PostingViewSet.json_schema(),
-        )
-
-        return JsonResponse(body)
+        queryset = self.filter_queryset(self.get_queryset())
+        with phase(request, "count"):
+            counts = self.list_counts(request, queryset)
+        page, limit = self.keyset_page(request, queryset)
+        with phase(request, "serialize"):
+            postings = PostingValuesSerializer(page).data
+        next_url = self.next_page(request, postings, limit)
+        with phase(request, "mason"):
+            body = MasonBuilder(items=[])
+            if counts is not None:
+                body["counts"] = counts
+            for posting in postings:
+                item = MasonBuilder(posting)
+                self_url = reverse("postings-detail", kwargs={"pk": posting["id"]})
+                item.add_control("self", self_url)
+                body["items"].append(item)
+
+            base_url = request.build_absolute_uri(reverse("postings-list"))
+            body.add_control("self", base_url)
+            body.add_control(
+                ctrl_name="filter postings by field",
+                href=base_url + "{?id, title, description, owner, created_at,"
+                "expires_at, price, status}",
+            )
+            body.add_control(
+                ctrl_name="filter postings by range",
+                href=base_url + "{?created_at__gte, created_at__lt, expires_at__gte,"
+                "expires_at__lt, price__gte, price__lte, price__range}",
+            )
+            body.add_control(ctrl_name="order postings", href=base_url + "{?ordering}")
+            body.add_control(
+                ctrl_name="page through postings",
+                href=base_url + "{?limit,after,counts}",
+            )
+            body.add_control(
+                ctrl_name="postings changed since",
+                href=base_url + "{?modified_at__gte,limit,after,counts}",
+            )
+            if next_url:
+                body.add_control("next", next_url)
+
+            body.add_control(
+                ctrl_name="get postings by ids", href=base_url + "batch/{?ids}"
+            )
+
+            body.add_control_post(
+                ctrl_name="posting: create",
+                title="add a new posting",
+                href=base_url,
+                schema=PostingViewSet.json_schema(),
+            )
+
+        return Response(body, headers=self.page_headers(limit))
 
-    @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
     def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
-        body = MasonBuilder(response.data)
-        self_url = reverse("postings-detail", kwargs={"pk": response.data["id"]})
-        body.add_control("self", self_url)
-        body.add_control_put(
-            title="update existing posting",
-            href=self_url,
-            schema=PostingViewSet.json_schema(),
-        )
-        body.add_control_delete(title="remove a posting", href=self_url)
-        return JsonResponse(body)
+        # not page cached: the ETag must change as soon as the version does
+        posting = self.get_object()
+        etag = self.etag(posting.version)
+        if self.not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        with phase(request, "serialize"):
+            data = self.get_serializer(posting).data
+        with phase(request, "mason"):
+            body = MasonBuilder(data)
+            self_url = reverse("postings-detail", kwargs={"pk": data["id"]})
+            body.add_control("self", self_url)
+            body.add_control_put(
+                title="update existing posting",
+                href=self_url,
+                schema=PostingViewSet.json_schema(),
+            )
+            body.add_control_patch(
+                title="update some fields of a posting",
+                href=self_url,
+                schema=self.partial_json_schema(),
+            )
+            body.add_control_delete(title="remove a posting", href=self_url)
+        return Response(body, headers={"ETag": etag})
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def perform_destroy(self, instance):
+        # the gig of the posting loses it through SET_NULL, which leaves its
+        # version and modified_at as they were; clients syncing the changed
+        # gigs and revalidating their ETags must see it. A gig touched by a
+        # delete that then fails is only synced for nothing.
+        touched = Gig.objects.filter(posting=instance).update(
+            version=F("version") + 1, modified_at=timezone.now()
+        )
+        if touched:
+            invalidate(Gig)
+        instance.delete()
+
+    @idempotent
     def create(self, request, *args, **kwargs):
-        self.json_schema_validation(request, *args, **kwargs)
+        self.json_schema_validation(request)
         serializer = PostingSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
@@ -298,26 +741,61 @@ class PostingViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
         )
 
     def update(self, request, *args, **kwargs):
-        self.json_schema_validation(request, *args, **kwargs)
-        posting = self.get_object()
-        serializer = PostingSerializer(posting, data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return JsonResponse({"result": "posting updated"}, status=status.HTTP_200_OK)
-
-
-class GigViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
+        etag = self.conditional_update(request, kwargs["pk"], partial=False)
+        response = JsonResponse(
+            {"result": "posting updated"}, status=status.HTTP_200_OK
+        )
+        if etag:
+            response["ETag"] = etag
+        return response
+
+    def partial_update(self, request, *args, **kwargs):
+        etag = self.conditional_update(request, kwargs["pk"])
+        response = JsonResponse(
+            {"result": "posting updated"}, status=status.HTTP_200_OK
+        )
+        if etag:
+            response["ETag"] = etag
+        return response
+
+
+class GigViewSet(
+    RateLimitMixin,
+    TimingMixin,
+    JsonSchemaMixin,
+    ConditionalUpdateMixin,
+    ExpandMixin,
+    BatchRetrieveMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint to view and edit gigs
     this viewset provides default actions inherited from 'ModelViewset',
-    theses are: 'list', 'create', 'destroy', 'retrieve', 'update'.
+    theses are: 'list', 'create', 'destroy', 'retrieve', 'update',
+    'partial_update'. 'batch' returns several items by id.
+    ?expand=posting embeds the posting of the gigs.
     """
 
     queryset = Gig.objects.all().order_by("status")
     serializer_class = GigSerializer
-    filterset_fields = ["id", "owner", "start_date", "end_date", "status"]
-    renderer_classes = [JSONRenderer]
+    values_serializer_class = GigValuesSerializer
+    # range lookups and orderings are limited to indexed columns, see the indexes
+    # in 'Gig.Meta'
+    filterset_fields = {
+        "id": ["exact"],
+        "owner": ["exact"],
+        "start_date": ["exact", "gte", "gt", "lte", "lt", "range"],
+        "end_date": ["exact", "gte", "gt", "lte", "lt", "range"],
+        "status": ["exact"],
+        "modified_at": ["gte", "gt"],
+    }
+    ordering_fields = ["id", "start_date", "end_date", "status"]
+    renderer_classes = [JSONRenderer, MessagePackRenderer]
     parser_classes = [JSONParser]
+    patch_fields = ("posting", "end_date", "status")
+    # an embedded posting carries its owner
+    expandable = {"posting": "posting__owner", "posting.owner": "posting__owner"}
 
     authentication_classes = [TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
@@ -342,65 +820,132 @@ class GigViewSet(JsonSchemaMixin, viewsets.ModelViewSet):
         return schema
 
     def get_object(self):
-        obj = Gig.objects.get(pk=self.kwargs["pk"])
+        # the owner is needed by the permission check and the serializer
+        obj = Gig.objects.select_related("owner", *self.expand_lookups()).get(
+            pk=self.kwargs["pk"]
+        )
         self.check_object_permissions(self.request, obj)
         return obj
 
     @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
+    @method_decorator(vary_on_headers("Authorization", "Accept"))
     def list(self, request, *args, **kwargs):
-        response = super().list(request, *args, **kwargs)
-        body = MasonBuilder(items=[])
-        for gig in response.data:
-            item = MasonBuilder(gig)
-            self_url = reverse("gigs-detail", kwargs={"pk": gig["id"]})
-            item.add_control("self", self_url)
-            body["items"].append(item)
-
-        base_url = request.build_absolute_uri(reverse("gigs-list"))
-        body.add_control("self", base_url)
-        body.add_control(
-            ctrl_name="filter gigs by field",
-            href=base_url + "{?id, owner, posting, start_date, end_date, status}",
-        )
+        queryset = self.filter_queryset(self.get_queryset())
+        with phase(request, "count"):
+            counts = self.list_counts(request, queryset)
+        page, limit = self.keyset_page(request, queryset)
+        with phase(request, "serialize"):
+            gigs = self.values_serializer(page).data
+        next_url = self.next_page(request, gigs, limit)
+        with phase(request, "mason"):
+            body = MasonBuilder(items=[])
+            if counts is not None:
+                body["counts"] = counts
+            for gig in gigs:
+                item = MasonBuilder(gig)
+                self_url = reverse("gigs-detail", kwargs={"pk": gig["id"]})
+                item.add_control("self", self_url)
+                body["items"].append(item)
+
+            base_url = request.build_absolute_uri(reverse("gigs-list"))
+            body.add_control("self", base_url)
+            body.add_control(
+                ctrl_name="filter gigs by field",
+                href=base_url + "{?id, owner, posting, start_date, end_date, status}",
+            )
+            body.add_control(
+                ctrl_name="filter gigs by range",
+                href=base_url + "{?start_date__gte, start_date__lt, end_date__gte,"
+                "end_date__lt, end_date__range}",
+            )
+            body.add_control(ctrl_name="order gigs", href=base_url + "{?ordering}")
+            body.add_control(
+                ctrl_name="page through gigs", href=base_url + "{?limit,after,counts}"
+            )
+            body.add_control(
+                ctrl_name="gigs changed since",
+                href=base_url + "{?modified_at__gte,limit,after,counts}",
+            )
+            if next_url:
+                body.add_control("next", next_url)
+            body.add_control(
+                ctrl_name="expand related objects", href=base_url + "{?expand}"
+            )
+
+            body.add_control(
+                ctrl_name="get gigs by ids", href=base_url + "batch/{?ids}"
+            )
+
+            body.add_control_post(
+                ctrl_name="gig: create",
+                title="add a new gig",
+                href=base_url,
+                schema=GigViewSet.json_schema(),
+            )
+
+        return Response(body, headers=self.page_headers(limit))
 
-        body.add_control_post(
-            ctrl_name="gig: create",
-            title="add a new gig",
-            href=base_url,
-            schema=GigViewSet.json_schema(),
-        )
-        return JsonResponse(body)
-
-    @method_decorator(cache_page(60 * 2))
-    @method_decorator(vary_on_headers("Authorization"))
     def retrieve(self, request, *args, **kwargs):
-        response = super().retrieve(request, *args, **kwargs)
-        body = MasonBuilder(response.data)
-        self_url = reverse("gigs-detail", kwargs={"pk": response.data["id"]})
-        body.add_control("self", self_url)
-        body.add_control_put(
-            title="update existing gig", href=self_url, schema=GigViewSet.json_schema()
-        )
-        body.add_control_delete(title="remove a gig", href=self_url)
-        return JsonResponse(body)
+        # not page cached: the ETag must change as soon as the version does
+        gig = self.get_object()
+        expand = self.get_expand()
+        etag = self.etag(gig.version)
+        if expand:
+            # the representation also changes with the embedded posting,
+            # which the gig loses when the posting is deleted
+            posting_version = gig.posting.version if gig.posting else 0
+            etag = f'W/"{gig.version}.{posting_version}"'
+        if self.not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        with phase(request, "serialize"):
+            if expand:
+                data = ExpandedGigSerializer(gig).data
+            else:
+                data = self.get_serializer(gig).data
+        with phase(request, "mason"):
+            body = MasonBuilder(data)
+            self_url = reverse("gigs-detail", kwargs={"pk": data["id"]})
+            body.add_control("self", self_url)
+            body.add_control_put(
+                title="update existing gig",
+                href=self_url,
+                schema=GigViewSet.json_schema(),
+            )
+            body.add_control_patch(
+                title="update some fields of a gig",
+                href=self_url,
+                schema=self.partial_json_schema(),
+            )
+            body.add_control_delete(title="remove a gig", href=self_url)
+        return Response(body, headers={"ETag": etag})
 
     def perform_create(self, serializer):
         gig = serializer.save(owner=self.request.user)
-        gig.posting.status = "accepted"
-        gig.posting.save()
+        # a new version of the posting, its ETag must change with its status
+        Posting.objects.filter(pk=gig.posting_id).update(
+            status="accepted", version=F("version") + 1, modified_at=timezone.now()
+        )
+        # QuerySet.update() sends no signals
+        invalidate(Posting)
 
+    @idempotent
     def create(self, request, *args, **kwargs):
-        self.json_schema_validation(request, *args, **kwargs)
+        self.json_schema_validation(request)
         serializer = GigSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         return JsonResponse({"result": "gig added"}, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        self.json_schema_validation(request, *args, **kwargs)
-        gig = self.get_object()
-        serializer = GigSerializer(gig, data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return JsonResponse({"result": "gig updated"}, status=status.HTTP_200_OK)
+        etag = self.conditional_update(request, kwargs["pk"], partial=False)
+        response = JsonResponse({"result": "gig updated"}, status=status.HTTP_200_OK)
+        if etag:
+            response["ETag"] = etag
+        return response
+
+    def partial_update(self, request, *args, **kwargs):
+        etag = self.conditional_update(request, kwargs["pk"])
+        response = JsonResponse({"result": "gig updated"}, status=status.HTTP_200_OK)
+        if etag:
+            response["ETag"] = etag
+        return response
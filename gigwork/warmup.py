@@ -0,0 +1,70 @@
+"""
+Worker start-up. 'warm_up()' does the one-off work of the first request while
+the application is loaded: it builds the URL resolver and its reverse lookup
+tables, imports the classes named in the REST framework settings and builds the
+serializer fields. 'prepare()' runs it and then freezes the garbage collector,
+so servers that load the application before forking (gunicorn --preload) share
+the resulting objects with every worker; without the freeze, the first
+collection in a worker touches every object and copies the pages holding them.
+
+No database connection is opened here, a connection must not be inherited by
+forked workers.
+
+Sources:
+https://docs.python.org/3/library/gc.html#gc.freeze
+https://docs.djangoproject.com/en/5.1/ref/urlresolvers/#resolve
+https://docs.gunicorn.org/en/stable/settings.html#preload-app
+"""
+
+import gc
+
+from django.urls import get_resolver, resolve, reverse
+from rest_framework.settings import api_settings
+
+from gigwork.serializers import (
+    ExpandedGigSerializer,
+    GigSerializer,
+    PostingSerializer,
+    UserSerializer,
+)
+
+# routes of the first requests of a worker
+WARM_URL_NAMES = ("api-root", "users-list", "postings-list", "gigs-list")
+WARM_SETTINGS = (
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_THROTTLE_CLASSES",
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+    "DEFAULT_FILTER_BACKENDS",
+    "EXCEPTION_HANDLER",
+)
+
+
+def warm_up():
+    """
+    do the per-process work of the first request before it arrives
+    """
+    get_resolver().reverse_dict  # pylint: disable=expression-not-assigned
+    for name in WARM_URL_NAMES:
+        resolve(reverse(name))
+    for name in WARM_SETTINGS:
+        getattr(api_settings, name)
+    for serializer in (
+        UserSerializer,
+        PostingSerializer,
+        GigSerializer,
+        ExpandedGigSerializer,
+    ):
+        serializer().fields  # pylint: disable=expression-not-assigned
+
+
+def prepare():
+    """
+    warm up and move everything allocated so far out of the collector's reach.
+    There is no collection before the freeze, it costs more at start-up than
+    the little garbage it would free.
+    """
+    warm_up()
+    gc.freeze()
@@ -111,23 +111,34 @@ def poll_with_cli_and_build_stats():
 
         print("Polling for gigs and postings...")
         original_argv = sys.argv.copy()
-        sys.argv = [
-            "gig_client.py",
-            args.server_ip,
-            "gigs",
-            "list",
-            "--json_to_file=gigs.json",
-        ]
-        gig_client.main()
-        sys.argv = [
-            "gig_client.py",
-            args.server_ip,
-            "postings",
-            "list",
-            "--json_to_file=postings.json",
-        ]
-        gig_client.main()
-        sys.argv = original_argv
+        try:
+            sys.argv = [
+                "gig_client.py",
+                args.server_ip,
+                "gigs",
+                "list",
+                "--json_to_file=gigs.json",
+                "--msgpack",
+                "--http-cache",
+            ]
+            gig_client.main()
+            sys.argv = [
+                "gig_client.py",
+                args.server_ip,
+                "postings",
+                "list",
+                "--json_to_file=postings.json",
+                "--msgpack",
+                "--http-cache",
+            ]
+            gig_client.main()
+        except (gig_client.APIError, gig_client.TransportError) as error:
+            # retries are exhausted, try again at the next poll
+            print(f"Polling failed: {error}")
+            time.sleep(120)
+            continue
+        finally:
+            sys.argv = original_argv
         print("Gigs and postings data saved to gigs.json and postings.json")
 
         print("Building statistics...")
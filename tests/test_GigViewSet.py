@@ -8,6 +8,7 @@ import os
 from datetime import datetime, timedelta
 
 import django
+import msgpack
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
@@ -54,6 +55,33 @@ class GigTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         print(response.status_code)
 
+    def test_gigs_list_msgpack(self):
+        url = "/gigwork/api/gigs/"
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        body = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(len(body["items"]), 1)
+        self.assertIn("self", body["@controls"])
+        self.assertIn("self", body["items"][0]["@controls"])
+        print(response.status_code)
+
+    def test_gigs_create_changes_posting_etag(self):
+        posting = Posting.objects.create(
+            title="other", description="description", price=10, owner=self.user1
+        )
+        url = f"/gigwork/api/postings/{posting.id}/"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.post(
+            "/gigwork/api/gigs/", {"posting": posting.id}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["status"], "accepted")
+        print(response.status_code)
+
     def test_gigs_retrieve(self):
         url = f"/gigwork/api/gigs/{self.gig.id}/"
         response = self.client.get(url)
@@ -94,6 +122,85 @@ class GigTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         print(response.status_code)
 
+    def test_gigs_partial_update(self):
+        url = f"/gigwork/api/gigs/{self.gig.id}/"
+        response = self.client.patch(url, {"status": "completed"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.gig.refresh_from_db()
+        self.assertEqual(self.gig.status, "completed")
+        self.assertEqual(self.gig.posting_id, self.posting.id)
+        # the gig keeps its own posting, the unique check must not reject it
+        response = self.client.patch(url, {"posting": self.posting.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {"end_date": "garbage"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.patch(url, {"status": "pending"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        print(response.status_code)
+
+    def test_gigs_expand(self):
+        response = self.client.get("/gigwork/api/gigs/?expand=posting")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        posting = response.json()["items"][0]["posting"]
+        self.assertEqual(posting["title"], "title")
+        self.assertEqual(posting["owner"]["id"], self.user1.id)
+
+        url = f"/gigwork/api/gigs/{self.gig.id}/?expand=posting.owner"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["posting"], posting)
+        # the expanded ETag changes with the posting
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        Posting.objects.filter(pk=self.posting.pk).update(version=2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        print(response.status_code)
+
+    def test_gigs_expand_deleted_posting(self):
+        self.posting.delete()
+        url = f"/gigwork/api/gigs/{self.gig.id}/?expand=posting"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.json()["posting"])
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        print(response.status_code)
+
+    def test_gigs_expand_parse_error(self):
+        for expand in ("owner", "posting.owner.gigs"):
+            response = self.client.get(f"/gigwork/api/gigs/?expand={expand}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print(response.status_code)
+
+    def test_gigs_batch(self):
+        response = self.client.get(f"/gigwork/api/gigs/batch/?ids={self.gig.id},0")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()["items"]), 1)
+        self.assertEqual(response.json()["not_found"], [0])
+        print(response.status_code)
+
+    def test_gigs_if_match(self):
+        url = f"/gigwork/api/gigs/{self.gig.id}/"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        data = {"posting": self.posting.id, "status": "completed"}
+        response = self.client.put(url, data, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.put(url, data, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        # without If-Match the update is unconditional
+        response = self.client.put(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.gig.refresh_from_db()
+        self.assertEqual(self.gig.version, 3)
+        print(response.status_code)
+
     def test_gigs_destroy(self):
         url = f"/gigwork/api/gigs/{self.gig.id}/"
         response = self.client.delete(url)
@@ -8,10 +8,11 @@ import os
 from datetime import datetime, timedelta
 
 import django
+import msgpack
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
-from gigwork.views import Posting, User
+from gigwork.views import Gig, Posting, User
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
@@ -45,6 +46,17 @@ class PostingTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         print(response.status_code)
 
+    def test_postings_list_msgpack(self):
+        url = "/gigwork/api/postings/"
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        body = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(len(body["items"]), 1)
+        self.assertIn("self", body["@controls"])
+        self.assertIn("self", body["items"][0]["@controls"])
+        print(response.status_code)
+
     def test_postings_retrieve(self):
         url = f"/gigwork/api/postings/{self.posting.id}/"
         response = self.client.get(url)
@@ -87,12 +99,233 @@ class PostingTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         print(response.status_code)
 
+    def test_postings_partial_update(self):
+        url = f"/gigwork/api/postings/{self.posting.id}/"
+        response = self.client.patch(url, {"price": 80.5}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.posting.refresh_from_db()
+        self.assertEqual(float(self.posting.price), 80.5)
+        self.assertEqual(self.posting.title, "title")
+        print(response.status_code)
+
+    def test_postings_partial_update_errors(self):
+        url = f"/gigwork/api/postings/{self.posting.id}/"
+        # fields outside the patch fields and empty bodies are rejected
+        response = self.client.patch(url, {"owner": 5}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(url, {}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(url, {"price": -1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for data in ({"expires_at": "garbage"}, {"status": "unknown"}):
+            response = self.client.patch(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(
+            "/gigwork/api/postings/999999/", {"price": 1}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        other = User.objects.create(
+            first_name="other", last_name="user", email="other@mail.com"
+        )
+        self.client.force_authenticate(user=other)
+        response = self.client.patch(url, {"price": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.posting.refresh_from_db()
+        self.assertEqual(float(self.posting.price), 100.0)
+        print(response.status_code)
+
+    def test_postings_range_and_ordering(self):
+        for price in (20, 60, 150, 300):
+            Posting.objects.create(
+                title=f"posting {price}",
+                description="description",
+                price=price,
+                owner=self.user,
+            )
+        url = "/gigwork/api/postings/?status=open&price__range=50,200&ordering=-price"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        prices = [item["price"] for item in response.json()["items"]]
+        self.assertEqual(prices, ["150.00", "100.00", "60.00"])
+        response = self.client.get("/gigwork/api/postings/?price__lt=50")
+        self.assertEqual(len(response.json()["items"]), 1)
+        print(response.status_code)
+
+    def test_postings_pages(self):
+        for price in (20, 60, 150):
+            Posting.objects.create(
+                title=f"posting {price}",
+                description="description",
+                price=price,
+                owner=self.user,
+            )
+        url = "/gigwork/api/postings/?status=open&limit=2"
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            body = response.json()
+            self.assertLessEqual(len(body["items"]), 2)
+            self.assertEqual(body["counts"]["total"], 4)
+            ids += [item["id"] for item in body["items"]]
+            url = body["@controls"].get("next", {}).get("href")
+        self.assertEqual(ids, sorted(Posting.objects.values_list("id", flat=True)))
+        for query in ("limit=0", "limit=1001", "limit=a", "limit=2&ordering=price"):
+            response = self.client.get(f"/gigwork/api/postings/?{query}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print(response.status_code)
+
+    def test_postings_pages_without_counts(self):
+        for title in ("second", "third"):
+            Posting.objects.create(
+                title=title, description="description", price=5, owner=self.user
+            )
+        url = "/gigwork/api/postings/?limit=1&counts=0"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("counts", response.json())
+        etag = response["ETag"]
+        # a write to another page changes the counts, not this page
+        Posting.objects.filter(title="third").delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get("/gigwork/api/postings/?limit=1")
+        self.assertEqual(response.json()["counts"]["total"], 2)
+        print(response.status_code)
+
+    def test_postings_modified_since(self):
+        other = Posting.objects.create(
+            title="other", description="description", price=5, owner=self.user
+        )
+        gig = Gig.objects.create(owner=self.user, posting=other)
+        past = datetime.now() - timedelta(hours=1)
+        Posting.objects.filter(pk=self.posting.pk).update(modified_at=past)
+        Gig.objects.filter(pk=gig.pk).update(modified_at=past)
+        since = past + timedelta(minutes=1)
+        url = f"/gigwork/api/postings/?modified_at__gte={since.isoformat()}&limit=10"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual([item["id"] for item in response.json()["items"]], [other.id])
+
+        response = self.client.patch(
+            f"/gigwork/api/postings/{self.posting.id}/", {"price": 7}, format="json"
+        )
+        self.posting.refresh_from_db()
+        self.assertGreaterEqual(self.posting.modified_at, since)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()["items"]), 2)
+        # deleting the posting of a gig marks the gig as modified
+        response = self.client.delete(f"/gigwork/api/postings/{other.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        gig.refresh_from_db()
+        self.assertIsNone(gig.posting)
+        self.assertGreaterEqual(gig.modified_at, since)
+        print(response.status_code)
+
+    def test_postings_batch(self):
+        other = Posting.objects.create(
+            title="other", description="description", price=5, owner=self.user
+        )
+        url = f"/gigwork/api/postings/batch/?ids={other.id},999,{self.posting.id},999"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = response.json()
+        self.assertEqual(
+            [item["id"] for item in body["items"]], [other.id, self.posting.id]
+        )
+        self.assertEqual(body["items"][0]["owner"]["id"], self.user.id)
+        self.assertEqual(body["not_found"], [999])
+        self.assertEqual(
+            body["items"][1]["@controls"]["self"]["href"],
+            f"/gigwork/api/postings/{self.posting.id}/",
+        )
+        print(response.status_code)
+
+    def test_postings_batch_parse_error(self):
+        for ids in ("", "1,a", ",".join(str(pk) for pk in range(101))):
+            response = self.client.get(f"/gigwork/api/postings/batch/?ids={ids}")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        print(response.status_code)
+
+    def test_postings_etag(self):
+        url = f"/gigwork/api/postings/{self.posting.id}/"
+        response = self.client.get(url)
+        self.assertEqual(response["ETag"], '"1"')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(url, {"title": "new title"}, format="json")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        print(response.status_code)
+
+    def test_postings_if_match(self):
+        url = f"/gigwork/api/postings/{self.posting.id}/"
+        data = {"title": "first", "description": "description", "price": 10.0}
+        response = self.client.put(url, data, format="json", HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        # a second writer still holding version 1 must not overwrite the first
+        data["title"] = "second"
+        response = self.client.put(url, data, format="json", HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.patch(
+            url, {"title": "second"}, format="json", HTTP_IF_MATCH='W/"2"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.posting.refresh_from_db()
+        self.assertEqual(self.posting.title, "first")
+        self.assertEqual(self.posting.version, 2)
+        response = self.client.patch(
+            url, {"title": "second"}, format="json", HTTP_IF_MATCH='"2"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # digits int() does not parse never match
+        response = self.client.patch(
+            url, {"title": "third"}, format="json", HTTP_IF_MATCH='"\u00b2"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        print(response.status_code)
+
+    def test_postings_etag_owner_rename(self):
+        url = f"/gigwork/api/postings/{self.posting.id}/"
+        etag = self.client.get(url)["ETag"]
+        response = self.client.patch(
+            f"/gigwork/api/users/{self.user.id}/", {"first_name": "new"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["owner"]["first_name"], "new")
+        print(response.status_code)
+
     def test_postings_destroy(self):
         url = f"/gigwork/api/postings/{self.posting.id}/"
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         print(response.status_code)
 
+    def test_postings_destroy_changes_gig_etag(self):
+        gig = Gig.objects.create(
+            owner=self.user,
+            posting=self.posting,
+            end_date=datetime.now().date() + timedelta(days=7),
+            status="in_progress",
+        )
+        gig_url = f"/gigwork/api/gigs/{gig.id}/"
+        etag = self.client.get(gig_url)["ETag"]
+        response = self.client.delete(f"/gigwork/api/postings/{self.posting.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        gig.refresh_from_db()
+        self.assertIsNone(gig.posting)
+        self.assertEqual(gig.version, 2)
+        response = self.client.get(gig_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        print(response.status_code)
+
     def test_posting_parse_error(self):
         url = "/gigwork/api/postings/"
         data = {
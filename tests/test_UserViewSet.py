@@ -7,6 +7,7 @@ https://www.django-rest-framework.org/api-guide/testing/#api-test-cases
 import os
 
 import django
+import msgpack
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
@@ -46,12 +47,29 @@ class UserTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         print(response.status_code)
 
+    def test_users_list_msgpack(self):
+        url = "/gigwork/api/users/"
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        body = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(len(body["items"]), 1)
+        self.assertIn("self", body["@controls"])
+        self.assertIn("self", body["items"][0]["@controls"])
+        print(response.status_code)
+
     def test_users_retrieve(self):
         url = f"/gigwork/api/users/{self.user.id}/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         print(response.status_code)
 
+    def test_users_batch(self):
+        response = self.client.get(f"/gigwork/api/users/batch/?ids={self.user.id}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["items"][0]["email"], self.user.email)
+        print(response.status_code)
+
     def test_users_filter(self):
         url = "/gigwork/api/users/?first_name=first_name&last_name=last_name&email=test@mail.com"
         response = self.client.get(url)
@@ -0,0 +1,148 @@
+"""
+Tests for the adaptive admission control.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/advanced/#the-request-factory
+"""
+
+import os
+import threading
+import time
+
+import django
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from gigwork.admission import HIGH, LOW, AdmissionController
+from gigwork.metrics import registry
+from gigwork.middleware import AdmissionControlMiddleware
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+CONFIG = {
+    "initial_limit": 2,
+    "min_limit": 1,
+    "max_limit": 4,
+    "target_latency_seconds": 0.1,
+    "low_priority_share": 0.5,
+    "max_queue_seconds": {"high": 0.05, "low": 0.0},
+    "retry_after_seconds": 1,
+    "exempt": ["metrics"],
+}
+
+
+def controller(limit=2):
+    return AdmissionController(
+        limit, min_limit=1, max_limit=4, target_latency=0.1, low_priority_share=0.5
+    )
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    """
+    Test the concurrency limit and its adaptation.
+    """
+
+    def test_limit_and_priorities(self):
+        admission = controller()
+        self.assertTrue(admission.acquire(LOW, 0))
+        # list reads only get half of the limit
+        self.assertFalse(admission.acquire(LOW, 0))
+        self.assertTrue(admission.acquire(HIGH, 0))
+        self.assertFalse(admission.acquire(HIGH, 0))
+        admission.release(0.01)
+        self.assertTrue(admission.acquire(HIGH, 0))
+
+    def test_waiting_request_is_admitted(self):
+        admission = controller(limit=1)
+        admission.acquire(HIGH, 0)
+        timer = threading.Timer(0.02, admission.release, args=(0.01,))
+        timer.start()
+        self.assertTrue(admission.acquire(HIGH, 1.0))
+        timer.join()
+
+    def test_shed_quickly(self):
+        admission = controller(limit=1)
+        admission.acquire(HIGH, 0)
+        start = time.perf_counter()
+        self.assertFalse(admission.acquire(HIGH, 0.05))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_aimd(self):
+        admission = controller()
+        for _ in range(4):
+            admission.acquire(HIGH, 0)
+            admission.release(0.01, now=0.0)
+        self.assertGreater(admission.limit, 3.0)
+        limit = admission.limit
+        admission.acquire(HIGH, 0)
+        admission.release(1.0, now=10.0)
+        self.assertAlmostEqual(admission.limit, limit * 0.9)
+        # a second slow request of the same burst does not cut again
+        admission.acquire(HIGH, 0)
+        admission.release(1.0, now=10.05)
+        self.assertAlmostEqual(admission.limit, limit * 0.9)
+        for now in range(20, 40):
+            admission.acquire(HIGH, 0)
+            admission.release(1.0, now=now)
+        self.assertEqual(admission.limit, 1)
+
+
+@override_settings(ADMISSION_CONTROL=CONFIG)
+class AdmissionControlMiddlewareTests(SimpleTestCase):
+    """
+    Test load shedding in the middleware.
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+
+    def test_classify(self):
+        self.assertEqual(
+            self.middleware.classify(self.factory.get("/gigwork/api/postings/")),
+            (LOW, "postings-list"),
+        )
+        self.assertEqual(
+            self.middleware.classify(self.factory.get("/gigwork/api/postings/1/")),
+            (HIGH, "postings-detail"),
+        )
+        # pages and id lookups are cheap
+        for query in ("?limit=10", "?limit=10&after=5", "?id=1"):
+            self.assertEqual(
+                self.middleware.classify(
+                    self.factory.get(f"/gigwork/api/postings/{query}")
+                ),
+                (HIGH, "postings-list"),
+            )
+        self.assertEqual(
+            self.middleware.classify(self.factory.post("/gigwork/api/postings/")),
+            (HIGH, "postings-list"),
+        )
+        self.assertEqual(
+            self.middleware.classify(self.factory.get("/nope")), (HIGH, None)
+        )
+
+    def test_shed_with_503(self):
+        # the only list slot is taken
+        self.middleware.controller.acquire(LOW, 0)
+        response = self.middleware(self.factory.get("/gigwork/api/postings/"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        shed = registry.counters["gigwork_requests_shed_total"][(("priority", LOW),)]
+        self.assertGreaterEqual(shed, 1)
+        # cheap requests and monitoring still get through
+        response = self.middleware(self.factory.get("/gigwork/api/postings/1/"))
+        self.assertEqual(response.status_code, 200)
+        self.middleware.controller.acquire(HIGH, 0)
+        self.assertEqual(self.middleware(self.factory.get("/metrics")).status_code, 200)
+        print(response.status_code)
+
+    def test_slot_released_after_error(self):
+        def failing(request):
+            raise ValueError("boom")
+
+        middleware = AdmissionControlMiddleware(failing)
+        with self.assertRaises(ValueError):
+            middleware(self.factory.get("/gigwork/api/postings/1/"))
+        self.assertEqual(middleware.controller.in_flight, 0)
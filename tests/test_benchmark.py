@@ -0,0 +1,56 @@
+"""
+Tests for the statistics and baseline comparison of the benchmark_api command.
+The benchmark itself seeds large databases and is run with
+'python manage.py benchmark_api', not as part of the test suite.
+"""
+
+import os
+
+import django
+from django.test import SimpleTestCase
+
+from gigwork.management.commands.benchmark_api import compare, percentile, summarize
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class BenchmarkStatisticsTests(SimpleTestCase):
+    """
+    Test percentile, summarize and compare.
+    """
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50.0)
+        self.assertEqual(percentile(values, 0.99), 99.0)
+        self.assertEqual(percentile([3.0], 0.99), 3.0)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize(self):
+        stats = summarize([0.01, 0.02, 0.03, 0.04], errors=1)
+        self.assertEqual(stats["requests"], 4)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["p50_ms"], 20.0)
+        self.assertEqual(stats["rps"], 40.0)
+
+    def test_compare(self):
+        baseline = {
+            "10000": {
+                "postings.list.cold": {
+                    "p50_ms": 10.0,
+                    "p99_ms": 20.0,
+                    "rps": 100.0,
+                    "errors": 0,
+                }
+            }
+        }
+        same = {"p50_ms": 11.0, "p99_ms": 21.0, "rps": 90.0, "errors": 0}
+        slower = {"p50_ms": 15.0, "p99_ms": 21.0, "rps": 60.0, "errors": 2}
+        self.assertEqual(
+            compare({"10000": {"postings.list.cold": same}}, baseline, 0.25), []
+        )
+        regressions = compare({"10000": {"postings.list.cold": slower}}, baseline, 0.25)
+        self.assertEqual(len(regressions), 3)
+        # actions or sizes missing from the baseline are not compared
+        self.assertEqual(compare({"100000": {"x": slower}}, baseline, 0.25), [])
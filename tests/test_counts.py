@@ -0,0 +1,117 @@
+"""
+Tests for the total and per-status counts of list responses.
+
+Sources:
+https://www.django-rest-framework.org/api-guide/testing/#api-test-cases
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#django.test.TransactionTestCase.assertNumQueries
+"""
+
+import os
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.counts import list_counts
+from gigwork.models import CountGeneration, Gig, Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class CountTests(APITestCase):
+    """
+    Test the counts and their invalidation.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        for posting_status in ("open", "open", "expired"):
+            self.posting = Posting.objects.create(
+                title="title",
+                description="description",
+                price=10,
+                status=posting_status,
+                owner=self.user,
+            )
+        self.client.force_authenticate(user=self.user)
+        return super().setUp()
+
+    def test_list_counts(self):
+        response = self.client.get("/gigwork/api/postings/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.json()["counts"],
+            {"total": 3, "status": {"expired": 1, "open": 2}, "approximate": False},
+        )
+        response = self.client.get("/gigwork/api/postings/?status=open")
+        self.assertEqual(response.json()["counts"]["total"], 2)
+        response = self.client.get("/gigwork/api/gigs/")
+        self.assertEqual(response.json()["counts"]["total"], 0)
+        print(response.status_code)
+
+    def test_counts_are_cached_until_a_write(self):
+        queryset = Posting.objects.all()
+        list_counts(queryset)
+        # only the generation token is read
+        with self.assertNumQueries(1):
+            list_counts(queryset)
+        Gig.objects.create(owner=self.user, posting=self.posting)
+        # gig writes do not touch the posting counts
+        with self.assertNumQueries(1):
+            list_counts(queryset)
+        self.posting.delete()
+        self.assertEqual(list_counts(queryset)["total"], 2)
+
+    def test_writes_of_other_workers_invalidate(self):
+        queryset = Posting.objects.all()
+        list_counts(queryset)
+        # the cached counts of this process only see the new generation token
+        # written by another worker, not a write (update() sends no signals)
+        Posting.objects.filter(status="expired").update(status="open")
+        CountGeneration.objects.update(token="other-worker")
+        counts = list_counts(queryset)
+        self.assertEqual(counts["status"], {"open": 3})
+        self.assertFalse(counts["approximate"])
+
+    def test_conditional_update_invalidates(self):
+        url = f"/gigwork/api/postings/{self.posting.pk}/"
+        self.assertEqual(list_counts(Posting.objects.all())["status"]["expired"], 1)
+        response = self.client.patch(url, {"status": "open"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list_counts(Posting.objects.all())["status"], {"open": 3})
+
+    def test_cascade_invalidates_once(self):
+        with CaptureQueriesContext(connection) as context:
+            self.user.delete()
+        writes = [
+            query
+            for query in context.captured_queries
+            if "countgeneration" in query["sql"] and "UPDATE" in query["sql"]
+        ]
+        # three postings are deleted, their generation is replaced once
+        self.assertEqual(len(writes), 1)
+
+    @override_settings(COUNT_APPROXIMATE_THRESHOLD=2)
+    def test_approximate_counts(self):
+        queryset = Posting.objects.all()
+        list_counts(queryset)
+        Posting.objects.create(
+            title="title", description="description", price=10, owner=self.user
+        )
+        # large counts are reused after a write until they expire
+        with self.assertNumQueries(1):
+            counts = list_counts(queryset)
+        self.assertEqual(counts["total"], 3)
+        self.assertTrue(counts["approximate"])
+        # small counts are always exact
+        counts = list_counts(queryset.filter(status="expired"))
+        self.assertFalse(counts["approximate"])
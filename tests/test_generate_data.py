@@ -0,0 +1,81 @@
+"""
+Tests for the generate_data management command.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#management-commands
+"""
+
+import os
+from io import StringIO
+
+import django
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from gigwork.models import Gig, Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+def generate(**options):
+    """
+    run the command quietly
+    """
+    call_command("generate_data", stdout=StringIO(), **options)
+
+
+def posting_content():
+    """
+    return the generated postings without the generated timestamps
+    """
+    return list(
+        Posting.objects.order_by("id").values_list(
+            "title", "description", "price", "status"
+        )
+    )
+
+
+class GenerateDataTests(TestCase):
+    """
+    Test the generate_data command.
+    """
+
+    def test_counts_and_tokens(self):
+        # gigs span several batches too
+        generate(users=20, postings=300, gigs=150, batch_size=64)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Token.objects.count(), 20)
+        self.assertEqual(Posting.objects.count(), 300)
+        self.assertEqual(Gig.objects.count(), 150)
+
+    def test_distributions(self):
+        generate(users=20, postings=500, gigs=100)
+        statuses = set(Posting.objects.values_list("status", flat=True))
+        self.assertEqual(statuses, {"open", "expired", "accepted"})
+        self.assertEqual(Posting.objects.filter(status="accepted").count(), 100)
+        for gig in Gig.objects.select_related("posting"):
+            self.assertEqual(gig.posting.status, "accepted")
+            self.assertNotEqual(gig.owner_id, gig.posting.owner_id)
+        # owners are skewed, the most active user owns more than an even share
+        top_owner = (
+            Posting.objects.values("owner")
+            .annotate(count=Count("id"))
+            .order_by("-count")
+            .first()
+        )
+        self.assertGreater(top_owner["count"], 500 / 20)
+
+    def test_deterministic_seed(self):
+        generate(users=10, postings=100, gigs=10, seed=42)
+        first = posting_content()
+        Posting.objects.all().delete()
+        User.objects.all().delete()
+        generate(users=10, postings=100, gigs=10, seed=42)
+        self.assertEqual(posting_content(), first)
+
+    def test_too_many_gigs(self):
+        with self.assertRaises(CommandError):
+            generate(users=10, postings=5, gigs=10)
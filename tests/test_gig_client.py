@@ -0,0 +1,474 @@
+"""
+Tests for the command line client. Requests are answered by a stub session, or
+by a live server for the import, export and sync actions.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#liveservertestcase
+https://docs.python.org/3/library/unittest.mock.html
+"""
+
+import itertools
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+import django
+import requests
+from django.core.cache import cache, caches
+from django.test import LiveServerTestCase, SimpleTestCase
+from rest_framework.authtoken.models import Token
+
+import gig_client
+from gigwork.models import Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+HOST = "http://testserver"
+
+
+def make_response(status_code=200, body=b"", headers=None, method="GET", url=HOST):
+    """
+    return a requests response with the given status, body and headers
+    """
+    # pylint: disable=protected-access
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    response._content_consumed = True
+    response.headers.update(headers or {})
+    response.url = url
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+class StubSession:
+    """
+    stand-in for requests.Session answering with queued responses, exceptions
+    in the queue are raised
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.headers = {"Accept": "application/json"}
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_client(*responses, cache=None, retries=gig_client.RETRIES):
+    """
+    return an API client whose requests are answered by a StubSession
+    """
+    client = gig_client.APIDataSource(HOST, cache=cache, retries=retries)
+    client.session = StubSession(*responses)
+    return client
+
+
+class HTTPCacheTests(SimpleTestCase):
+    """
+    Test the response cache of --http-cache.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "http.sqlite3")
+
+    def test_memory_evicts_least_recently_used(self):
+        http_cache = gig_client.HTTPCache(memory_bytes=10)
+        http_cache.put("a", "/a", make_response(body=b"aaaaa"), 60)
+        http_cache.put("b", "/b", make_response(body=b"bbbbb"), 60)
+        http_cache.get("a")
+        http_cache.put("c", "/c", make_response(body=b"ccccc"), 60)
+        self.assertEqual(list(http_cache.memory), ["a", "c"])
+        self.assertIsNone(http_cache.get("b"))
+        self.assertEqual(http_cache.memory_size, 10)
+
+    def test_sqlite_store_is_bounded_and_persistent(self):
+        clock = itertools.count(1000)
+        with mock.patch.object(gig_client.time, "time", lambda: next(clock)):
+            http_cache = gig_client.HTTPCache(self.path, max_bytes=10, memory_bytes=0)
+            http_cache.put("a", "/a", make_response(body=b"aaaaa"), 60)
+            http_cache.put("b", "/b", make_response(body=b"bbbbb"), 60)
+            http_cache.get("a")
+            http_cache.put("c", "/c", make_response(body=b"ccccc"), 60)
+            http_cache.close()
+            reopened = gig_client.HTTPCache(self.path, memory_bytes=0)
+            self.assertEqual(reopened.get("a")["body"], b"aaaaa")
+            self.assertIsNone(reopened.get("b"))
+            self.assertEqual(reopened.get("c")["body"], b"ccccc")
+            reopened.invalidate("/c")
+            self.assertIsNone(reopened.get("c"))
+            reopened.close()
+
+    def test_fresh_response_is_not_requested(self):
+        response = make_response(
+            body={"items": []}, headers={"Cache-Control": "max-age=60"}
+        )
+        client = stub_client(response, cache=gig_client.HTTPCache())
+        self.assertEqual(client.get("/items/"), {"items": []})
+        self.assertEqual(client.get("/items/"), {"items": []})
+        self.assertEqual(len(client.session.calls), 1)
+
+    def test_stale_response_is_revalidated(self):
+        first = make_response(
+            body={"id": 1}, headers={"Cache-Control": "no-cache", "ETag": '"1"'}
+        )
+        not_modified = make_response(304, headers={"Cache-Control": "max-age=60"})
+        client = stub_client(first, not_modified, cache=gig_client.HTTPCache())
+        client.get("/items/1/")
+        # the 304 gives the stored body a new lifetime
+        self.assertEqual(client.get("/items/1/"), {"id": 1})
+        self.assertEqual(client.get("/items/1/"), {"id": 1})
+        calls = client.session.calls
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[1][2]["headers"], {"If-None-Match": '"1"'})
+
+    def test_cache_lifetime(self):
+        cases = [
+            ({"Cache-Control": "no-store, max-age=60"}, None),
+            ({"Cache-Control": "private, no-cache"}, 0),
+            ({"Cache-Control": 'max-age="30"'}, 30),
+            ({}, 0),
+        ]
+        for headers, lifetime in cases:
+            self.assertEqual(gig_client.cache_lifetime(headers), lifetime)
+
+
+class RequestRetryTests(SimpleTestCase):
+    """
+    Test the retries of failed requests.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(gig_client.time, "sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retry_after_is_waited(self):
+        client = stub_client(
+            make_response(503, headers={"Retry-After": "2"}), make_response()
+        )
+        self.assertEqual(client.request("GET", "/items/").status_code, 200)
+        self.sleep.assert_called_once_with(2)
+
+    def test_backoff_has_full_jitter(self):
+        with mock.patch.object(
+            gig_client.random, "uniform", side_effect=lambda low, high: high
+        ) as uniform:
+            self.assertEqual(gig_client.backoff(0), gig_client.RETRY_BACKOFF)
+            self.assertEqual(gig_client.backoff(2), gig_client.RETRY_BACKOFF * 4)
+            self.assertEqual(gig_client.backoff(20), gig_client.RETRY_MAX_BACKOFF)
+        self.assertEqual(
+            uniform.call_args_list[0], mock.call(0, gig_client.RETRY_BACKOFF)
+        )
+
+    def test_transport_error_after_retries(self):
+        errors = [requests.ConnectionError("refused")] * 3
+        client = stub_client(*errors, retries=2)
+        with self.assertRaises(gig_client.TransportError):
+            client.request("GET", "/items/")
+        self.assertEqual(len(client.session.calls), 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_client_error_is_not_retried(self):
+        client = stub_client(make_response(400, body={"detail": "bad"}))
+        with self.assertRaises(gig_client.ClientError):
+            client.request("GET", "/items/")
+        self.assertEqual(len(client.session.calls), 1)
+
+    def test_post_without_key_is_not_retried(self):
+        client = stub_client(make_response(503, method="POST"))
+        with self.assertRaises(gig_client.ServerError):
+            client.request("POST", "/items/", json={})
+        self.assertEqual(len(client.session.calls), 1)
+
+    def test_post_is_retried_with_the_same_key(self):
+        client = stub_client(
+            make_response(503, method="POST"),
+            make_response(409, method="POST"),
+            make_response(201, body={"id": 1}, method="POST"),
+        )
+        self.assertEqual(client.post("/items/", {"title": "title"}), {"id": 1})
+        keys = {call[2]["headers"]["Idempotency-Key"] for call in client.session.calls}
+        self.assertEqual(len(client.session.calls), 3)
+        self.assertEqual(len(keys), 1)
+
+
+class IterItemsTests(SimpleTestCase):
+    """
+    Test decoding the items of a list response read in chunks.
+    """
+
+    body = {
+        "items": [
+            {"id": 1, "title": 'brackets ] } and "quotes", {'},
+            {"id": 2, "owner": {"id": 3, "@controls": {"self": {"href": "/u/3/"}}}},
+            {"id": 3, "title": "☃ \\u2603"},
+        ],
+        "@controls": {"next": {"href": "/items/?after=3"}},
+    }
+
+    @staticmethod
+    def decode(chunks):
+        items = gig_client.iter_items(chunks)
+        decoded = []
+        while True:
+            try:
+                decoded.append(next(items))
+            except StopIteration as end:
+                return decoded, end.value
+
+    def test_items_across_chunk_boundaries(self):
+        text = json.dumps(self.body, indent=1, ensure_ascii=False)
+        for size in (1, 2, 5, 17, 64, len(text)):
+            chunks = [text[i : i + size] for i in range(0, len(text), size)]
+            items, rest = self.decode(chunks)
+            self.assertEqual(items, self.body["items"], size)
+            self.assertEqual(rest, {"@controls": self.body["@controls"]}, size)
+
+    def test_object_not_starting_with_items(self):
+        text = json.dumps({"counts": {"total": 1}, "items": [{"id": 1}]})
+        items, rest = self.decode([text[:10], text[10:]])
+        self.assertEqual(items, [{"id": 1}])
+        self.assertEqual(rest, {"counts": {"total": 1}})
+
+    def test_truncated_body(self):
+        text = json.dumps(self.body)[:40]
+        with self.assertRaises(ValueError):
+            self.decode([text[:20], text[20:]])
+
+
+class DiscoveryCacheTests(SimpleTestCase):
+    """
+    Test caching the control URIs and resource keys of the API.
+    """
+
+    root = {
+        "@controls": {
+            "users": {"href": "/gigwork/api/users/"},
+            "schema": {"href": "/gigwork/api/schema/"},
+        }
+    }
+    schema = {
+        "components": {
+            "schemas": {
+                "User": {
+                    "properties": {
+                        "id": {"readOnly": True},
+                        "first_name": {},
+                        "email": {},
+                    }
+                },
+                "Posting": {
+                    "properties": {
+                        "title": {},
+                        "created_at": {"readOnly": True},
+                        "expires_at": {"nullable": True},
+                    }
+                },
+            }
+        }
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def discovery(self, client, ttl=gig_client.DISCOVERY_TTL):
+        return gig_client.DiscoveryCache(client, HOST, self.directory, ttl)
+
+    def test_discovered_once_within_ttl(self):
+        client = stub_client(
+            make_response(body=self.root),
+            make_response(body=self.schema, headers={"ETag": '"s1"'}),
+        )
+        discovery = self.discovery(client)
+        self.assertEqual(discovery.control("users"), "/gigwork/api/users/")
+        self.assertEqual(discovery.resource_keys("users"), ["first_name", "email"])
+        self.assertEqual(len(client.session.calls), 2)
+        # a new process reads the file and sends nothing
+        discovery = self.discovery(stub_client())
+        self.assertEqual(discovery.control("users"), "/gigwork/api/users/")
+        self.assertEqual(discovery.resource_keys("users"), ["first_name", "email"])
+
+    def test_schema_revalidated_after_ttl(self):
+        client = stub_client(
+            make_response(body=self.root),
+            make_response(body=self.schema, headers={"ETag": '"s1"'}),
+        )
+        self.discovery(client).resource_keys("users")
+        client = stub_client(make_response(body=self.root), make_response(304))
+        discovery = self.discovery(client, ttl=0)
+        self.assertEqual(discovery.resource_keys("users"), ["first_name", "email"])
+        self.assertEqual(client.session.calls[1][2]["headers"]["If-None-Match"], '"s1"')
+
+    def test_writable_keys(self):
+        client = stub_client(
+            make_response(body=self.root),
+            make_response(body=self.schema, headers={"ETag": '"s1"'}),
+        )
+        discovery = self.discovery(client)
+        # fields the server sets are not prompted for, but may be imported
+        self.assertEqual(discovery.resource_keys("postings"), ["title"])
+        self.assertEqual(discovery.writable_keys("postings"), ["title", "expires_at"])
+        self.assertEqual(discovery.writable_keys("users"), ["first_name", "email"])
+
+    def test_file_without_writable_keys_is_refreshed(self):
+        path = os.path.join(self.directory, "testserver.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "root": {
+                        "controls": {"schema": "/gigwork/api/schema/"},
+                        "checked_at": time.time(),
+                    },
+                    "schema": {
+                        "etag": '"s1"',
+                        "keys": {"users": ["first_name", "email"]},
+                        "checked_at": time.time(),
+                    },
+                },
+                file,
+            )
+        client = stub_client(make_response(body=self.schema, headers={"ETag": '"s1"'}))
+        discovery = self.discovery(client)
+        self.assertEqual(discovery.writable_keys("users"), ["first_name", "email"])
+        self.assertNotIn("If-None-Match", client.session.calls[0][2]["headers"])
+
+    def test_unreadable_file_is_ignored(self):
+        path = os.path.join(self.directory, "testserver.json")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("not json")
+        client = stub_client(make_response(body=self.root))
+        self.assertEqual(self.discovery(client).control("users"), "/gigwork/api/users/")
+
+
+class LiveClientTests(LiveServerTestCase):
+    """
+    Test the import, export and sync actions against a live server.
+    """
+
+    def setUp(self):
+        cache.clear()
+        caches["throttle"].clear()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = gig_client.APIDataSource(
+            self.live_server_url, tkn=f"Token {token.key}"
+        )
+        self.addCleanup(self.client.session.close)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        discovery = gig_client.DiscoveryCache(
+            self.client, self.live_server_url, self.directory
+        )
+        self.postings_uri = discovery.control("postings")
+        self.posting_keys = discovery.resource_keys("postings")
+        self.posting_writable_keys = discovery.writable_keys("postings")
+        self.statuses = []
+        session_request = self.client.session.request
+
+        def request(*args, **kwargs):
+            response = session_request(*args, **kwargs)
+            self.statuses.append(response.status_code)
+            return response
+
+        self.client.session.request = request
+
+    def test_import_reports_failures(self):
+        path = os.path.join(self.directory, "postings.ndjson")
+        report = os.path.join(self.directory, "failures.ndjson")
+        valid = {"title": "title", "description": "description", "price": 10}
+        lines = [
+            json.dumps({**valid, "expires_at": "2030-01-01T12:00:00Z"}),
+            "not json",
+            json.dumps({**valid, "colour": "red"}),
+            json.dumps({**valid, "price": -10}),
+            json.dumps({**valid, "title": "second", "status": "open"}),
+        ]
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        gig_client.import_func(
+            self.client,
+            self.postings_uri,
+            self.posting_writable_keys,
+            path,
+            None,
+            2,
+            report,
+        )
+        self.assertEqual(Posting.objects.count(), 2)
+        self.assertEqual(Posting.objects.filter(expires_at__year=2030).count(), 1)
+        with open(report, encoding="utf-8") as file:
+            failures = [json.loads(line) for line in file]
+        self.assertEqual([failure["line"] for failure in failures], [2, 3, 4])
+        self.assertEqual(failures[0]["error"], "not a JSON object")
+        self.assertIn("unknown fields: colour", failures[1]["error"])
+        self.assertIn("400", failures[2]["error"])
+        print(len(failures))
+
+    def test_export_follows_pages(self):
+        for i in range(5):
+            Posting.objects.create(
+                title=f"title {i}", description="description", price=i, owner=self.user
+            )
+        path = os.path.join(self.directory, "postings.ndjson")
+        gig_client.export_func(self.client, self.postings_uri, path, page_size=2)
+        with open(path, encoding="utf-8") as file:
+            items = [json.loads(line) for line in file]
+        self.assertEqual(
+            [item["id"] for item in items],
+            list(Posting.objects.order_by("id").values_list("id", flat=True)),
+        )
+        self.assertNotIn("@controls", items[0])
+        print(len(items))
+
+    def test_mirror_sync_removes_deleted_items(self):
+        uri = self.postings_uri
+        for i in range(5):
+            Posting.objects.create(
+                title=f"title {i}", description="description", price=i, owner=self.user
+            )
+        ids = list(Posting.objects.order_by("id").values_list("id", flat=True))
+        with gig_client.Mirror(self.live_server_url, self.directory) as mirror:
+            with self.assertRaises(gig_client.NotSyncedError):
+                mirror.items("postings")
+            self.assertEqual(
+                mirror.sync(self.client, "postings", uri, self.posting_keys, 2), (5, 0)
+            )
+            self.assertEqual(mirror.metadata("postings"), (uri, self.posting_keys))
+
+            self.client.delete(f"{uri}{ids[3]}/")
+            self.statuses.clear()
+            written, deleted = mirror.sync(
+                self.client, "postings", uri, self.posting_keys, 2
+            )
+            self.assertEqual(deleted, 1)
+            # the first page did not change, the later ones lost an item
+            self.assertIn(304, self.statuses)
+            mirrored = [item["id"] for item in mirror.items("postings")["items"]]
+            self.assertEqual(mirrored, ids[:3] + ids[4:])
+            self.assertEqual(
+                [
+                    item["id"]
+                    for item in mirror.items("postings", {"price": 4})["items"]
+                ],
+                [ids[4]],
+            )
+        print(written, deleted)
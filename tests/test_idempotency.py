@@ -0,0 +1,155 @@
+"""
+Tests for Idempotency-Key handling of the create actions.
+
+Sources:
+https://www.django-rest-framework.org/api-guide/testing/#api-test-cases
+"""
+
+import os
+from datetime import timedelta
+
+import django
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.idempotency import cache_key
+from gigwork.models import Gig, IdempotencyKey, Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class IdempotencyTests(APITestCase):
+    """
+    Test retries of POST requests with an Idempotency-Key.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.data = {"title": "title", "description": "description", "price": 10}
+        return super().setUp()
+
+    def post(self, data, key):
+        return self.client.post(
+            "/gigwork/api/postings/", data, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_is_replayed(self):
+        first = self.post(self.data, "key-1")
+        second = self.post(self.data, "key-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Posting.objects.count(), 1)
+        print(second.status_code)
+
+    def test_new_key_creates(self):
+        self.post(self.data, "key-1")
+        self.post(self.data, "key-2")
+        self.client.post("/gigwork/api/postings/", self.data, format="json")
+        self.assertEqual(Posting.objects.count(), 3)
+
+    def test_key_reused_for_other_request(self):
+        self.post(self.data, "key-1")
+        response = self.post({**self.data, "price": 20}, "key-1")
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Posting.objects.count(), 1)
+        print(response.status_code)
+
+    def test_keys_are_scoped_to_users(self):
+        self.post(self.data, "key-1")
+        other = User.objects.create(
+            first_name="other", last_name="user", email="other@mail.com"
+        )
+        self.client.force_authenticate(user=other)
+        response = self.post(self.data, "key-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Posting.objects.count(), 2)
+
+    def test_replay_survives_default_cache_eviction(self):
+        first = self.post(self.data, "key-1")
+        # the page cache, counts and throttle buckets may evict anything
+        cache.clear()
+        response = self.post(self.data, "key-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(Posting.objects.count(), 1)
+        print(response.status_code)
+
+    def test_request_in_progress(self):
+        first = self.post(self.data, "key-1")
+        # turn the stored record back into the claim of an unfinished request
+        request = type("Request", (), {"user": self.user})
+        IdempotencyKey.objects.filter(key=cache_key(request, "key-1")).update(
+            state="in_progress"
+        )
+        response = self.post(self.data, "key-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Posting.objects.count(), 1)
+        print(response.status_code)
+
+    def test_expired_key_is_released(self):
+        self.post(self.data, "key-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        response = self.post(self.data, "key-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Posting.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_PURGE_INTERVAL=0)
+    def test_expired_records_are_purged(self):
+        self.post(self.data, "key-1")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.post(self.data, "key-2")
+        keys = list(IdempotencyKey.objects.values_list("state", flat=True))
+        self.assertEqual(keys, ["done"])
+        print(keys)
+
+    def test_validation_error_releases_key(self):
+        response = self.post({"title": "title"}, "key-1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.post(self.data, "key-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_user_retry_is_replayed(self):
+        self.client.force_authenticate(user=None)
+        data = {"first_name": "new", "last_name": "user", "email": "new@mail.com"}
+        responses = [
+            self.client.post(
+                "/gigwork/api/users/", data, format="json", HTTP_IDEMPOTENCY_KEY="user"
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(responses[1].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses[1].json()["Token"], responses[0].json()["Token"])
+        self.assertEqual(User.objects.filter(email="new@mail.com").count(), 1)
+        print(responses[1].status_code)
+
+    def test_gig_retry_is_replayed(self):
+        owner = User.objects.create(
+            first_name="owner", last_name="user", email="owner@mail.com"
+        )
+        posting = Posting.objects.create(
+            title="title", description="description", price=10, owner=owner
+        )
+        data = {"posting": posting.pk, "status": "pending"}
+        for _ in range(2):
+            response = self.client.post(
+                "/gigwork/api/gigs/", data, format="json", HTTP_IDEMPOTENCY_KEY="gig"
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Gig.objects.count(), 1)
+        print(response.status_code)
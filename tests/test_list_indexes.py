@@ -0,0 +1,68 @@
+"""
+Tests that the supported range filters and orderings of the list endpoints are
+served by index range scans.
+
+Sources:
+https://www.sqlite.org/eqp.html
+https://www.django-rest-framework.org/api-guide/filtering/#orderingfilter
+"""
+
+import os
+
+import django
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+
+from gigwork.slow_queries import explain
+from gigwork.views import GigViewSet, PostingViewSet
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+# a status filter with any range and ordering, or a range with the ordering on
+# the same column
+SUPPORTED = [
+    (PostingViewSet, "status=open&price__range=50,200"),
+    (PostingViewSet, "status=open&price__gte=50&price__lte=200&ordering=-created_at"),
+    (PostingViewSet, "status=open&ordering=-created_at"),
+    (PostingViewSet, "status=open&expires_at__lt=2025-01-01&ordering=expires_at"),
+    (PostingViewSet, "price__gte=50&ordering=price"),
+    (PostingViewSet, "created_at__gte=2025-01-01&ordering=-created_at"),
+    (PostingViewSet, "expires_at__lt=2025-01-01&ordering=-expires_at"),
+    (GigViewSet, "status=pending&end_date__lt=2025-01-01"),
+    (GigViewSet, "status=pending&ordering=start_date"),
+    (GigViewSet, "end_date__range=2025-01-01,2025-02-01&ordering=end_date"),
+    (GigViewSet, "start_date__gte=2025-01-01&ordering=-start_date"),
+]
+
+
+class ListIndexTests(TestCase):
+    """
+    Check the query plans of the supported filter and ordering combinations.
+    """
+
+    def plan(self, viewset, query):
+        """
+        return the query plan of a list request with the given query string
+        """
+        view = viewset()
+        view.request = Request(RequestFactory().get(f"/?{query}"))
+        view.format_kwarg = None
+        view.action = "list"
+        queryset = view.filter_queryset(view.get_queryset())
+        sql, params = queryset.query.sql_with_params()
+        return explain(connection, sql, params)
+
+    def test_supported_combinations_search_an_index(self):
+        for viewset, query in SUPPORTED:
+            with self.subTest(query=query):
+                plan = self.plan(viewset, query)
+                self.assertTrue(plan[0].startswith("SEARCH"), plan)
+                self.assertIn("USING INDEX", plan[0])
+
+    def test_ordering_is_whitelisted(self):
+        # unknown ordering fields are ignored and the default ordering is kept
+        plan = self.plan(PostingViewSet, "ordering=description")
+        self.assertNotIn("description", " ".join(plan))
+        self.assertNotIn("TEMP B-TREE", " ".join(plan))
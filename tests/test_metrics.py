@@ -0,0 +1,143 @@
+"""
+Tests for the Prometheus metrics endpoint.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#overriding-settings
+https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import django
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.metrics import Registry, collect, render
+from gigwork.views import Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+def sample(text, line_start):
+    """
+    return the value of the first sample line starting with line_start
+    """
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class MetricsTests(APITestCase):
+    """
+    Test the MetricsMiddleware and the /metrics view.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        self.posting = Posting.objects.create(
+            title="title", description="description", price=100.00, owner=self.user
+        )
+        self.client.force_authenticate(user=self.user)
+        return super().setUp()
+
+    def test_metrics_labels(self):
+        before = self.client.get("/metrics").content.decode()
+        list_labels = '{action="list",viewset="postings"}'
+        count_before = sample(before, f"gigwork_requests_total{list_labels}") or 0
+        self.client.get("/gigwork/api/postings/")
+        self.client.get("/gigwork/api/postings/")
+        self.client.get("/gigwork/api/nothing/")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertEqual(
+            sample(text, f"gigwork_requests_total{list_labels}"), count_before + 2
+        )
+        self.assertIsNotNone(
+            sample(
+                text,
+                'gigwork_request_duration_seconds_bucket{action="list",'
+                'viewset="postings",le="+Inf"}',
+            )
+        )
+        self.assertIsNotNone(
+            sample(
+                text,
+                'gigwork_cache_requests_total{action="list",result="hit",'
+                'viewset="postings"}',
+            )
+        )
+        self.assertIsNotNone(sample(text, f"gigwork_cache_hit_ratio{list_labels}"))
+        self.assertIsNotNone(sample(text, f"gigwork_db_queries_total{list_labels}"))
+        self.assertIsNotNone(
+            sample(
+                text,
+                'gigwork_request_errors_total{action="get",kind="client",'
+                'viewset="unmatched"}',
+            )
+        )
+        self.assertIsNotNone(sample(text, "gigwork_requests_in_flight"))
+        print(response.status_code)
+
+    def test_metrics_multiprocess(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # snapshot of a worker that has already exited
+            with subprocess.Popen([sys.executable, "-c", "pass"]) as worker:
+                worker.wait()
+            dead = Registry()
+            labels = {"viewset": "users", "action": "retrieve"}
+            dead.inc("gigwork_requests_total", labels, 5)
+            dead.add("gigwork_requests_in_flight", {}, 3)
+            dead.observe("gigwork_request_duration_seconds", labels, 0.2)
+            snapshot = dead.snapshot()
+            snapshot["pid"] = worker.pid
+            with open(
+                os.path.join(directory, "metrics_dead.json"), "w", encoding="utf-8"
+            ) as file:
+                json.dump(snapshot, file)
+
+            with override_settings(METRICS_DIR=directory):
+                self.client = APIClient()
+                self.client.force_authenticate(user=self.user)
+                self.client.get(f"/gigwork/api/users/{self.user.id}/")
+                text = render(collect(directory))
+
+            retrieve_labels = '{action="retrieve",viewset="users"}'
+            self.assertGreaterEqual(
+                sample(text, f"gigwork_requests_total{retrieve_labels}"), 6
+            )
+            self.assertGreaterEqual(
+                sample(
+                    text,
+                    'gigwork_request_duration_seconds_bucket{action="retrieve",'
+                    'viewset="users",le="0.25"}',
+                ),
+                1,
+            )
+            # gauges of exited workers are dropped
+            self.assertLess(sample(text, "gigwork_requests_in_flight"), 3)
+            # the snapshot of the exited worker is archived and deleted
+            self.assertFalse(
+                os.path.exists(os.path.join(directory, "metrics_dead.json"))
+            )
+            # and counted once
+            total = sample(text, f"gigwork_requests_total{retrieve_labels}")
+            text = render(collect(directory))
+            self.assertEqual(
+                sample(text, f"gigwork_requests_total{retrieve_labels}"), total
+            )
+        print(text.count("\n"))
@@ -0,0 +1,259 @@
+"""
+Query budgets for every action of the viewsets and the API root. Each endpoint
+is called before and after adding rows, its query count must stay within the
+budget and must not grow with the number of rows.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#django.test.TransactionTestCase.assertNumQueries
+https://www.django-rest-framework.org/api-guide/testing/#api-test-cases
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import django
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.models import Gig, Posting, User
+from gigwork.query_budget import QueryBudgetMixin, normalize
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class QueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """
+    Test the query budget of every endpoint.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        self.other = User.objects.create(
+            first_name="other", last_name="user", email="other@mail.com"
+        )
+        self.posting = self.new_posting(self.user)
+        self.gig = Gig.objects.create(owner=self.other, posting=self.posting)
+        self.client = self.client_for(self.user)
+        self.counter = 0
+        return super().setUp()
+
+    @staticmethod
+    def client_for(user):
+        """
+        token authenticated client, the token lookup is part of the budget
+        """
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return client
+
+    @staticmethod
+    def new_posting(owner):
+        return Posting.objects.create(
+            title="title",
+            description="description",
+            expires_at=datetime.now() + timedelta(days=7),
+            price=100.00,
+            status="open",
+            owner=owner,
+        )
+
+    def grow(self):
+        """
+        add users with postings and gigs owned by different users
+        """
+        for _ in range(5):
+            self.counter += 1
+            user = User.objects.create(
+                first_name="more", last_name="rows", email=f"{self.counter}@mail.com"
+            )
+            for _ in range(3):
+                Gig.objects.create(owner=user, posting=self.new_posting(self.other))
+                self.new_posting(user)
+
+    def assert_get(self, budget, url):
+        def call():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response
+
+        self.assertQueryBudget(budget, call, self.grow)
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT 1 FROM t WHERE id = 12 AND name = 'it''s'"),
+            "SELECT %s FROM t WHERE id = %s AND name = %s",
+        )
+        self.assertEqual(normalize('WHERE "id" IN (%s, %s, %s)'), 'WHERE "id" IN (...)')
+        self.assertEqual(
+            normalize('RELEASE SAVEPOINT "s1397_x8"'), 'RELEASE SAVEPOINT "savepoint"'
+        )
+
+    def test_budget_failure_shows_new_queries(self):
+        def call():
+            return list(Posting.objects.all())
+
+        def per_row():
+            # one query for every posting, the classic N+1
+            return [posting.owner.first_name for posting in Posting.objects.all()]
+
+        self.assertQueryBudget(1, call, self.grow)
+        with self.assertRaises(AssertionError) as context:
+            self.assertQueryBudget(20, per_row, self.grow)
+        self.assertIn("+SELECT", str(context.exception))
+        self.assertIn("after growing", str(context.exception))
+
+    def test_root_budget(self):
+        self.assert_get(1, "/gigwork/api/root/")
+
+    def test_list_budgets(self):
+        self.assert_get(2, "/gigwork/api/users/")
+        # postings and gigs add one GROUP BY query for their counts and the
+        # lookup of the generation of the cached counts
+        for resource in ("postings", "gigs"):
+            with self.subTest(resource=resource):
+                self.assert_get(4, f"/gigwork/api/{resource}/")
+
+    def test_filtered_list_budgets(self):
+        # the owner filter validates the given user with one query
+        self.assert_get(5, f"/gigwork/api/postings/?owner={self.user.pk}")
+        self.assert_get(4, "/gigwork/api/gigs/?status=pending")
+
+    def test_retrieve_budgets(self):
+        self.assert_get(1, f"/gigwork/api/users/{self.user.pk}/")
+        self.assert_get(2, f"/gigwork/api/postings/{self.posting.pk}/")
+        self.assert_get(2, f"/gigwork/api/gigs/{self.gig.pk}/")
+
+    def test_expand_budgets(self):
+        # the embedded postings and their owners are joined into the same query
+        self.assert_get(4, "/gigwork/api/gigs/?expand=posting")
+        self.assert_get(2, f"/gigwork/api/gigs/{self.gig.pk}/?expand=posting")
+        self.assert_get(2, f"/gigwork/api/gigs/batch/?ids={self.gig.pk}&expand=posting")
+
+    def test_batch_budgets(self):
+        # the token and one lookup for all ids, however many rows the tables have
+        ids = f"{self.user.pk},{self.other.pk}"
+        self.assert_get(2, f"/gigwork/api/users/batch/?ids={ids}")
+        self.assert_get(2, f"/gigwork/api/postings/batch/?ids={self.posting.pk},0")
+        self.assert_get(2, f"/gigwork/api/gigs/batch/?ids={self.gig.pk}")
+
+    def test_create_budgets(self):
+        def create_user():
+            self.counter += 1
+            data = {
+                "first_name": "new",
+                "last_name": "user",
+                "email": f"new{self.counter}@mail.com",
+            }
+            response = APIClient().post("/gigwork/api/users/", data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        def create_posting():
+            data = {"title": "title", "description": "description", "price": 10}
+            response = self.client.post("/gigwork/api/postings/", data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        def create_gig(posting):
+            data = {"posting": posting.pk, "status": "pending"}
+            response = self.client.post("/gigwork/api/gigs/", data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertQueryBudget(3, create_user, self.grow)
+        # writes to postings and gigs replace the generation of their counts
+        self.assertQueryBudget(3, create_posting, self.grow)
+        self.assertQueryBudget(
+            6, create_gig, self.grow, setup=lambda: self.new_posting(self.other)
+        )
+
+    def test_update_budgets(self):
+        own_gig = Gig.objects.create(
+            owner=self.user, posting=self.new_posting(self.other)
+        )
+
+        names = iter(range(10))
+
+        def update_user(first_name="a"):
+            data = {
+                "first_name": first_name,
+                "last_name": "b",
+                "email": "test@mail.com",
+            }
+            url = f"/gigwork/api/users/{self.user.pk}/"
+            response = self.client.put(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        def rename_user():
+            update_user(f"name {next(names)}")
+
+        def update_posting():
+            data = {"title": "new", "description": "description", "price": 20}
+            url = f"/gigwork/api/postings/{self.posting.pk}/"
+            response = self.client.put(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        def update_gig():
+            data = {"posting": own_gig.posting_id, "status": "completed"}
+            url = f"/gigwork/api/gigs/{own_gig.pk}/"
+            response = self.client.put(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        def patch_posting():
+            url = f"/gigwork/api/postings/{self.posting.pk}/"
+            response = self.client.patch(url, {"price": 30}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        def patch_gig():
+            url = f"/gigwork/api/gigs/{own_gig.pk}/"
+            data = {"posting": own_gig.posting_id, "status": "pending"}
+            response = self.client.patch(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        update_user()
+        self.assertQueryBudget(3, update_user, self.grow)
+        # a new name also bumps the versions of the user's postings and gigs
+        self.assertQueryBudget(7, rename_user, self.grow)
+        self.assertQueryBudget(3, update_posting, self.grow)
+        self.assertQueryBudget(4, update_gig, self.grow)
+        # a PATCH is a single conditional UPDATE after authentication, and the
+        # new generation of the counts
+        self.assertQueryBudget(3, patch_posting, self.grow)
+        # validating the posting adds its lookup and the unique check
+        self.assertQueryBudget(4, patch_gig, self.grow)
+
+    def test_destroy_budgets(self):
+        def new_user():
+            self.counter += 1
+            user = User.objects.create(email=f"gone{self.counter}@mail.com")
+            Gig.objects.create(owner=user, posting=self.new_posting(user))
+            return user, self.client_for(user)
+
+        def destroy_user(prepared):
+            user, client = prepared
+            response = client.delete(f"/gigwork/api/users/{user.pk}/")
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        def destroy_posting(posting):
+            url = f"/gigwork/api/postings/{posting.pk}/"
+            response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        def destroy_gig(gig):
+            response = self.client.delete(f"/gigwork/api/gigs/{gig.pk}/")
+            self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        def new_gig():
+            return Gig.objects.create(
+                owner=self.user, posting=self.new_posting(self.other)
+            )
+
+        # the gigs of the user are loaded to send the signals invalidating counts
+        self.assertQueryBudget(13, destroy_user, self.grow, setup=new_user)
+        # the gig of the posting is marked modified before it loses the posting
+        self.assertQueryBudget(
+            6, destroy_posting, self.grow, setup=lambda: self.new_posting(self.user)
+        )
+        self.assertQueryBudget(4, destroy_gig, self.grow, setup=new_gig)
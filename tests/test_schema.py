@@ -0,0 +1,77 @@
+"""
+Tests for the precomputed OpenAPI schema.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#the-test-client
+"""
+
+import gzip
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import django
+import yaml
+from django.test import SimpleTestCase, override_settings
+
+from gigwork import schema
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+URL = "/gigwork/api/schema/"
+
+
+class SchemaTests(SimpleTestCase):
+    """
+    Test serving the schema from memory.
+    """
+
+    def setUp(self):
+        schema.clear()
+
+    def tearDown(self):
+        schema.clear()
+
+    def test_built_once(self):
+        with mock.patch.object(schema, "generate", wraps=schema.generate) as generate:
+            first = self.client.get(URL)
+            second = self.client.get(URL, HTTP_ACCEPT="application/json")
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], schema.YAML_MEDIA_TYPE)
+        self.assertIn("/gigwork/api/postings/", yaml.safe_load(first.content)["paths"])
+        self.assertEqual(second["Content-Type"], schema.JSON_MEDIA_TYPE)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        print(first.status_code)
+
+    def test_etag_and_cache_control(self):
+        response = self.client.get(URL)
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+        etag = response["ETag"]
+        response = self.client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        # the versioned URL never changes content
+        response = self.client.get(f"{URL}?v={etag.strip(chr(34))}")
+        self.assertIn("immutable", response["Cache-Control"])
+        print(response.status_code)
+
+    def test_gzip(self):
+        plain = self.client.get(URL)
+        response = self.client.get(URL, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        with override_settings(SCHEMA_GZIP=False):
+            response = self.client.get(URL, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_schema_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "schema.yml"
+            path.write_text("openapi: 3.0.3\npaths: {}\n", encoding="utf-8")
+            with override_settings(OPENAPI_SCHEMA_FILE=str(path)):
+                response = self.client.get(URL, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.json(), {"openapi": "3.0.3", "paths": {}})
@@ -0,0 +1,106 @@
+"""
+Parity tests for the values-based serializers used by the list endpoints.
+Their rendered output must be byte-identical to the ModelSerializers.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/overview/
+https://www.django-rest-framework.org/api-guide/renderers/#jsonrenderer
+"""
+
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import django
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from gigwork.models import Gig, Posting, User
+from gigwork.serializers import (
+    ExpandedGigSerializer,
+    GigSerializer,
+    GigValuesSerializer,
+    PostingSerializer,
+    PostingValuesSerializer,
+    UserSerializer,
+    UserValuesSerializer,
+)
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class ValuesSerializerParityTests(TestCase):
+    """
+    Compare values-based serializers against the ModelSerializers.
+    """
+
+    def setUp(self):
+        now = datetime.now()
+        self.user1 = User.objects.create(
+            first_name="Åsa",
+            last_name="Öberg",
+            email="asa@mail.com",
+            phone_number="0401234567",
+            address="Testitie 12, 90500 Oulu",
+        )
+        self.user2 = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        prices = [Decimal("0.01"), Decimal("12.5"), 100, Decimal("99999999.99")]
+        for i, price in enumerate(prices):
+            Posting.objects.create(
+                title=f"posting {i} ☃",
+                description='description with "quotes" and \n newline',
+                owner=self.user1 if i % 2 else self.user2,
+                expires_at=now + timedelta(days=i) if i else None,
+                price=price,
+                status=["open", "expired", "accepted"][i % 3],
+            )
+        postings = list(Posting.objects.order_by("id"))
+        Gig.objects.create(
+            owner=self.user2,
+            posting=postings[0],
+            end_date=now + timedelta(hours=5, microseconds=123),
+            status="in_progress",
+        )
+        Gig.objects.create(owner=self.user1, posting=postings[1], end_date=None)
+        # a gig whose posting was deleted keeps a null posting
+        Gig.objects.create(owner=self.user1, posting=postings[2], status="completed")
+        postings[2].delete()
+
+    def assert_same_rendering(self, values_serializer, model_serializer, queryset):
+        """
+        render both serializers with the JSON renderer and compare bytes
+        """
+        renderer = JSONRenderer()
+        expected = renderer.render(model_serializer(queryset, many=True).data)
+        actual = renderer.render(values_serializer(queryset).data)
+        self.assertEqual(actual, expected)
+
+    def test_users_parity(self):
+        queryset = User.objects.all().order_by("id")
+        self.assert_same_rendering(UserValuesSerializer, UserSerializer, queryset)
+
+    def test_postings_parity(self):
+        queryset = Posting.objects.all().order_by("id")
+        self.assert_same_rendering(PostingValuesSerializer, PostingSerializer, queryset)
+
+    def test_postings_filtered_parity(self):
+        queryset = Posting.objects.filter(owner=self.user1).order_by("status", "id")
+        self.assert_same_rendering(PostingValuesSerializer, PostingSerializer, queryset)
+
+    def test_gigs_parity(self):
+        queryset = Gig.objects.all().order_by("id")
+        self.assert_same_rendering(GigValuesSerializer, GigSerializer, queryset)
+
+    def test_expanded_gigs_parity(self):
+        queryset = Gig.objects.select_related("posting__owner").order_by("id")
+        renderer = JSONRenderer()
+        expected = renderer.render(ExpandedGigSerializer(queryset, many=True).data)
+        actual = renderer.render(GigValuesSerializer(queryset, expand={"posting"}).data)
+        self.assertEqual(actual, expected)
+
+    def test_empty_queryset(self):
+        queryset = Posting.objects.none()
+        self.assertEqual(PostingValuesSerializer(queryset).data, [])
@@ -0,0 +1,100 @@
+"""
+Tests for the slow-query log and the slow_query_report command.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#overriding-settings
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#management-commands
+"""
+
+import json
+import os
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.models import Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class SlowQueryLogTests(APITestCase):
+    """
+    Test SlowQueryMiddleware and the slow_query_report command.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        self.log = Path(directory.name) / "slow.ndjson"
+        # cached pages would not reach the database
+        cache.clear()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        Posting.objects.create(
+            title="title", description="description", price=10, owner=self.user
+        )
+        return super().setUp()
+
+    def get(self, url, threshold_ms):
+        """
+        request url with the slow-query log enabled, return the logged entries
+        """
+        with override_settings(
+            SLOW_QUERY_THRESHOLD_MS=threshold_ms, SLOW_QUERY_LOG=str(self.log)
+        ):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        if not self.log.exists():
+            return []
+        return [json.loads(line) for line in self.log.read_text("utf-8").splitlines()]
+
+    def test_entries(self):
+        entries = self.get("/gigwork/api/postings/?description=description", 0)
+        listing = [
+            entry
+            for entry in entries
+            if "gigwork_posting" in entry["sql"] and "COUNT" not in entry["sql"]
+        ]
+        self.assertEqual(len(listing), 1)
+        entry = listing[0]
+        self.assertEqual(entry["viewset"], "postings")
+        self.assertEqual(entry["action"], "list")
+        self.assertEqual(entry["path"], "/gigwork/api/postings/")
+        self.assertEqual(len(entry["params_fingerprint"]), 12)
+        # filtering on an unindexed column scans the table
+        self.assertTrue(any(line.startswith("SCAN") for line in entry["plan"]))
+
+    def test_threshold(self):
+        self.assertEqual(self.get("/gigwork/api/postings/", 60 * 1000), [])
+
+    def test_report(self):
+        self.get("/gigwork/api/postings/?description=description", 0)
+        self.get("/gigwork/api/postings/?description=other", 0)
+        out = StringIO()
+        call_command("slow_query_report", log=str(self.log), top=1, stdout=out)
+        self.assertIn("1. ", out.getvalue())
+        self.assertNotIn("2. ", out.getvalue())
+
+        out = StringIO()
+        call_command("slow_query_report", log=str(self.log), json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        listing = [group for group in report if "gigwork_posting" in group["sql"]]
+        self.assertEqual(listing[0]["count"], 2)
+        self.assertEqual(listing[0]["params"], 2)
+        self.assertTrue(listing[0]["full_scan"])
+        self.assertEqual(listing[0]["views"], ["postings.list"])
+
+    def test_report_without_log(self):
+        with self.assertRaises(CommandError):
+            call_command("slow_query_report", log=str(self.log), stdout=StringIO())
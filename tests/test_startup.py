@@ -0,0 +1,79 @@
+"""
+Tests for the start-up of the application: what is imported, the warm-up and
+the start-up benchmark.
+
+Sources:
+https://docs.python.org/3/library/subprocess.html#subprocess.run
+https://docs.djangoproject.com/en/5.1/ref/django-admin/#running-management-commands-from-your-code
+"""
+
+import gc
+import json
+import os
+import subprocess
+import sys
+from io import StringIO
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from gigwork.warmup import warm_up
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+# imported by the rarely used write validation and schema views only
+LAZY_MODULES = ["jsonschema", "drf_spectacular.generators", "drf_spectacular.views"]
+CHECK = """
+import json, sys, gc
+import config.wsgi
+print(json.dumps({
+    "loaded": [name for name in sys.argv[1:] if name in sys.modules],
+    "frozen": gc.get_freeze_count(),
+    "urlconf": "config.urls" in sys.modules,
+}))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    """
+    Test the start-up of a worker.
+    """
+
+    def test_worker_imports_and_warm_up(self):
+        completed = subprocess.run(
+            [sys.executable, "-c", CHECK, *LAZY_MODULES],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE="config.settings"),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(completed.stdout)
+        self.assertEqual(result["loaded"], [])
+        self.assertTrue(result["urlconf"])
+        self.assertGreater(result["frozen"], 0)
+
+    def test_warm_up_needs_no_database(self):
+        # queries are forbidden in a SimpleTestCase, and warm_up() does not freeze
+        warm_up()
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+    def test_benchmark_budget(self):
+        out = StringIO()
+        call_command("benchmark_startup", "--runs", "1", "--imports", "3", stdout=out)
+        output = out.getvalue()
+        self.assertIn('"total_p50_ms"', output)
+        self.assertIn(" ms  ", output)
+        with self.assertRaises(CommandError):
+            call_command(
+                "benchmark_startup",
+                "--runs",
+                "1",
+                "--budget-ms",
+                "1",
+                stdout=StringIO(),
+            )
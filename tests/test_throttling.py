@@ -0,0 +1,126 @@
+"""
+Tests for the token-bucket rate limiting.
+
+Sources:
+https://www.django-rest-framework.org/api-guide/testing/#api-test-cases
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#overriding-settings
+"""
+
+import os
+
+import django
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.models import Posting, User
+from gigwork.throttling import take
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+SLOW_REFILL = 0.001
+
+
+class ThrottlingTests(APITestCase):
+    """
+    Test the token, IP and action buckets.
+    """
+
+    def setUp(self):
+        caches["throttle"].clear()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        self.posting = Posting.objects.create(
+            title="title", description="description", price=10, owner=self.user
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        return super().setUp()
+
+    def test_take_refills(self):
+        first = take("bucket", "token", 2, 1.0, now=100.0)
+        take("bucket", "token", 2, 1.0, now=100.0)
+        empty = take("bucket", "token", 2, 1.0, now=100.0)
+        refilled = take("bucket", "token", 2, 1.0, now=101.5)
+        self.assertTrue(first["allowed"])
+        self.assertEqual(first["remaining"], 1)
+        self.assertFalse(empty["allowed"])
+        self.assertEqual(empty["wait"], 1.0)
+        self.assertTrue(refilled["allowed"])
+
+    @override_settings(
+        THROTTLE_BUCKETS={"token": {"capacity": 2, "refill_rate": SLOW_REFILL}}
+    )
+    def test_token_bucket(self):
+        url = f"/gigwork/api/postings/{self.posting.pk}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["RateLimit-Limit"], "2")
+        self.assertEqual(response["RateLimit-Remaining"], "1")
+        self.client.get(url)
+        # a rejected request does not reach the database
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], str(int(1 / SLOW_REFILL)))
+        self.assertEqual(response["RateLimit-Remaining"], "0")
+        print(response.status_code)
+
+    @override_settings(
+        THROTTLE_BUCKETS={
+            "actions": {"postings.list": {"capacity": 1, "refill_rate": SLOW_REFILL}}
+        }
+    )
+    def test_action_bucket(self):
+        self.assertEqual(
+            self.client.get("/gigwork/api/postings/").status_code, status.HTTP_200_OK
+        )
+        response = self.client.get("/gigwork/api/postings/")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # pages and id lookups are not full lists
+        for query in ("?limit=10", f"?id={self.posting.pk}"):
+            response = self.client.get(f"/gigwork/api/postings/{query}")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # other actions and viewsets have their own buckets
+        url = f"/gigwork/api/postings/{self.posting.pk}/"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.get("/gigwork/api/gigs/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        print(response.status_code)
+
+    @override_settings(
+        THROTTLE_BUCKETS={"ip": {"capacity": 1, "refill_rate": SLOW_REFILL}}
+    )
+    def test_ip_bucket(self):
+        data = {"first_name": "a", "last_name": "b", "email": "a@mail.com"}
+        response = APIClient().post("/gigwork/api/users/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data["email"] = "b@mail.com"
+        response = APIClient().post("/gigwork/api/users/", data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        print(response.status_code)
+
+    @override_settings(
+        THROTTLE_BUCKETS={"token": {"capacity": 10, "refill_rate": SLOW_REFILL}}
+    )
+    def test_usage_view(self):
+        self.client.get("/gigwork/api/postings/")
+        response = self.client.get("/throttle")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/throttle")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        buckets = response.json()["buckets"]
+        self.assertEqual(len(buckets), 1)
+        self.assertEqual(buckets[0]["kind"], "token")
+        self.assertEqual(buckets[0]["capacity"], 10)
+        # the list and the usage request took a token, the denied request did not
+        self.assertEqual(buckets[0]["tokens"], 8.0)
+        print(response.status_code)
@@ -0,0 +1,77 @@
+"""
+Tests for the Server-Timing instrumentation.
+
+Sources:
+https://docs.djangoproject.com/en/5.1/topics/testing/tools/#overriding-settings
+https://www.django-rest-framework.org/api-guide/testing/#api-test-cases
+"""
+
+import os
+
+import django
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from gigwork.views import Posting, User
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+
+class ServerTimingTests(APITestCase):
+    """
+    Test the ServerTimingMiddleware and the viewset hooks.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            first_name="first_name", last_name="last_name", email="test@mail.com"
+        )
+        Posting.objects.create(
+            title="title",
+            description="description",
+            price=100.00,
+            owner=self.user,
+        )
+        return super().setUp()
+
+    def get_client(self):
+        """
+        return a new client so that the middleware reads the current settings
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        return client
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_server_timing_phases(self):
+        client = self.get_client()
+        with self.assertLogs("gigwork.timing", level="INFO") as logs:
+            response = client.get("/gigwork/api/postings/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        header = response["Server-Timing"]
+        for name in ("auth;", "serialize;", "mason;", "render;", "db;", "total;"):
+            self.assertIn(name, header)
+        self.assertIn('cache;desc="miss"', header)
+        self.assertIn('"cache": "miss"', logs.output[0])
+        print(header)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_server_timing_cache_hit(self):
+        client = self.get_client()
+        client.get("/gigwork/api/postings/")
+        response = client.get("/gigwork/api/postings/")
+        self.assertIn('cache;desc="hit"', response["Server-Timing"])
+        self.assertNotIn("serialize;", response["Server-Timing"])
+        print(response["Server-Timing"])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_server_timing_off(self):
+        client = self.get_client()
+        response = client.get("/gigwork/api/postings/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Server-Timing"))
+        print(response.status_code)